@@ -3,7 +3,8 @@ from typing import Optional, List
 from fastapi import APIRouter, Response, Request, status
 
 from core.crud_helpers import PaginatedResponse
-from core.dependencies import DBSession, BusinessAndEmployeesSession, ClientAndEmployeeSession, AuthenticatedUser, \
+from core.query_budget import query_budget
+from core.dependencies import DBSession, ReadDBSession, BusinessAndEmployeesSession, ClientAndEmployeeSession, AuthenticatedUser, \
     Pagination
 from schema.booking.appointment import AppointmentBlock, \
     AppointmentCancel, AppointmentTimeslotsResponse, AppointmentScrollBookerCreate, AppointmentResponse, \
@@ -61,8 +62,9 @@ async def cancel_appointment(
 @router.get("/",
             summary='List All Appointments Filtered By User',
             response_model=PaginatedResponse[AppointmentResponse])
+@query_budget(max_queries=5)
 async def get_appointments_by_user(
-        db: DBSession,
+        db: ReadDBSession,
         pagination: Pagination,
         auth_user: AuthenticatedUser,
         as_customer: Optional[bool] = None
@@ -72,29 +74,29 @@ async def get_appointments_by_user(
 @router.get("/count",
             summary='Get User Appointments Number',
             response_model=int)
-async def get_appointment_number_by_user(db: DBSession, auth_user: AuthenticatedUser) -> int:
+async def get_appointment_number_by_user(db: ReadDBSession, auth_user: AuthenticatedUser) -> int:
     return await get_appointments_number_by_user_id(db, auth_user)
 
 @router.get("/timeslots",
             summary='Get User daily available timeslots',
             response_model=AppointmentTimeslotsResponse)
-async def get_daily_timeslots(db: DBSession, day: str, user_id: int, slot_duration: int):
+async def get_daily_timeslots(db: ReadDBSession, day: str, user_id: int, slot_duration: int):
     return await get_daily_available_slots(db, day, user_id, slot_duration)
 
 @router.get("/calendar-available-days",
             summary='Get User available days',
             response_model=List[str])
-async def get_calendar_available_days(db: DBSession, start_date: str, end_date: str, user_id: int):
+async def get_calendar_available_days(db: ReadDBSession, start_date: str, end_date: str, user_id: int):
     return await get_user_calendar_availability(db, start_date, end_date, user_id)
 
 @router.get("/calendar-events",
             summary='Get Business/Employee Calendar Events',
             response_model=CalendarEventsResponse,
             dependencies=[BusinessAndEmployeesSession])
-async def get_calendar_events(db: DBSession, start_date: str, end_date: str, user_id: int, slot_duration: int):
+async def get_calendar_events(db: ReadDBSession, start_date: str, end_date: str, user_id: int, slot_duration: int):
     return await get_user_calendar_events(db, start_date, end_date, user_id, slot_duration)
 
 @router.get("/{appointment_id}",
             summary='Get Appointment By Id')
-async def get_appointment(db: DBSession, appointment_id: int, request: Request):
+async def get_appointment(db: ReadDBSession, appointment_id: int, request: Request):
     return await get_appointment_by_id(db, appointment_id, request)
\ No newline at end of file
@@ -4,6 +4,7 @@ from fastapi import APIRouter, Request
 from schema.booking.schedule import ScheduleCreate, ScheduleUpdate, ScheduleResponse
 from service.booking.schedule import create_user_schedule, update_user_schedules, get_schedules_by_user_id
 from core.dependencies import DBSession, BusinessAndEmployeesSession, AuthenticatedUser
+from core.query_budget import query_budget
 
 router = APIRouter(tags=["Schedules"])
 
@@ -31,6 +32,7 @@ async def create_schedule(
     summary='Update Many Schedules',
     response_model=List[ScheduleResponse],
     dependencies=[BusinessAndEmployeesSession])
+@query_budget(max_queries=10)
 async def update_many_schedules(
         db: DBSession,
         schedule_update: List[ScheduleUpdate],
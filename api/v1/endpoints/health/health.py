@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from schema.health.health import DBHealthResponse
+from service.health.health import get_db_health
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+@router.get("/db",
+            summary='Database Connectivity And Connection Pool Status',
+            response_model=DBHealthResponse)
+async def db_health():
+    return await get_db_health()
@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from starlette.responses import PlainTextResponse
+from core.metrics import registry
+
+router = APIRouter(tags=["Health"])
+
+@router.get("/metrics",
+            summary='Prometheus Metrics',
+            response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
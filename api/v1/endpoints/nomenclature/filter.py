@@ -3,9 +3,10 @@ from typing import Union
 from fastapi import APIRouter, status
 from core.crud_helpers import PaginatedResponse
 from core.dependencies import DBSession, SuperAdminSession, Pagination
-from schema.nomenclature.filter import FilterResponse, FilterCreate, FilterUpdate, FilterWithSubFiltersResponse
+from schema.nomenclature.filter import FilterResponse, FilterCreate, FilterUpdate, FilterWithSubFiltersResponse, FilterIdsUpdate
 from service.nomenclature.filter import create_new_filter, get_all_filters, \
     update_filter_by_id, delete_filter_by_id, get_filters_by_business_type_id, attach_filters_to_business_type, detach_filters_from_business_type
+from service.nomenclature.filter import bulk_attach_filters_to_business_type, bulk_detach_filters_from_business_type
 
 router = APIRouter(tags=["Filters"])
 
@@ -54,4 +55,17 @@ async def attach_filters_business_type(db: DBSession, business_type_id: int, fil
     status_code=status.HTTP_204_NO_CONTENT,
     dependencies=[SuperAdminSession])
 async def detach_filters_business_type(db: DBSession, business_type_id: int, filter_id: int):
-    return await detach_filters_from_business_type(db, business_type_id, filter_id)
\ No newline at end of file
+    return await detach_filters_from_business_type(db, business_type_id, filter_id)
+
+@router.post("/business-types/{business_type_id}/filters",
+    summary='Attach Many Filters - Business Type',
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[SuperAdminSession])
+async def bulk_attach_filters_business_type(db: DBSession, business_type_id: int, filters_update: FilterIdsUpdate):
+    return await bulk_attach_filters_to_business_type(db, business_type_id, filters_update.filter_ids)
+
+@router.delete("/business-types/{business_type_id}/filters",
+    summary='Detach Many Filters - Business Type',
+    dependencies=[SuperAdminSession])
+async def bulk_detach_filters_business_type(db: DBSession, business_type_id: int, filters_update: FilterIdsUpdate):
+    return await bulk_detach_filters_from_business_type(db, business_type_id, filters_update.filter_ids)
@@ -6,11 +6,12 @@ from starlette import status
 from core.crud_helpers import PaginatedResponse
 from core.dependencies import DBSession, SuperAdminSession, Pagination
 from schema.nomenclature.profession import ProfessionCreate, ProfessionResponse, ProfessionUpdate, \
-    ProfessionWithBusinessTypesResponse
+    ProfessionWithBusinessTypesResponse, ProfessionIdsUpdate
 from service.nomenclature.profession import create_new_profession, \
     update_profession_by_id, delete_profession_by_id, get_all_professions_with_business_types, \
     get_professions_by_business_type_id, get_all_professions, attach_professions_to_business_type, \
-    detach_professions_from_business_type
+    detach_professions_from_business_type, bulk_attach_professions_to_business_type, \
+    bulk_detach_professions_from_business_type
 
 router = APIRouter(tags=["Professions"])
 
@@ -66,3 +67,16 @@ async def attach_professions_business_type(db: DBSession, business_type_id: int,
     dependencies=[SuperAdminSession])
 async def detach_professions_business_type(db:DBSession, business_type_id: int, profession_id: int):
     return await detach_professions_from_business_type(db, business_type_id, profession_id)
+
+@router.post("/business-types/{business_type_id}/professions",
+    summary='Attach Many Professions - Business Type',
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[SuperAdminSession])
+async def bulk_attach_professions_business_type(db: DBSession, business_type_id: int, professions_update: ProfessionIdsUpdate):
+    return await bulk_attach_professions_to_business_type(db, business_type_id, professions_update.profession_ids)
+
+@router.delete("/business-types/{business_type_id}/professions",
+    summary='Detach Many Professions - Business Type',
+    dependencies=[SuperAdminSession])
+async def bulk_detach_professions_business_type(db: DBSession, business_type_id: int, professions_update: ProfessionIdsUpdate):
+    return await bulk_detach_professions_from_business_type(db, business_type_id, professions_update.profession_ids)
@@ -7,12 +7,15 @@ from core.dependencies import DBSession, Pagination, BusinessSession, Authentica
 from core.dependencies import SuperAdminSession
 from schema.nomenclature.service import ServiceResponse, ServiceCreate, ServiceUpdate, ServiceIdsUpdate, \
     ServiceWithEmployeesResponse
+from schema.nomenclature.filter import FilterIdsUpdate
 from service.nomenclature.service import create_new_service, \
     delete_service_by_id, update_service_by_id, get_all_services, get_services_by_business_id, \
     get_services_by_service_domain_id, \
     get_services_by_business_type_id, update_services_by_business_id, get_services_by_user_id, \
     get_all_service_filter_relation
 from service.nomenclature.service import attach_service_to_filter, detach_service_from_filter, attach_service_to_business_type, detach_service_from_business_type
+from service.nomenclature.service import bulk_attach_services_to_business_type, bulk_detach_services_from_business_type, \
+    bulk_attach_filters_to_service, bulk_detach_filters_from_service
 
 router = APIRouter(tags=["Services"])
 
@@ -106,4 +109,26 @@ async def attach_service_business_type(db: DBSession, service_id: int, business_
     summary='Remove Service - Business Type Relation',
     status_code=status.HTTP_204_NO_CONTENT)
 async def detach_service_business_type(db: DBSession, service_id: int, business_type_id: int):
-    return await detach_service_from_business_type(db, business_type_id, service_id)
\ No newline at end of file
+    return await detach_service_from_business_type(db, business_type_id, service_id)
+
+@router.post("/services/{service_id}/filters",
+    summary='Create Many Service - Filter Relations',
+    status_code=status.HTTP_201_CREATED)
+async def bulk_attach_service_filters(db: DBSession, service_id: int, filters_update: FilterIdsUpdate):
+    return await bulk_attach_filters_to_service(db, service_id, filters_update.filter_ids)
+
+@router.delete("/services/{service_id}/filters",
+    summary='Remove Many Service - Filter Relations')
+async def bulk_detach_service_filters(db: DBSession, service_id: int, filters_update: FilterIdsUpdate):
+    return await bulk_detach_filters_from_service(db, service_id, filters_update.filter_ids)
+
+@router.post("/business-types/{business_type_id}/services",
+    summary='Create Many Service - Business Type Relations',
+    status_code=status.HTTP_201_CREATED)
+async def bulk_attach_business_type_services(db: DBSession, business_type_id: int, services_update: ServiceIdsUpdate):
+    return await bulk_attach_services_to_business_type(db, business_type_id, services_update.service_ids)
+
+@router.delete("/business-types/{business_type_id}/services",
+    summary='Remove Many Service - Business Type Relations')
+async def bulk_detach_business_type_services(db: DBSession, business_type_id: int, services_update: ServiceIdsUpdate):
+    return await bulk_detach_services_from_business_type(db, business_type_id, services_update.service_ids)
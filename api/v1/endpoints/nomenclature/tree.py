@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Request, Response, status
+
+from schema.nomenclature.tree import NomenclatureTreeResponse
+from service.nomenclature.tree import get_nomenclature_tree, etag_matches
+
+router = APIRouter(tags=["Nomenclature"])
+
+@router.get("/nomenclature/tree",
+    summary='Get Nomenclature Tree',
+    response_model=NomenclatureTreeResponse,
+    responses={status.HTTP_304_NOT_MODIFIED: {"description": "The tree matching If-None-Match is still current"}})
+async def get_tree(request: Request):
+    tree = await get_nomenclature_tree()
+    headers = {"ETag": tree.etag, "Cache-Control": "no-cache"}
+
+    if etag_matches(request.headers.get("if-none-match"), tree.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(content=tree.body, media_type="application/json", headers=headers)
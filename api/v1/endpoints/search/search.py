@@ -2,7 +2,7 @@ from typing import Optional, Union, List
 from fastapi import APIRouter, Query, Request, status
 
 from core.crud_helpers import PaginatedResponse
-from core.dependencies import DBSession, AuthenticatedUser, Pagination
+from core.dependencies import DBSession, ReadDBSession, AuthenticatedUser, Pagination
 from schema.search.search import SearchResponse, SearchCreate, UserSearchHistoryResponse, SearchUserResponse
 from service.search.search import search_keyword, search_all_users, create_user_search, get_user_search_history, \
     delete_user_search
@@ -13,7 +13,7 @@ router = APIRouter(prefix="/search", tags=["Search"])
             summary='Search keywords, users, services or business types',
             response_model=List[SearchResponse])
 async def search(
-        db: DBSession,
+        db: ReadDBSession,
         query: str = Query(min_length=1),
         lat: Optional[float] = None,
         lng: Optional[float] = None
@@ -24,7 +24,7 @@ async def search(
             summary='Search Users',
             response_model=Union[PaginatedResponse[SearchUserResponse], List[SearchUserResponse]])
 async def search_users(
-        db: DBSession,
+        db: ReadDBSession,
         query: str,
         auth_user: AuthenticatedUser,
         pagination: Pagination,
@@ -35,7 +35,7 @@ async def search_users(
 @router.get("/user-history",
             summary='List User Search History')
 async def get_user_search(
-        db: DBSession,
+        db: ReadDBSession,
         auth_user: AuthenticatedUser,
         lat: Optional[float] = None,
         lng: Optional[float] = None,
@@ -3,7 +3,7 @@ from typing import Optional, List
 from fastapi import APIRouter, Query, status
 
 from core.crud_helpers import PaginatedResponse
-from core.dependencies import DBSession, Pagination, AuthenticatedUser
+from core.dependencies import DBSession, ReadDBSession, Pagination, AuthenticatedUser
 from schema.social.post import PostCreate, UserPostResponse
 from service.social.post import create_new_post, get_posts_by_user_id, get_following_posts, \
     get_explore_feed_posts, get_video_reviews_by_user_id
@@ -14,7 +14,7 @@ router = APIRouter(tags=["Posts"])
             summary='Get User Book Now Feed',
             response_model=PaginatedResponse[UserPostResponse])
 async def get_explore_feed(
-        db: DBSession,
+        db: ReadDBSession,
         pagination: Pagination,
         auth_user: AuthenticatedUser,
         business_types: Optional[List[int]] = Query(default=None)
@@ -25,7 +25,7 @@ async def get_explore_feed(
             summary='Get User Following Posts',
             response_model=PaginatedResponse[UserPostResponse])
 async def get_following(
-        db: DBSession,
+        db: ReadDBSession,
         pagination: Pagination,
         auth_user: AuthenticatedUser
 ) -> PaginatedResponse[UserPostResponse]:
@@ -35,7 +35,7 @@ async def get_following(
             summary='List All Posts By User Id',
             response_model=PaginatedResponse[UserPostResponse])
 async def get_posts_by_user(
-        db: DBSession,
+        db: ReadDBSession,
         user_id: int,
         pagination: Pagination,
         auth_user: AuthenticatedUser
@@ -46,7 +46,7 @@ async def get_posts_by_user(
             summary='List All Posts Video Reviews By User Id',
             response_model=PaginatedResponse[UserPostResponse])
 async def get_video_reviews_by_user(
-        db: DBSession,
+        db: ReadDBSession,
         user_id: int,
         pagination: Pagination,
         auth_user: AuthenticatedUser
@@ -3,7 +3,8 @@ from fastapi.params import Depends
 from starlette.requests import Request
 
 from core.crud_helpers import PaginatedResponse
-from core.dependencies import DBSession, AuthenticatedUser, Pagination
+from core.query_budget import query_budget
+from core.dependencies import DBSession, ReadDBSession, AuthenticatedUser, Pagination
 from schema.user.user import UserBaseMinimum, UsernameUpdate, FullNameUpdate, BioUpdate, GenderUpdate, SearchUsername, \
     SearchUsernameResponse, BirthDateUpdate, UserUpdateResponse, WebsiteUpdate, PublicEmailUpdate, UserProfileResponse
 from service.user.user import get_user_followers_by_user_id, \
@@ -17,13 +18,14 @@ router = APIRouter(prefix="/users", tags=["Users"])
 @router.get("/available-username",
             summary='Search Available Username',
             response_model=SearchUsernameResponse)
-async def search_username(db: DBSession, query: SearchUsername = Depends()):
+@query_budget(max_queries=3)
+async def search_username(db: ReadDBSession, query: SearchUsername = Depends()):
     return await search_available_username(db, query)
 
 @router.get("/{user_id}/user-profile",
             summary='Get User Profile By Id',
             response_model=UserProfileResponse)
-async def get_user_profile(db: DBSession, user_id: int, auth_user: AuthenticatedUser) -> UserProfileResponse:
+async def get_user_profile(db: ReadDBSession, user_id: int, auth_user: AuthenticatedUser) -> UserProfileResponse:
     return await get_user_profile_by_id(db, user_id, auth_user)
 
 @router.patch("/user-info/fullname",
@@ -97,18 +99,18 @@ async def update_public_email(
     return await update_user_public_email(db, public_email, auth_user)
 
 @router.get("/{user_id}/dashboard-summary")
-async def get_user_dashboard_summary(db: DBSession, user_id: int, start_date: str, end_date: str, all_employees: bool = Query(False)):
+async def get_user_dashboard_summary(db: ReadDBSession, user_id: int, start_date: str, end_date: str, all_employees: bool = Query(False)):
     return await get_user_dashboard_summary_by_id(db, user_id, start_date, end_date, all_employees)
 
 @router.get("/{user_id}/product-durations", response_model=list[int])
-async def get_user_product_durations(db:DBSession, user_id: int):
+async def get_user_product_durations(db: ReadDBSession, user_id: int):
     return await get_product_durations_by_user_id(db, user_id)
 
 @router.get("/{user_id}/followers",
             summary='List User Followers',
             response_model=PaginatedResponse[UserBaseMinimum])
 async def get_user_followers(
-        db: DBSession,
+        db: ReadDBSession,
         user_id: int,
         pagination: Pagination,
         auth_user: AuthenticatedUser
@@ -119,7 +121,7 @@ async def get_user_followers(
             summary='List User Followings',
             response_model=PaginatedResponse[UserBaseMinimum])
 async def get_user_followings(
-        db: DBSession,
+        db: ReadDBSession,
         user_id: int,
         pagination: Pagination,
         auth_user: AuthenticatedUser
@@ -127,5 +129,5 @@ async def get_user_followings(
     return await get_user_followings_by_user_id(db, user_id, pagination, auth_user)
 
 @router.get("/{user_id}/available-professions")
-async def get_user_available_professions(db: DBSession, user_id: int):
+async def get_user_available_professions(db: ReadDBSession, user_id: int):
     return await get_available_professions_by_user_id(db, user_id)
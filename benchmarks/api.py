@@ -0,0 +1,427 @@
+"""
+End-to-end latency of the hot API endpoints against the synthetic dataset.
+
+By default the app from main.py runs in-process, with its lifespan, behind httpx's
+ASGI transport. With --base-url the requests go to a running server instead. Both
+need the dataset from benchmarks/dataset.py in DATABASE_URL, Redis, and the same
+SECRET_KEY as the server, since requests carry tokens signed here. /metrics is read
+with INTERNAL_API_TOKEN, which must match the server's too.
+
+Every scenario sends --warmup requests, then --requests more with --concurrency in
+flight, and reports p50/p95/p99 latency, throughput, errors and DB statements per
+request. A scenario whose error rate is above --max-error-rate fails the run.
+Statements are read from the http_request_db_statements histogram on
+/metrics before and after the scenario, so a server with several workers needs
+METRICS_DIR (and reports up to METRICS_FLUSH_INTERVAL late).
+
+Users, products and coordinates are picked from the database with --seed. The
+booked providers get a row in user_currencies if they have none, and the
+appointments created by the benchmark are placed years ahead and deleted afterwards.
+
+    python -m benchmarks.api --concurrency 16 --requests 500 --output results/api-main.json
+    python -m benchmarks.api --scenarios explore_feed following_feed --compare results/api-main.json
+    python -m benchmarks.api --base-url http://127.0.0.1:8000 --concurrency 64 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import subprocess
+import time
+from datetime import datetime, date, timedelta, timezone, time as dt_time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import asyncpg
+import httpx
+from dotenv import load_dotenv
+
+from benchmarks.dataset import _database_url
+from core.enums.role_enum import RoleEnum
+from core.security import create_token
+from schema.auth.token import TokenPayload
+
+load_dotenv()
+
+API_PREFIX = "/api/v1"
+# The feeds are read from the first pages, as most clients do
+FEED_PAGES = 3
+APPOINTMENTS_YEARS_AHEAD = 3
+
+_db_statements_line = re.compile(
+    r'^http_request_db_statements_(sum|count)\{method="([^"]*)",route="([^"]*)"\} (\S+)$', re.MULTILINE)
+
+class BenchUser:
+    __slots__ = ("id", "role", "token")
+
+    def __init__(self, id: int, role: str, token: str):
+        self.id = id
+        self.role = role
+        self.token = token
+
+class Provider:
+    __slots__ = ("user", "product_id", "duration", "currency_id")
+
+    def __init__(self, user: BenchUser, product_id: int, duration: int, currency_id: int):
+        self.user = user
+        self.product_id = product_id
+        self.duration = duration
+        self.currency_id = currency_id
+
+class Fixtures:
+    """Users, products and search inputs taken from the dataset, the same ones for the same seed."""
+
+    def __init__(self):
+        self.clients: List[BenchUser] = []
+        self.providers: List[Provider] = []
+        # (longitude, latitude, service id, sub-filter ids) of products that can be found nearby
+        self.nearby: List[Tuple[float, float, int, List[int]]] = []
+        self.keywords: List[str] = []
+        self.appointments_from = datetime.combine(
+            date.today() + timedelta(days=365 * APPOINTMENTS_YEARS_AHEAD), dt_time(6), tzinfo=timezone.utc)
+
+    @staticmethod
+    async def _user(row: asyncpg.Record) -> BenchUser:
+        role = RoleEnum[row["role"]].value
+        token = await create_token(
+            payload=TokenPayload(id=row["id"], username=row["username"], fullname=row["fullname"],
+                                 email=row["email"], role=role),
+            expires_at=timedelta(hours=6),
+            secret_key=os.environ["SECRET_KEY"]
+        )
+        return BenchUser(row["id"], role, token)
+
+    @classmethod
+    async def load(cls, conn: asyncpg.Connection, seed: int, users: int) -> "Fixtures":
+        fixtures = cls()
+        await conn.execute("SELECT setseed($1)", (seed % 1000) / 1000)
+
+        for row in await conn.fetch(
+            "SELECT u.id, u.username, u.fullname, u.email, r.name::text AS role FROM users u "
+            "JOIN roles r ON r.id = u.role_id "
+            "WHERE r.name::text = $1 AND u.active AND EXISTS (SELECT 1 FROM follows f WHERE f.follower_id = u.id) "
+            "ORDER BY random() LIMIT $2", RoleEnum.CLIENT.name, users
+        ):
+            fixtures.clients.append(await cls._user(row))
+
+        for row in await conn.fetch(
+            "SELECT u.id, u.username, u.fullname, u.email, r.name::text AS role, p.id AS product_id, p.duration, "
+            "p.currency_id FROM users u "
+            "JOIN roles r ON r.id = u.role_id "
+            "JOIN LATERAL (SELECT id, duration, currency_id FROM products WHERE user_id = u.id ORDER BY id LIMIT 1) p ON true "
+            "WHERE r.name::text = ANY($1::text[]) AND u.active "
+            "ORDER BY random() LIMIT $2", [RoleEnum.BUSINESS.name, RoleEnum.EMPLOYEE.name], users
+        ):
+            fixtures.providers.append(Provider(await cls._user(row), row["product_id"], row["duration"], row["currency_id"]))
+
+        provider_ids = [provider.user.id for provider in fixtures.providers]
+        for row in await conn.fetch(
+            "SELECT ST_X(b.coordinates) AS lon, ST_Y(b.coordinates) AS lat, p.service_id, "
+            "array_agg(psf.sub_filter_id) AS sub_filters FROM products p "
+            "JOIN businesses b ON b.id = p.business_id "
+            "JOIN product_sub_filters psf ON psf.product_id = p.id "
+            "WHERE p.user_id = ANY($1::int[]) GROUP BY b.id, p.id ORDER BY p.id", provider_ids
+        ):
+            fixtures.nearby.append((row["lon"], row["lat"], row["service_id"], list(row["sub_filters"])))
+
+        services = await conn.fetch("SELECT name FROM services ORDER BY random() LIMIT 10")
+        fixtures.keywords = [row["name"][:4].lower() for row in services] + ["user1", "user2"]
+
+        missing = [name for name in ("clients", "providers", "nearby") if not getattr(fixtures, name)]
+        if missing:
+            raise SystemExit(f"The dataset has no {', '.join(missing)} to benchmark with, load it with benchmarks.dataset")
+
+        # Bookings are refused in currencies the provider does not accept
+        await conn.executemany(
+            "INSERT INTO user_currencies (user_id, currency_id, active) SELECT $1, $2, true "
+            "WHERE NOT EXISTS (SELECT 1 FROM user_currencies WHERE user_id = $1 AND currency_id = $2)",
+            [(provider.user.id, provider.currency_id) for provider in fixtures.providers]
+        )
+        return fixtures
+
+    async def delete_created_appointments(self, conn: asyncpg.Connection) -> int:
+        result = await conn.execute(
+            "DELETE FROM appointments WHERE user_id = ANY($1::int[]) AND start_date >= $2",
+            [provider.user.id for provider in self.providers], self.appointments_from
+        )
+        return int(result.split()[-1])
+
+class BenchRequest:
+    __slots__ = ("method", "path", "params", "json", "token")
+
+    def __init__(self, method: str, path: str, token: str, params: Optional[Dict[str, Any]] = None,
+                 json: Optional[Dict[str, Any]] = None):
+        self.method = method
+        self.path = path
+        self.params = params
+        self.json = json
+        self.token = token
+
+class Scenario:
+    def __init__(self, name: str, method: str, route: str, build: Callable[[Fixtures, random.Random, int], BenchRequest]):
+        self.name = name
+        self.method = method
+        # Route template, as labelled in the metrics
+        self.route = route
+        self.build = build
+
+def _day(rng: random.Random) -> str:
+    return (date.today() + timedelta(days=rng.randint(1, 14))).isoformat()
+
+def _explore_feed(fixtures: Fixtures, rng: random.Random, index: int) -> BenchRequest:
+    client = fixtures.clients[index % len(fixtures.clients)]
+    return BenchRequest("GET", "/posts/explore", client.token, params={"page": 1 + index % FEED_PAGES, "limit": 10})
+
+def _following_feed(fixtures: Fixtures, rng: random.Random, index: int) -> BenchRequest:
+    client = fixtures.clients[index % len(fixtures.clients)]
+    return BenchRequest("GET", "/posts/following", client.token, params={"page": 1 + index % FEED_PAGES, "limit": 10})
+
+def _search(fixtures: Fixtures, rng: random.Random, index: int) -> BenchRequest:
+    client = fixtures.clients[index % len(fixtures.clients)]
+    lon, lat, _service_id, _sub_filters = rng.choice(fixtures.nearby)
+    return BenchRequest("GET", "/search/", client.token, params={"query": rng.choice(fixtures.keywords), "lat": lat, "lng": lon})
+
+def _daily_slots(fixtures: Fixtures, rng: random.Random, index: int) -> BenchRequest:
+    client = fixtures.clients[index % len(fixtures.clients)]
+    provider = rng.choice(fixtures.providers)
+    return BenchRequest("GET", "/appointments/timeslots", client.token,
+                        params={"day": _day(rng), "user_id": provider.user.id, "slot_duration": provider.duration})
+
+def _calendar_events(fixtures: Fixtures, rng: random.Random, index: int) -> BenchRequest:
+    provider = fixtures.providers[index % len(fixtures.providers)]
+    start = date.today() - timedelta(days=rng.randint(0, 21))
+    return BenchRequest("GET", "/appointments/calendar-events", provider.user.token, params={
+        "start_date": start.isoformat(), "end_date": (start + timedelta(days=6)).isoformat(),
+        "user_id": provider.user.id, "slot_duration": provider.duration
+    })
+
+def _user_profile(fixtures: Fixtures, rng: random.Random, index: int) -> BenchRequest:
+    client = fixtures.clients[index % len(fixtures.clients)]
+    profile = rng.choice(fixtures.providers).user if rng.random() < 0.7 else rng.choice(fixtures.clients)
+    return BenchRequest("GET", f"/users/{profile.id}/user-profile", client.token)
+
+def _nearby_businesses(fixtures: Fixtures, rng: random.Random, index: int) -> BenchRequest:
+    client = fixtures.clients[index % len(fixtures.clients)]
+    lon, lat, service_id, sub_filters = rng.choice(fixtures.nearby)
+    day = _day(rng)
+    return BenchRequest("GET", "/businesses/nearby", client.token, params={
+        "lon": lon + rng.gauss(0, 0.02), "lat": lat + rng.gauss(0, 0.02),
+        "start_date": day, "end_date": day, "start_time": "10:00:00", "end_time": "12:00:00",
+        "service_id": service_id, "sub_filters": sub_filters, "instant_booking": False, "page": 1, "limit": 10
+    })
+
+def _create_appointment(fixtures: Fixtures, rng: random.Random, index: int) -> BenchRequest:
+    client = fixtures.clients[index % len(fixtures.clients)]
+    provider = fixtures.providers[index % len(fixtures.providers)]
+    # A slot of its own for every request, so none of them is refused as already booked
+    start = fixtures.appointments_from + timedelta(hours=3 * (index // len(fixtures.providers)))
+    return BenchRequest("POST", "/appointments/create-scrollbooker-appointment", client.token, json={
+        "start_date": start.isoformat(), "end_date": (start + timedelta(minutes=provider.duration)).isoformat(),
+        "user_id": provider.user.id, "product_ids": [provider.product_id], "payment_currency_id": provider.currency_id
+    })
+
+SCENARIOS: Dict[str, Scenario] = {scenario.name: scenario for scenario in (
+    Scenario("explore_feed", "GET", "/posts/explore", _explore_feed),
+    Scenario("following_feed", "GET", "/posts/following", _following_feed),
+    Scenario("search_keyword", "GET", "/search/", _search),
+    Scenario("daily_slots", "GET", "/appointments/timeslots", _daily_slots),
+    Scenario("calendar_events", "GET", "/appointments/calendar-events", _calendar_events),
+    Scenario("user_profile", "GET", "/users/{user_id}/user-profile", _user_profile),
+    Scenario("nearby_businesses", "GET", "/businesses/nearby", _nearby_businesses),
+    Scenario("create_appointment", "POST", "/appointments/create-scrollbooker-appointment", _create_appointment),
+)}
+
+# Results
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest rank
+    rank = math.ceil(fraction * len(sorted_values)) - 1
+    return sorted_values[max(0, min(rank, len(sorted_values) - 1))]
+
+def parse_db_statements(metrics: str) -> Dict[Tuple[str, str], List[float]]:
+    totals: Dict[Tuple[str, str], List[float]] = {}
+    for kind, method, route, value in _db_statements_line.findall(metrics):
+        totals.setdefault((method, route), [0.0, 0.0])[0 if kind == "sum" else 1] = float(value)
+    return totals
+
+async def _db_statements(client: httpx.AsyncClient, scenario: Scenario) -> List[float]:
+    response = await client.get(f"{API_PREFIX}/metrics",
+                                headers={"Authorization": f"Bearer {os.getenv('INTERNAL_API_TOKEN')}"})
+    response.raise_for_status()
+    return parse_db_statements(response.text).get((scenario.method, scenario.route), [0.0, 0.0])
+
+async def _send(client: httpx.AsyncClient, request: BenchRequest) -> Tuple[float, int, Optional[str]]:
+    started = time.perf_counter()
+    try:
+        response = await client.request(request.method, f"{API_PREFIX}{request.path}", params=request.params,
+                                        json=request.json, headers={"Authorization": f"Bearer {request.token}"})
+    except httpx.HTTPError as e:
+        return time.perf_counter() - started, 0, f"{type(e).__name__}: {e}"
+
+    elapsed = time.perf_counter() - started
+    error = response.text[:300] if not 200 <= response.status_code < 300 else None
+    return elapsed, response.status_code, error
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, fixtures: Fixtures, seed: int,
+                       requests: int, concurrency: int, warmup: int, max_error_rate: float) -> Dict[str, Any]:
+    rng = random.Random(f"{seed}:{scenario.name}")
+    planned = [scenario.build(fixtures, rng, index) for index in range(warmup + requests)]
+
+    for request in planned[:warmup]:
+        await _send(client, request)
+
+    latencies: List[float] = []
+    status_codes: Dict[str, int] = {}
+    errors: List[str] = []
+    queue = iter(planned[warmup:])
+
+    async def worker():
+        for request in queue:
+            elapsed, status_code, error = await _send(client, request)
+            latencies.append(elapsed)
+            status_codes[str(status_code)] = status_codes.get(str(status_code), 0) + 1
+            if error is not None:
+                errors.append(f"{status_code} {error}")
+
+    statements_before = await _db_statements(client, scenario)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+    statements_after = await _db_statements(client, scenario)
+
+    statements = statements_after[0] - statements_before[0]
+    observed = statements_after[1] - statements_before[1]
+    latencies.sort()
+
+    error_rate = len(errors) / len(latencies) if latencies else 0.0
+    # The latencies of error responses say nothing about the endpoint
+    failed = error_rate > max_error_rate
+
+    if errors:
+        print(f"  {scenario.name}: {len(errors)} errors ({error_rate:.0%}), first: {errors[0]}")
+    if failed:
+        print(f"  {scenario.name}: FAILED, error rate above {max_error_rate:.0%}")
+
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "failed": failed,
+        "status_codes": status_codes,
+        "throughput_rps": round(len(latencies) / wall, 1) if wall else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99": round(percentile(latencies, 0.99) * 1000, 2),
+            "mean": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            "max": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        },
+        "db_statements_per_request": round(statements / observed, 2) if observed else None,
+    }
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_results(results: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    def delta(value: Optional[float], previous: Optional[float]) -> str:
+        if value is None or not previous:
+            return ""
+        return f" ({(value - previous) / previous * 100:+.0f}%)"
+
+    print(f"{'scenario':<20}{'p50 ms':>18}{'p95 ms':>18}{'p99 ms':>18}{'req/s':>18}{'db/req':>16}{'errors':>8}")
+    for name, result in results["scenarios"].items():
+        previous = (baseline or {}).get("scenarios", {}).get(name, {})
+        latency, previous_latency = result["latency_ms"], previous.get("latency_ms", {})
+        db = result["db_statements_per_request"]
+
+        columns = [f"{latency[key]:.1f}{delta(latency[key], previous_latency.get(key))}" for key in ("p50", "p95", "p99")]
+        columns.append(f"{result['throughput_rps']:.0f}{delta(result['throughput_rps'], previous.get('throughput_rps'))}")
+        db_column = "n/a" if db is None else f"{db:.1f}{delta(db, previous.get('db_statements_per_request'))}"
+        print(f"{name:<20}" + "".join(f"{column:>18}" for column in columns) + f"{db_column:>16}{result['errors']:>8}"
+              + ("  FAILED" if result["failed"] else ""))
+
+async def main(args: argparse.Namespace) -> int:
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    os.environ.setdefault("INTERNAL_API_TOKEN", "benchmark-internal")
+    scenarios = [SCENARIOS[name] for name in args.scenarios]
+
+    conn = await asyncpg.connect(_database_url())
+    try:
+        fixtures = await Fixtures.load(conn, args.seed, args.users)
+        await fixtures.delete_created_appointments(conn)
+        print(f"Fixtures: {len(fixtures.clients)} clients, {len(fixtures.providers)} providers, "
+              f"{len(fixtures.nearby)} nearby products")
+
+        results: Dict[str, Any] = {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "revision": _git_revision(),
+            "target": args.base_url or "in-process",
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "scenarios": {},
+        }
+
+        async def run_all(client: httpx.AsyncClient) -> None:
+            for scenario in scenarios:
+                results["scenarios"][scenario.name] = await run_scenario(
+                    client, scenario, fixtures, args.seed, args.requests, args.concurrency, args.warmup,
+                    args.max_error_rate)
+
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        timeout = httpx.Timeout(args.timeout)
+
+        try:
+            if args.base_url:
+                async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout) as client:
+                    await run_all(client)
+            else:
+                from main import app
+
+                async with app.router.lifespan_context(app):
+                    # A failing handler becomes a 500, as it would behind uvicorn
+                    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+                    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=timeout) as client:
+                        await run_all(client)
+        finally:
+            deleted = await fixtures.delete_created_appointments(conn)
+            if deleted:
+                print(f"Deleted {deleted} appointments created by the benchmark")
+    finally:
+        await conn.close()
+
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print_results(results, baseline)
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Results written to {output}")
+
+    return 1 if any(result["failed"] for result in results["scenarios"].values()) else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=None, help="Running server to benchmark, the app runs in-process when not set")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--users", type=int, default=50, help="Clients and providers picked from the dataset")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--max-error-rate", type=float, default=0.05,
+                        help="Share of non-2xx responses above which a scenario fails the run")
+    parser.add_argument("--output", default=None, help="JSON file to write the results to")
+    parser.add_argument("--compare", default=None, help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    raise SystemExit(asyncio.run(main(args)))
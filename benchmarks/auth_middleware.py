@@ -0,0 +1,116 @@
+"""
+Per-request overhead of the authentication middleware.
+
+Compares the previous BaseHTTPMiddleware implementation with the pure ASGI
+AuthMiddleware by driving both directly with synthetic ASGI requests.
+
+    SECRET_KEY=bench python -m benchmarks.auth_middleware --requests 20000
+"""
+import argparse
+import asyncio
+import os
+import time
+from typing import Optional
+from datetime import timedelta
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+from fastapi import HTTPException, Request, Response
+from starlette import status
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.responses import JSONResponse, PlainTextResponse
+
+from core.dependencies import authenticate_token
+from core.middlewares.auth_middleware import AuthMiddleware
+from core.security import create_token
+from schema.auth.token import TokenPayload
+
+class LegacyAuthMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        auth_header = request.headers.get("Authorization")
+
+        if auth_header and auth_header.lower().startswith("bearer "):
+            token = auth_header[7:]
+            try:
+                request.state.user = await authenticate_token(token)
+            except HTTPException:
+                return JSONResponse(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    content={"detail": "Invalid or expired token"}
+                )
+        else:
+            request.state.user = None
+        response = await call_next(request)
+        return response
+
+async def endpoint(scope, receive, send):
+    await PlainTextResponse("ok")(scope, receive, send)
+
+def build_scope(path: str, token: Optional[str]):
+    headers = [(b"host", b"testserver")]
+    if token:
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers,
+        "client": ("127.0.0.1", 12345),
+        "server": ("testserver", 80),
+    }
+
+async def run_once(app, scope):
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(dict(scope), receive, send)
+
+async def measure(app, scope, requests: int) -> float:
+    for _ in range(min(500, requests)):
+        await run_once(app, scope)
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await run_once(app, scope)
+    return (time.perf_counter() - started) / requests * 1_000_000
+
+async def main(requests: int):
+    token = await create_token(
+        payload=TokenPayload(id=1, username="bench", fullname="Bench", email="bench@example.com", role="client"),
+        expires_at=timedelta(hours=1),
+        secret_key=os.environ["SECRET_KEY"]
+    )
+
+    scenarios = [
+        ("anonymous", build_scope("/users/1", None)),
+        ("bearer token", build_scope("/users/1", token)),
+        ("excluded path", build_scope("/maps/static", token)),
+    ]
+    apps = [
+        ("BaseHTTPMiddleware", LegacyAuthMiddleware(endpoint)),
+        ("pure ASGI", AuthMiddleware(endpoint)),
+    ]
+
+    print(f"{'scenario':<16}{'middleware':<22}{'us/request':>12}")
+    for scenario_name, scope in scenarios:
+        baseline = None
+        for app_name, app in apps:
+            per_request = await measure(app, scope, requests)
+            baseline = baseline or per_request
+            print(f"{scenario_name:<16}{app_name:<22}{per_request:>12.1f}  ({per_request / baseline:.2f}x)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.requests))
@@ -0,0 +1,147 @@
+"""
+Bytes saved and CPU spent by CompressionMiddleware on feed and calendar payloads.
+
+Drives the middleware directly with synthetic ASGI requests, one JSON response per
+request, for every encoding and level passed on the command line.
+
+    python -m benchmarks.compression --requests 500 --gzip-levels 1 6 9 --brotli-qualities 1 4 6
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from starlette.responses import Response
+
+from core.middlewares.compression_middleware import CompressionMiddleware, brotli
+
+def build_feed_page(posts: int) -> bytes:
+    now = datetime(2025, 1, 1, 12, 0)
+    page = []
+
+    for index in range(posts):
+        user_id = random.randint(1, 200)
+        page.append({
+            "id": 100000 + index,
+            "description": f"Tuns si aranjat barba, programari disponibile saptamana aceasta #{index % 7}",
+            "user": {"id": user_id, "fullname": f"User {user_id}", "username": f"user_{user_id}", "profession": "Frizer",
+                     "avatar": f"https://cdn.example.com/avatars/{user_id}.jpg", "is_follow": index % 3 == 0,
+                     "ratings_average": 4.7, "ratings_count": 120 + user_id},
+            "business_owner": {"id": 5, "fullname": "Barber Shop", "avatar": "https://cdn.example.com/avatars/5.jpg", "ratings_average": 4.8},
+            "employee": None,
+            "counters": {"comment_count": index % 11, "like_count": index * 3, "bookmark_count": index % 5,
+                         "repost_count": index % 4, "bookings_count": index % 9},
+            "media_files": [{"id": index * 2 + media, "media_type": "image", "media_url": f"https://cdn.example.com/posts/{index}/{media}.jpg",
+                             "thumbnail_url": f"https://cdn.example.com/posts/{index}/{media}_thumb.jpg", "order_index": media}
+                            for media in range(2)],
+            "user_actions": {"is_liked": False, "is_reposted": False, "is_bookmarked": index % 6 == 0},
+            "hashtags": [{"id": 1, "name": "frizerie"}, {"id": 2, "name": "barbershop"}],
+            "business_id": 5,
+            "is_video_review": False,
+            "rating": None,
+            "bookable": True,
+            "last_minute": {"is_last_minute": False, "last_minute_end": None, "has_fixed_slots": False, "fixed_slots": []},
+            "created_at": (now - timedelta(minutes=index * 17)).isoformat(),
+        })
+
+    return json.dumps({"count": None, "results": page, "next_cursor": "WyIyMDI1LTAxLTAxVDEyOjAwOjAwIiwxMDAwMDBd"}).encode()
+
+def build_calendar(days: int) -> bytes:
+    start = datetime(2025, 1, 6, 8, 0)
+    events = []
+
+    for day in range(days):
+        for slot in range(24):
+            slot_start = start + timedelta(days=day, minutes=slot * 30)
+            events.append({
+                "start": slot_start.isoformat(),
+                "end": (slot_start + timedelta(minutes=30)).isoformat(),
+                "is_booked": slot % 3 == 0,
+                "appointment_id": 5000 + day * 24 + slot if slot % 3 == 0 else None,
+                "customer": {"id": slot, "fullname": f"Client {slot}", "avatar": None} if slot % 3 == 0 else None,
+                "service_name": "Tuns clasic" if slot % 2 else "Tuns si barba",
+            })
+
+    return json.dumps({"days": days, "events": events}).encode()
+
+def build_scope(accept_encoding: str):
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/posts",
+        "raw_path": b"/posts",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"testserver"), (b"accept-encoding", accept_encoding.encode())],
+        "client": ("127.0.0.1", 12345),
+        "server": ("testserver", 80),
+    }
+
+async def measure(app, scope, requests: int):
+    sent = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal sent
+        if message["type"] == "http.response.body":
+            sent += len(message.get("body", b""))
+
+    started = time.process_time()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    cpu = (time.process_time() - started) / requests * 1_000_000
+
+    return sent // requests, cpu
+
+async def main(requests: int, gzip_levels, brotli_qualities):
+    payloads = [
+        ("feed page (20 posts)", build_feed_page(20)),
+        ("feed page (50 posts)", build_feed_page(50)),
+        ("calendar (7 days)", build_calendar(7)),
+        ("calendar (31 days)", build_calendar(31)),
+    ]
+
+    variants = [("identity", "identity", {})]
+    variants += [(f"gzip level {level}", "gzip", {"gzip_level": level}) for level in gzip_levels]
+    if brotli is not None:
+        variants += [(f"br quality {quality}", "br", {"brotli_quality": quality}) for quality in brotli_qualities]
+    else:
+        print("brotli is not installed, only gzip is measured\n")
+
+    print(f"{'payload':<24}{'encoding':<18}{'bytes':>10}{'saved':>9}{'cpu us':>10}{'us/KB saved':>13}")
+    for payload_name, body in payloads:
+        async def endpoint(scope, receive, send, body=body):
+            await Response(body, media_type="application/json")(scope, receive, send)
+
+        baseline_bytes, baseline_cpu = None, None
+        for variant_name, accept_encoding, options in variants:
+            app = CompressionMiddleware(endpoint, **options) if accept_encoding != "identity" else endpoint
+            size, cpu = await measure(app, build_scope(accept_encoding), requests)
+
+            if baseline_bytes is None:
+                baseline_bytes, baseline_cpu = size, cpu
+                print(f"{payload_name:<24}{variant_name:<18}{size:>10}{'-':>9}{cpu:>10.1f}{'-':>13}")
+                continue
+
+            saved = baseline_bytes - size
+            extra_cpu = cpu - baseline_cpu
+            per_kb = extra_cpu / (saved / 1024) if saved > 0 else float("nan")
+            print(f"{payload_name:<24}{variant_name:<18}{size:>10}{saved / baseline_bytes:>8.0%} {cpu:>10.1f}{per_kb:>13.1f}")
+        print()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--gzip-levels", type=int, nargs="+", default=[1, 6, 9])
+    parser.add_argument("--brotli-qualities", type=int, nargs="+", default=[1, 4, 6])
+    args = parser.parse_args()
+
+    random.seed(7)
+    asyncio.run(main(args.requests, args.gzip_levels, args.brotli_qualities))
@@ -0,0 +1,778 @@
+"""
+Seeded synthetic dataset for the schema in models/, bulk loaded with COPY.
+
+Fills:
+- users with their counters
+- businesses spread over Romanian cities (PostGIS points), with their services
+- employees and schedules
+- products with sub-filters
+- posts with media, likes, follows and comments
+- appointments with their products, and reviews
+
+Counters stored on posts, comments and user_counters match the generated rows.
+Counts are the scale 1 defaults below, multiplied by --scale, and each can be set on
+its own. The same seed, anchor date and starting ids give the same rows. Use
+--truncate for a fresh load, otherwise ids continue after the existing rows.
+
+If the database has no nomenclature, a small one is created first: roles, business
+types, services, filters, professions and currencies.
+
+    python -m core.schema sync
+    python -m benchmarks.dataset --scale 0.05 --truncate
+    python -m benchmarks.dataset --scale 1 --seed 42 --anchor 2025-06-01 --truncate
+
+Every generated user logs in with DATASET_PASSWORD (default "Password123!").
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import struct
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime, date, timedelta, timezone, time as dt_time
+from decimal import Decimal
+from itertools import accumulate, islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import asyncpg
+from dotenv import load_dotenv
+
+from core.enums.appointment_channel_enum import AppointmentChannelEnum
+from core.enums.appointment_status_enum import AppointmentStatusEnum
+from core.enums.day_of_week_enum import DayOfWeekEnum
+from core.enums.gender_type_enum import GenderTypeEnum
+from core.enums.media_type_enum import MediaTypeEnum
+from core.enums.role_enum import RoleEnum
+
+load_dotenv()
+
+DATASET_PASSWORD = os.getenv("DATASET_PASSWORD") or "Password123!"
+COPY_CHUNK_SIZE = 50000
+
+# Scale 1 row counts
+DEFAULT_COUNTS = {
+    "users": 200_000,
+    "businesses": 10_000,
+    "employees": 15_000,
+    "posts": 2_000_000,
+    "likes": 10_000_000,
+    "follows": 2_000_000,
+    "comments": 2_000_000,
+    "appointments": 1_000_000,
+    "reviews": 300_000,
+}
+
+# Tables filled by the generator, children first
+GENERATED_TABLES = (
+    "reviews", "appointment_products", "appointments", "comments", "likes", "follows", "post_media", "posts",
+    "product_sub_filters", "products", "schedules", "business_services", "businesses", "user_counters", "users",
+)
+
+# name, latitude, longitude, population in thousands
+CITIES = (
+    ("Bucuresti", 44.4268, 26.1025, 1716),
+    ("Cluj-Napoca", 46.7712, 23.6236, 286),
+    ("Timisoara", 45.7489, 21.2087, 250),
+    ("Iasi", 47.1585, 27.6014, 271),
+    ("Constanta", 44.1598, 28.6348, 263),
+    ("Craiova", 44.3302, 23.7949, 234),
+    ("Brasov", 45.6427, 25.5887, 237),
+    ("Galati", 45.4353, 28.0080, 217),
+    ("Ploiesti", 44.9469, 26.0365, 180),
+    ("Oradea", 47.0465, 21.9189, 183),
+    ("Braila", 45.2692, 27.9575, 154),
+    ("Arad", 46.1866, 21.3123, 145),
+    ("Pitesti", 44.8565, 24.8692, 141),
+    ("Sibiu", 45.7983, 24.1256, 134),
+    ("Bacau", 46.5670, 26.9146, 136),
+    ("Targu Mures", 46.5425, 24.5575, 116),
+    ("Baia Mare", 47.6592, 23.5681, 108),
+    ("Buzau", 45.1500, 26.8333, 102),
+    ("Botosani", 47.7486, 26.6694, 94),
+    ("Suceava", 47.6514, 26.2556, 84),
+)
+
+STREETS = ("Mihai Eminescu", "Unirii", "Republicii", "Victoriei", "Stefan cel Mare", "Avram Iancu", "Independentei",
+           "Libertatii", "Decebal", "Traian", "Florilor", "Garii", "Primaverii", "Carpati", "Dorobantilor")
+FIRST_NAMES = ("Andrei", "Alexandru", "Mihai", "Ion", "Stefan", "Vlad", "Radu", "Cristian", "Gabriel", "Matei",
+               "Maria", "Elena", "Ioana", "Andreea", "Ana", "Cristina", "Alexandra", "Diana", "Irina", "Larisa")
+LAST_NAMES = ("Popescu", "Ionescu", "Popa", "Constantin", "Stan", "Dumitru", "Dima", "Georgescu", "Marin", "Tudor",
+              "Munteanu", "Stoica", "Florea", "Ilie", "Matei", "Rusu", "Serban", "Moldovan", "Lazar", "Barbu")
+POST_WORDS = ("programari", "disponibile", "saptamana", "aceasta", "rezultat", "final", "transformare", "client",
+              "multumit", "stil", "nou", "tendinte", "vara", "oferta", "last", "minute", "detalii", "in", "bio")
+HASHTAGS = ("frizerie", "barbershop", "unghii", "manichiura", "masaj", "relaxare", "beauty", "hair", "fade",
+            "coafura", "makeup", "spa", "wellness", "romania")
+COMMENTS = ("Arata super!", "Cand aveti liber?", "Foarte frumos", "Recomand!", "Ce pret are?", "Top", "Wow",
+            "Ma programez si eu", "Cea mai buna echipa", "Felicitari!")
+REVIEWS = ("Foarte multumit, recomand!", "Servicii de calitate, revin sigur.", "Punctual si profesionist.",
+           "A fost ok, dar am asteptat putin.", "Rezultat exact cum mi-am dorit.", "Atmosfera placuta.")
+
+# Used when the database has no nomenclature yet
+BASE_NOMENCLATURE = {
+    "domain": ("Frumusete si Ingrijire", "Beauty"),
+    "business_types": {
+        "Frizerie": ("Frizerii", "Frizer", ("Tuns clasic", "Tuns si barba", "Aranjat barba", "Tuns copii", "Vopsit barba")),
+        "Salon de coafura": ("Saloane de coafura", "Hair stylist", ("Tuns dama", "Coafat", "Vopsit", "Suvite", "Tratament par")),
+        "Salon de unghii": ("Saloane de unghii", "Manichiurist", ("Manichiura", "Pedichiura", "Gel", "Semipermanent")),
+        "Salon de masaj": ("Saloane de masaj", "Maseur", ("Masaj relaxare", "Masaj terapeutic", "Masaj sportiv", "Reflexoterapie")),
+        "Salon de makeup": ("Saloane de makeup", "Makeup artist", ("Machiaj de zi", "Machiaj de seara", "Machiaj mireasa")),
+    },
+    "filters": {
+        "Lungime par": ("Scurt", "Mediu", "Lung"),
+        "Tip client": ("Barbati", "Femei", "Copii"),
+        "Durata": ("Rapid", "Standard", "Extins"),
+    },
+    "currencies": ("RON", "EUR"),
+}
+
+def _database_url() -> str:
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise SystemExit("DATABASE_URL is not set")
+    return re.sub(r"^postgresql\+\w+://", "postgresql://", url)
+
+def _ewkb_point(point: Tuple[float, float]) -> bytes:
+    # Little endian EWKB point with SRID 4326, accepted by the geometry binary input
+    longitude, latitude = point
+    return struct.pack("<BIIdd", 1, 0x20000001, 4326, longitude, latitude)
+
+def _chunks(rows: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+def report(table: str, total: int, elapsed: float) -> None:
+    print(f"{table:<24}{total:>14,} rows{elapsed:>9.1f}s{total / elapsed if elapsed else 0:>12,.0f} rows/s")
+
+async def copy_rows(conn: asyncpg.Connection, table: str, columns: Sequence[str], rows: Iterable[tuple],
+                    quiet: bool = False) -> int:
+    started = time.perf_counter()
+    total = 0
+
+    for chunk in _chunks(rows, COPY_CHUNK_SIZE):
+        await conn.copy_records_to_table(table, records=chunk, columns=list(columns))
+        total += len(chunk)
+
+    if not quiet:
+        report(table, total, time.perf_counter() - started)
+    return total
+
+class Nomenclature:
+    def __init__(self):
+        self.roles: Dict[str, int] = {}
+        self.business_types: List[int] = []
+        self.business_type_names: Dict[int, str] = {}
+        self.services: Dict[int, List[Tuple[int, str]]] = {}
+        self.sub_filters: Dict[int, List[int]] = {}
+        self.professions: Dict[int, List[Tuple[int, str]]] = {}
+        self.currency_id = 0
+
+    @classmethod
+    async def load(cls, conn: asyncpg.Connection) -> "Nomenclature":
+        nomenclature = cls()
+        nomenclature.roles = {row["name"]: row["id"] for row in await conn.fetch("SELECT id, name::text FROM roles")}
+
+        for row in await conn.fetch("SELECT id, name FROM business_types WHERE active ORDER BY id"):
+            nomenclature.business_types.append(row["id"])
+            nomenclature.business_type_names[row["id"]] = row["name"]
+
+        for row in await conn.fetch(
+            "SELECT sbt.business_type_id, s.id, s.name FROM service_business_types sbt "
+            "JOIN services s ON s.id = sbt.service_id ORDER BY sbt.business_type_id, s.id"
+        ):
+            nomenclature.services.setdefault(row["business_type_id"], []).append((row["id"], row["name"]))
+
+        for row in await conn.fetch(
+            "SELECT btf.business_type_id, sf.id FROM business_type_filters btf "
+            "JOIN sub_filters sf ON sf.filter_id = btf.filter_id ORDER BY btf.business_type_id, sf.id"
+        ):
+            nomenclature.sub_filters.setdefault(row["business_type_id"], []).append(row["id"])
+
+        for row in await conn.fetch(
+            "SELECT btp.business_type_id, p.id, p.name FROM business_type_professions btp "
+            "JOIN professions p ON p.id = btp.profession_id ORDER BY btp.business_type_id, p.id"
+        ):
+            nomenclature.professions.setdefault(row["business_type_id"], []).append((row["id"], row["name"]))
+
+        nomenclature.currency_id = await conn.fetchval(
+            "SELECT id FROM currencies ORDER BY (name = 'RON') DESC, id LIMIT 1") or 0
+
+        # Only business types that can be booked are useful
+        nomenclature.business_types = [bt for bt in nomenclature.business_types if nomenclature.services.get(bt)]
+        return nomenclature
+
+    def missing(self) -> List[str]:
+        missing = [role.name for role in (RoleEnum.CLIENT, RoleEnum.EMPLOYEE, RoleEnum.BUSINESS) if role.name not in self.roles]
+        if not self.business_types:
+            missing.append("business types with services")
+        if not self.currency_id:
+            missing.append("currencies")
+        return missing
+
+async def seed_nomenclature(conn: asyncpg.Connection) -> None:
+    async with conn.transaction():
+        for role in RoleEnum:
+            await conn.execute("INSERT INTO roles (name, active) VALUES ($1, true) ON CONFLICT (name) DO NOTHING", role.name)
+
+        for currency in BASE_NOMENCLATURE["currencies"]:
+            await conn.execute("INSERT INTO currencies (name, active) VALUES ($1, true) ON CONFLICT (name) DO NOTHING", currency)
+
+        if await conn.fetchval("SELECT EXISTS (SELECT 1 FROM service_business_types)"):
+            return
+
+        domain_name, short_name = BASE_NOMENCLATURE["domain"]
+        domain_id = await conn.fetchval(
+            "INSERT INTO business_domains (name, short_name, active) VALUES ($1, $2, true) RETURNING id", domain_name, short_name)
+
+        filter_ids = []
+        for filter_name, sub_filters in BASE_NOMENCLATURE["filters"].items():
+            filter_id = await conn.fetchval(
+                "INSERT INTO filters (name, active) VALUES ($1, true) ON CONFLICT (name) DO UPDATE SET active = true RETURNING id",
+                filter_name)
+            filter_ids.append(filter_id)
+            for sub_filter in sub_filters:
+                await conn.execute(
+                    "INSERT INTO sub_filters (name, active, filter_id) VALUES ($1, true, $2) ON CONFLICT (name) DO NOTHING",
+                    f"{sub_filter} ({filter_name})", filter_id)
+
+        for business_type, (plural, profession, services) in BASE_NOMENCLATURE["business_types"].items():
+            business_type_id = await conn.fetchval(
+                "INSERT INTO business_types (name, plural, active, has_employees, business_domain_id) "
+                "VALUES ($1, $2, true, true, $3) RETURNING id", business_type, plural, domain_id)
+            service_domain_id = await conn.fetchval(
+                "INSERT INTO service_domains (name, business_domain_id) VALUES ($1, $2) RETURNING id", business_type, domain_id)
+            profession_id = await conn.fetchval(
+                "INSERT INTO professions (name, active, business_domain_id) VALUES ($1, true, $2) RETURNING id", profession, domain_id)
+            await conn.execute(
+                "INSERT INTO business_type_professions (business_type_id, profession_id) VALUES ($1, $2)", business_type_id, profession_id)
+
+            for order_index, service in enumerate(services):
+                service_id = await conn.fetchval(
+                    "INSERT INTO services (name, active, order_index, business_domain_id, service_domain_id) "
+                    "VALUES ($1, true, $2, $3, $4) RETURNING id", service, order_index, domain_id, service_domain_id)
+                await conn.execute(
+                    "INSERT INTO service_business_types (service_id, business_type_id) VALUES ($1, $2)", service_id, business_type_id)
+
+            for filter_id in filter_ids:
+                await conn.execute(
+                    "INSERT INTO business_type_filters (business_type_id, filter_id) VALUES ($1, $2)", business_type_id, filter_id)
+
+    print("Nomenclature created")
+
+class Provider:
+    """A business owner or employee: has a schedule, products, posts and appointments."""
+
+    __slots__ = ("user_id", "business_id", "business_type_id", "owner_id", "products")
+
+    def __init__(self, user_id: int, business_id: int, business_type_id: int, owner_id: int):
+        self.user_id = user_id
+        self.business_id = business_id
+        self.business_type_id = business_type_id
+        self.owner_id = owner_id
+        # (product id, service id, name, price, discount, price with discount, duration)
+        self.products: List[tuple] = []
+
+class DatasetGenerator:
+    def __init__(self, conn: asyncpg.Connection, nomenclature: Nomenclature, counts: Dict[str, int], seed: int, anchor: datetime):
+        self.conn = conn
+        self.nomenclature = nomenclature
+        self.counts = counts
+        self.seed = seed
+        self.anchor = anchor
+        self.first_ids: Dict[str, int] = {}
+
+        users = counts["users"]
+        self.user_counters = {
+            name: array("i", [0]) * users
+            for name in ("followings_count", "followers_count", "products_count", "posts_count", "ratings_count")
+        }
+        self.rating_sums = array("d", [0.0]) * users
+
+        self.providers: List[Provider] = []
+        self.provider_weights: List[float] = []
+        self.post_times = array("d")
+
+    def rng(self, table: str) -> random.Random:
+        return random.Random(f"{self.seed}:{table}")
+
+    def user_id(self, index: int) -> int:
+        return self.first_ids["users"] + index
+
+    def user_index(self, user_id: int) -> int:
+        return user_id - self.first_ids["users"]
+
+    def timestamp(self, rng: random.Random, days_back: int, skew: float = 1.0) -> datetime:
+        # skew > 1 puts more rows near the anchor
+        return self.anchor - timedelta(seconds=days_back * 86400 * rng.random() ** skew)
+
+    async def read_first_ids(self) -> None:
+        for table in ("users", "businesses", "schedules", "products", "posts", "post_media", "likes", "follows",
+                      "comments", "appointments", "appointment_products", "reviews"):
+            self.first_ids[table] = (await self.conn.fetchval(f"SELECT COALESCE(MAX(id), 0) FROM {table}")) + 1
+
+    # Users and businesses
+    def _user_rows(self, password_hash: str) -> Iterator[tuple]:
+        rng = self.rng("users")
+        roles = self.nomenclature.roles
+        businesses, employees = self.counts["businesses"], self.counts["employees"]
+        genders = [GenderTypeEnum.MALE.name, GenderTypeEnum.FEMALE.name, GenderTypeEnum.OTHER.name]
+        city_weights = list(accumulate(city[3] for city in CITIES))
+
+        for index in range(self.counts["users"]):
+            user_id = self.user_id(index)
+            if index < businesses:
+                role_id, profession = roles[RoleEnum.BUSINESS.name], "Business"
+            elif index < businesses + employees:
+                role_id, profession = roles[RoleEnum.EMPLOYEE.name], "Employee"
+            else:
+                role_id, profession = roles[RoleEnum.CLIENT.name], "Creator"
+
+            city = rng.choices(CITIES, cum_weights=city_weights)[0]
+            created_at = self.timestamp(rng, 730, skew=0.7)
+            yield (
+                user_id, password_hash, f"user{user_id}@dataset.test",
+                f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"[:35], f"user{user_id}", None, profession,
+                rng.choices(genders, weights=(48, 48, 4))[0],
+                date(1965, 1, 1) + timedelta(days=rng.randrange(365 * 40)),
+                city[1] + rng.gauss(0, 0.04), city[2] + rng.gauss(0, 0.05),
+                True, True, None, True, role_id, None, created_at, created_at,
+            )
+
+    def _plan_businesses(self) -> List[tuple]:
+        rng = self.rng("businesses")
+        nomenclature = self.nomenclature
+        city_weights = list(accumulate(city[3] for city in CITIES))
+        employee_index = self.counts["businesses"]
+        employees_end = self.counts["businesses"] + self.counts["employees"]
+        rows = []
+
+        for index in range(self.counts["businesses"]):
+            business_id = self.first_ids["businesses"] + index
+            owner_id = self.user_id(index)
+            business_type_id = rng.choice(nomenclature.business_types)
+            has_employees = rng.random() < 0.6 and employee_index < employees_end
+
+            city = rng.choices(CITIES, cum_weights=city_weights)[0]
+            spread = 0.012 * (city[3] / 100) ** 0.5
+            coordinates = (round(city[2] + rng.gauss(0, spread * 1.4), 7), round(city[1] + rng.gauss(0, spread), 7))
+            address = f"Strada {rng.choice(STREETS)} {rng.randint(1, 200)}, {city[0]}"
+            created_at = self.timestamp(rng, 700, skew=0.8)
+
+            rows.append((business_id, coordinates, "Europe/Bucharest", address,
+                         f"{nomenclature.business_type_names[business_type_id]} in {city[0]}",
+                         has_employees, owner_id, business_type_id, created_at, created_at))
+
+            if has_employees:
+                team = min(rng.randint(1, 4), employees_end - employee_index)
+                for _ in range(team):
+                    self.providers.append(Provider(self.user_id(employee_index), business_id, business_type_id, owner_id))
+                    employee_index += 1
+            else:
+                self.providers.append(Provider(owner_id, business_id, business_type_id, owner_id))
+
+        # A few providers get most of the attention
+        popularity = self.rng("popularity")
+        order = list(range(len(self.providers)))
+        popularity.shuffle(order)
+        weights = [0.0] * len(self.providers)
+        for rank, provider_index in enumerate(order, start=1):
+            weights[provider_index] = 1 / rank ** 0.8
+        self.provider_weights = list(accumulate(weights))
+        return rows
+
+    async def load_users_and_businesses(self, password_hash: str) -> None:
+        await copy_rows(self.conn, "users", (
+            "id", "password", "email", "fullname", "username", "avatar", "profession", "gender", "date_of_birth",
+            "last_known_lat", "last_known_lng", "active", "email_verified", "registration_step", "is_validated",
+            "role_id", "employee_business_id", "created_at", "updated_at",
+        ), self._user_rows(password_hash))
+
+        business_rows = self._plan_businesses()
+        await copy_rows(self.conn, "businesses", (
+            "id", "coordinates", "timezone", "address", "description", "has_employees", "owner_id",
+            "business_type_id", "created_at", "updated_at",
+        ), business_rows)
+
+        # Employees point at their business once it exists
+        employees = [(provider.business_id, provider.user_id) for provider in self.providers if provider.user_id != provider.owner_id]
+        for chunk in _chunks(employees, COPY_CHUNK_SIZE):
+            await self.conn.executemany("UPDATE users SET employee_business_id = $1 WHERE id = $2", chunk)
+
+    def _business_service_rows(self) -> Iterator[tuple]:
+        rng = self.rng("business_services")
+        seen = set()
+        for provider in self.providers:
+            if provider.business_id in seen:
+                continue
+            seen.add(provider.business_id)
+            services = self.nomenclature.services[provider.business_type_id]
+            for service_id, _ in rng.sample(services, rng.randint(min(3, len(services)), len(services))):
+                yield provider.business_id, service_id
+
+    def _schedule_rows(self) -> Iterator[tuple]:
+        rng = self.rng("schedules")
+        schedule_id = self.first_ids["schedules"]
+        for provider in self.providers:
+            opens = dt_time(rng.choice((8, 9, 10)))
+            closes = dt_time(rng.choice((17, 18, 19, 20)))
+            for day_index, day in enumerate(DayOfWeekEnum):
+                closed = day == DayOfWeekEnum.SUNDAY or (day == DayOfWeekEnum.SATURDAY and rng.random() < 0.3)
+                yield (schedule_id, day.name, day_index, None if closed else opens, None if closed else closes,
+                       provider.user_id, provider.business_id)
+                schedule_id += 1
+
+    def _product_rows(self) -> Iterator[tuple]:
+        rng = self.rng("products")
+        product_id = self.first_ids["products"]
+        for provider in self.providers:
+            services = self.nomenclature.services[provider.business_type_id]
+            for service_id, service_name in rng.sample(services, min(len(services), rng.randint(2, 5))):
+                price = Decimal(rng.randrange(30, 400, 5))
+                discount = Decimal(rng.choice((0, 0, 0, 10, 15, 20)))
+                price_with_discount = (price * (100 - discount) / 100).quantize(Decimal("0.01"))
+                duration = rng.choice((15, 30, 30, 45, 60, 60, 90, 120))
+                created_at = self.timestamp(rng, 600, skew=0.8)
+
+                provider.products.append((product_id, service_id, service_name, price, discount, price_with_discount, duration))
+                self.user_counters["products_count"][self.user_index(provider.user_id)] += 1
+                yield (product_id, service_name, None, duration, price, price_with_discount, discount, service_id,
+                       provider.business_id, provider.user_id, self.nomenclature.currency_id, created_at, created_at)
+                product_id += 1
+
+    def _product_sub_filter_rows(self) -> Iterator[tuple]:
+        rng = self.rng("product_sub_filters")
+        for provider in self.providers:
+            sub_filters = self.nomenclature.sub_filters.get(provider.business_type_id, [])
+            for product in provider.products:
+                for sub_filter_id in rng.sample(sub_filters, min(len(sub_filters), rng.randint(0, 3))):
+                    yield product[0], sub_filter_id
+
+    async def load_catalog(self) -> None:
+        await copy_rows(self.conn, "business_services", ("business_id", "service_id"), self._business_service_rows())
+        await copy_rows(self.conn, "schedules", (
+            "id", "day_of_week", "day_week_index", "start_time", "end_time", "user_id", "business_id",
+        ), self._schedule_rows())
+        await copy_rows(self.conn, "products", (
+            "id", "name", "description", "duration", "price", "price_with_discount", "discount", "service_id",
+            "business_id", "user_id", "currency_id", "created_at", "updated_at",
+        ), self._product_rows())
+        await copy_rows(self.conn, "product_sub_filters", ("product_id", "sub_filter_id"), self._product_sub_filter_rows())
+
+    # Social graph
+    def _heavy_tailed(self, rng: random.Random, count: int, total: int, cap: int) -> array:
+        weights = array("d", (rng.paretovariate(1.3) for _ in range(count)))
+        scale = total / sum(weights) if count else 0
+        # Rounded at random so the counts add up to the total on average
+        return array("i", (min(cap, int(weight * scale + rng.random())) for weight in weights))
+
+    def _pick_provider(self, rng: random.Random) -> Provider:
+        return self.providers[bisect_left(self.provider_weights, rng.random() * self.provider_weights[-1])]
+
+    def _post_rows(self, like_counts: array, comment_counts: array) -> Iterator[tuple]:
+        rng = self.rng("posts")
+        first_client = self.counts["businesses"] + self.counts["employees"]
+
+        for index in range(self.counts["posts"]):
+            post_id = self.first_ids["posts"] + index
+            provider = self._pick_provider(rng)
+            created_at = self.timestamp(rng, 365, skew=1.6)
+            products = rng.sample(provider.products, min(len(provider.products), rng.choice((1, 1, 1, 2))))
+
+            is_video_review = rng.random() < 0.1 and first_client < self.counts["users"]
+            if is_video_review:
+                user_id = self.user_id(rng.randrange(first_client, self.counts["users"]))
+                employee_id, rating = provider.user_id, rng.choices((3, 4, 5), weights=(1, 3, 8))[0]
+            else:
+                user_id, employee_id, rating = provider.user_id, None, None
+
+            self.user_counters["posts_count"][self.user_index(user_id)] += 1
+            self.post_times.append(created_at.timestamp())
+
+            words = " ".join(rng.sample(POST_WORDS, rng.randint(4, 10)))
+            hashtags = rng.sample(HASHTAGS, rng.randint(0, 4))
+            is_last_minute = not is_video_review and rng.random() < 0.05
+            yield (
+                post_id, f"{words} {' '.join('#' + tag for tag in hashtags)}".strip()[:500], user_id,
+                provider.business_type_id, provider.business_id, provider.owner_id, employee_id,
+                is_video_review, "Recomand cu drag!" if is_video_review else None, rating,
+                not is_video_review, is_last_minute, created_at + timedelta(hours=rng.randint(2, 48)) if is_last_minute else None,
+                False, None, hashtags or None, None,
+                like_counts[index], 0, comment_counts[index], 0, 0,
+                sum((product[3] for product in products), Decimal(0)), sum((product[5] for product in products), Decimal(0)),
+                sum((product[3] - product[5] for product in products), Decimal(0)), sum(product[6] for product in products),
+                created_at, created_at,
+            )
+
+    def _post_media_rows(self) -> Iterator[tuple]:
+        rng = self.rng("post_media")
+        for index in range(self.counts["posts"]):
+            post_id = self.first_ids["posts"] + index
+            created_at = datetime.fromtimestamp(self.post_times[index], timezone.utc)
+            yield (self.first_ids["post_media"] + index, f"https://cdn.dataset.test/posts/{post_id}/video.mp4",
+                   MediaTypeEnum.VIDEO.name, f"https://cdn.dataset.test/posts/{post_id}/thumb.jpg", post_id, 0,
+                   round(rng.uniform(6, 60), 1), created_at, created_at)
+
+    def _distinct_users(self, rng: random.Random, count: int) -> List[int]:
+        return [self.user_id(index) for index in rng.sample(range(self.counts["users"]), count)]
+
+    def _reaction_time(self, rng: random.Random, post_index: int) -> datetime:
+        posted = self.post_times[post_index]
+        return datetime.fromtimestamp(min(posted + rng.expovariate(1 / 86400), self.anchor.timestamp()), timezone.utc)
+
+    def _like_rows(self, like_counts: array) -> Iterator[tuple]:
+        rng = self.rng("likes")
+        like_id = self.first_ids["likes"]
+        for index, count in enumerate(like_counts):
+            post_id = self.first_ids["posts"] + index
+            for user_id in self._distinct_users(rng, count):
+                yield like_id, user_id, post_id, self._reaction_time(rng, index)
+                like_id += 1
+
+    def _comment_rows(self, comment_counts: array) -> Iterator[tuple]:
+        rng = self.rng("comments")
+        comment_id = self.first_ids["comments"]
+        for index, count in enumerate(comment_counts):
+            post_id = self.first_ids["posts"] + index
+            comments, roots = [], []
+            for user_id in self._distinct_users(rng, count):
+                # Replies only go one level deep, like in the app
+                parent = rng.choice(roots) if roots and rng.random() < 0.2 else None
+                created_at = self._reaction_time(rng, index)
+                if parent is not None:
+                    parent[6] += 1
+                    created_at = max(created_at, parent[7])
+
+                comment = [comment_id, post_id, user_id, parent[0] if parent else None,
+                           rng.choice(COMMENTS), 0, 0, created_at, created_at]
+                comments.append(comment)
+                if parent is None:
+                    roots.append(comment)
+                comment_id += 1
+            for comment in comments:
+                yield tuple(comment)
+
+    def _follow_rows(self) -> Iterator[tuple]:
+        rng = self.rng("follows")
+        users = self.counts["users"]
+        follow_id = self.first_ids["follows"]
+        followings = self._heavy_tailed(rng, users, self.counts["follows"], cap=min(users - 1, 5000))
+        followers, following = self.user_counters["followers_count"], self.user_counters["followings_count"]
+
+        for index in range(users):
+            follower_id = self.user_id(index)
+            followees = set()
+            target = followings[index]
+            while len(followees) < target:
+                # Half of the follows go to popular providers, the rest anywhere
+                if rng.random() < 0.5 and self.providers:
+                    followee_id = self._pick_provider(rng).user_id
+                else:
+                    followee_id = self.user_id(rng.randrange(users))
+                if followee_id != follower_id:
+                    followees.add(followee_id)
+
+            for followee_id in sorted(followees):
+                followers[self.user_index(followee_id)] += 1
+                yield follow_id, follower_id, followee_id, self.timestamp(rng, 700, skew=0.9)
+                follow_id += 1
+            following[index] = len(followees)
+
+    async def load_social(self) -> None:
+        rng = self.rng("reactions")
+        posts, users = self.counts["posts"], self.counts["users"]
+        like_counts = self._heavy_tailed(rng, posts, self.counts["likes"], cap=users)
+        comment_counts = self._heavy_tailed(rng, posts, self.counts["comments"], cap=min(users, 2000))
+
+        await copy_rows(self.conn, "posts", (
+            "id", "description", "user_id", "business_type_id", "business_id", "business_owner_id", "employee_id",
+            "is_video_review", "video_review_message", "rating", "bookable", "is_last_minute", "last_minute_end",
+            "has_fixed_slots", "fixed_slots", "hashtags", "mentions", "like_count", "repost_count", "comment_count",
+            "bookmark_count", "bookings_count", "total_price", "total_price_with_discount", "total_discount",
+            "total_duration", "created_at", "updated_at",
+        ), self._post_rows(like_counts, comment_counts))
+        await copy_rows(self.conn, "post_media", (
+            "id", "url", "type", "thumbnail_url", "post_id", "order_index", "duration", "created_at", "updated_at",
+        ), self._post_media_rows())
+        await copy_rows(self.conn, "likes", ("id", "user_id", "post_id", "created_at"), self._like_rows(like_counts))
+        await copy_rows(self.conn, "comments", (
+            "id", "post_id", "user_id", "parent_id", "text", "like_count", "replies_count", "created_at", "updated_at",
+        ), self._comment_rows(comment_counts))
+        await copy_rows(self.conn, "follows", ("id", "follower_id", "followee_id", "created_at"), self._follow_rows())
+
+    # Bookings
+    def _appointment_rows(self, appointment_products: List[tuple], reviews: List[tuple]) -> Iterator[tuple]:
+        rng = self.rng("appointments")
+        first_client = self.counts["businesses"] + self.counts["employees"]
+        clients = max(1, self.counts["users"] - first_client)
+        review_rate = min(1.0, self.counts["reviews"] / max(1, self.counts["appointments"] * 0.8))
+        appointment_product_id = self.first_ids["appointment_products"]
+        review_id = self.first_ids["reviews"]
+        currency_id = self.nomenclature.currency_id
+
+        for index in range(self.counts["appointments"]):
+            appointment_id = self.first_ids["appointments"] + index
+            provider = self._pick_provider(rng)
+            products = rng.sample(provider.products, min(len(provider.products), rng.choice((1, 1, 1, 2))))
+            customer_index = first_client + rng.randrange(clients) if first_client < self.counts["users"] else None
+            customer_id = self.user_id(customer_index) if customer_index is not None else None
+
+            # Mostly past appointments, the rest spread over the next 30 days
+            day = self.anchor.date() + timedelta(days=rng.randint(-330, 30))
+            start = datetime(day.year, day.month, day.day, rng.randint(8, 18), rng.choice((0, 15, 30, 45)), tzinfo=timezone.utc)
+            duration = sum(product[6] for product in products)
+            end = start + timedelta(minutes=duration)
+
+            if end > self.anchor:
+                status = AppointmentStatusEnum.IN_PROGRESS
+            else:
+                status = AppointmentStatusEnum.CANCELED if rng.random() < 0.08 else AppointmentStatusEnum.FINISHED
+
+            has_review = status == AppointmentStatusEnum.FINISHED and customer_id is not None and rng.random() < review_rate
+            if has_review:
+                rating = rng.choices((1, 2, 3, 4, 5), weights=(2, 3, 8, 25, 62))[0]
+                reviewed_at = min(end + timedelta(hours=rng.randint(1, 72)), self.anchor)
+                reviews.append((review_id, rng.choice(REVIEWS), rating, 0, None, appointment_id,
+                                customer_id, provider.user_id, products[0][1], products[0][0], reviewed_at, reviewed_at))
+                review_id += 1
+                provider_index = self.user_index(provider.user_id)
+                self.user_counters["ratings_count"][provider_index] += 1
+                self.rating_sums[provider_index] += rating
+
+            for product in products:
+                appointment_products.append((appointment_product_id, appointment_id, product[0], product[2], product[3],
+                                             product[5], product[4], Decimal(product[6]), currency_id, product[5], None))
+                appointment_product_id += 1
+
+            created_at = min(start - timedelta(days=rng.randint(0, 14)), self.anchor)
+            yield (
+                appointment_id, start, end, provider.user_id, customer_id, provider.business_id,
+                f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                has_review, False,
+                sum((product[3] for product in products), Decimal(0)), sum((product[5] for product in products), Decimal(0)),
+                sum((product[3] - product[5] for product in products), Decimal(0)), duration,
+                status.name, rng.choices((AppointmentChannelEnum.SCROLL_BOOKER.name, AppointmentChannelEnum.OWN_CLIENT.name),
+                                         weights=(85, 15))[0],
+                False, None, currency_id, None, None, created_at, created_at,
+            )
+
+    async def load_bookings(self) -> None:
+        appointment_products: List[tuple] = []
+        reviews: List[tuple] = []
+
+        appointment_columns = (
+            "id", "start_date", "end_date", "user_id", "customer_id", "business_id", "customer_fullname",
+            "has_written_review", "has_video_review", "total_price", "total_price_with_discount", "total_discount",
+            "total_duration", "status", "channel", "is_blocked", "message", "payment_currency_id",
+            "exchange_rate_source", "exchange_rate_timestamp", "created_at", "updated_at",
+        )
+        totals = {"appointments": 0, "appointment_products": 0, "reviews": 0}
+        started = time.perf_counter()
+
+        # Loaded in slices so the dependent rows never pile up in memory
+        rows = self._appointment_rows(appointment_products, reviews)
+        for chunk in _chunks(rows, COPY_CHUNK_SIZE * 4):
+            totals["appointments"] += await copy_rows(self.conn, "appointments", appointment_columns, chunk, quiet=True)
+            totals["appointment_products"] += await copy_rows(self.conn, "appointment_products", (
+                "id", "appointment_id", "product_id", "name", "price", "price_with_discount", "discount", "duration",
+                "currency_id", "converted_price_with_discount", "exchange_rate",
+            ), appointment_products, quiet=True)
+            totals["reviews"] += await copy_rows(self.conn, "reviews", (
+                "id", "review", "rating", "like_count", "parent_id", "appointment_id", "customer_id", "user_id",
+                "service_id", "product_id", "created_at", "updated_at",
+            ), reviews, quiet=True)
+            appointment_products.clear()
+            reviews.clear()
+
+        elapsed = time.perf_counter() - started
+        for table, total in totals.items():
+            report(table, total, elapsed)
+
+    # Counters
+    def _user_counter_rows(self) -> Iterator[tuple]:
+        counters = self.user_counters
+        for index in range(self.counts["users"]):
+            ratings = counters["ratings_count"][index]
+            yield (self.user_id(index), counters["followings_count"][index], counters["followers_count"][index],
+                   counters["products_count"][index], counters["posts_count"][index], ratings,
+                   round(self.rating_sums[index] / ratings, 2) if ratings else 5.0)
+
+    async def load_counters(self) -> None:
+        await copy_rows(self.conn, "user_counters", (
+            "user_id", "followings_count", "followers_count", "products_count", "posts_count", "ratings_count",
+            "ratings_average",
+        ), self._user_counter_rows())
+
+    async def finish(self) -> None:
+        for table in self.first_ids:
+            await self.conn.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), GREATEST((SELECT MAX(id) FROM {table}), 1))")
+
+        started = time.perf_counter()
+        for table in GENERATED_TABLES:
+            await self.conn.execute(f"ANALYZE {table}")
+        print(f"ANALYZE done in {time.perf_counter() - started:.1f}s")
+
+async def main(counts: Dict[str, int], seed: int, anchor: datetime, truncate: bool) -> None:
+    from core.security import hash_password
+
+    conn = await asyncpg.connect(_database_url())
+    try:
+        await conn.set_type_codec("geometry", schema="public", encoder=_ewkb_point, decoder=bytes, format="binary")
+        await conn.execute("SET synchronous_commit = off")
+
+        if truncate:
+            await conn.execute(f"TRUNCATE {', '.join(GENERATED_TABLES)} RESTART IDENTITY CASCADE")
+            print(f"Truncated: {', '.join(GENERATED_TABLES)}")
+
+        nomenclature = await Nomenclature.load(conn)
+        if nomenclature.missing():
+            await seed_nomenclature(conn)
+            nomenclature = await Nomenclature.load(conn)
+            if nomenclature.missing():
+                raise SystemExit(f"Nomenclature is incomplete: {', '.join(nomenclature.missing())}")
+
+        print(f"Seed {seed}, anchor {anchor.date()}, counts: " + ", ".join(f"{name} {count:,}" for name, count in counts.items()))
+        started = time.perf_counter()
+
+        generator = DatasetGenerator(conn, nomenclature, counts, seed, anchor)
+        await generator.read_first_ids()
+        await generator.load_users_and_businesses(await hash_password(DATASET_PASSWORD))
+        await generator.load_catalog()
+        await generator.load_social()
+        await generator.load_bookings()
+        await generator.load_counters()
+        await generator.finish()
+
+        print(f"Dataset loaded in {time.perf_counter() - started:.1f}s")
+    finally:
+        await conn.close()
+
+def _resolve_counts(args: argparse.Namespace) -> Dict[str, int]:
+    counts = {}
+    for name, default in DEFAULT_COUNTS.items():
+        value: Optional[int] = getattr(args, name)
+        counts[name] = value if value is not None else max(1, int(default * args.scale))
+
+    # Owners and employees are users too, clients are what is left
+    counts["businesses"] = min(counts["businesses"], counts["users"])
+    counts["employees"] = min(counts["employees"], counts["users"] - counts["businesses"])
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--anchor", type=date.fromisoformat, default=None,
+                        help="Date the data is generated around, defaults to today")
+    parser.add_argument("--truncate", action="store_true",
+                        help="Empty the generated tables first, and through CASCADE every row that references them")
+    for name in DEFAULT_COUNTS:
+        parser.add_argument(f"--{name}", type=int, default=None)
+    args = parser.parse_args()
+
+    anchor_date = args.anchor or datetime.now(timezone.utc).date()
+    anchor = datetime(anchor_date.year, anchor_date.month, anchor_date.day, 12, tzinfo=timezone.utc)
+    asyncio.run(main(_resolve_counts(args), args.seed, anchor, args.truncate))
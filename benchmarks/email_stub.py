@@ -0,0 +1,105 @@
+"""
+Local stand-in for the email provider, for running the email outbox without sending mail.
+
+Accepts POST /emails and POST /emails/batch like the provider, answers with ids and
+counts what it received. It can add latency, fail at random with 429 or 503, and reject
+addresses on a domain with 422, to exercise the sender's retries and batch splitting.
+
+    python -m benchmarks.email_stub --port 8025 --latency-ms 80 --error-rate 0.1 --reject-domain invalid.test
+    RESEND_API_URL=http://127.0.0.1:8025 uvicorn main:app
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class EmailStubState:
+    def __init__(self, latency_ms: int, error_rate: float, reject_domain: str):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.reject_domain = reject_domain
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.emails = 0
+        self.errors = 0
+        self.rejected = 0
+
+    def summary(self) -> str:
+        return (f"requests: {self.requests} batches: {self.batches} emails accepted: {self.emails} "
+                f"errors: {self.errors} rejected: {self.rejected}")
+
+def make_handler(state: EmailStubState):
+    class EmailStubHandler(BaseHTTPRequestHandler):
+        def _reply(self, status_code: int, body) -> None:
+            data = json.dumps(body).encode()
+            self.send_response(status_code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"null")
+
+            if self.path not in ("/emails", "/emails/batch"):
+                self._reply(404, {"message": "Not found"})
+                return
+
+            if state.latency_ms:
+                time.sleep(state.latency_ms / 1000)
+
+            emails = payload if self.path == "/emails/batch" else [payload]
+
+            with state.lock:
+                state.requests += 1
+
+                if random.random() < state.error_rate:
+                    state.errors += 1
+                    status_code = random.choice((429, 503))
+                    self._reply(status_code, {"message": "Stand-in failure"})
+                    return
+
+                if state.reject_domain and any(
+                    address.endswith("@" + state.reject_domain) for email in emails for address in email.get("to", [])
+                ):
+                    state.rejected += 1
+                    self._reply(422, {"message": f"Invalid recipient on {state.reject_domain}"})
+                    return
+
+                state.emails += len(emails)
+                if self.path == "/emails/batch":
+                    state.batches += 1
+
+            ids = [{"id": str(uuid.uuid4())} for _ in emails]
+            self._reply(200, {"data": ids} if self.path == "/emails/batch" else ids[0])
+
+        def log_message(self, format, *args):
+            pass
+
+    return EmailStubHandler
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--latency-ms", type=int, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--reject-domain", default="")
+    args = parser.parse_args()
+
+    state = EmailStubState(args.latency_ms, args.error_rate, args.reject_domain)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    print(f"Email stand-in listening on http://{args.host}:{args.port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(state.summary())
@@ -0,0 +1,259 @@
+"""
+Query plan regression check for the heavy SQL, against the synthetic dataset.
+
+Every case calls the service function that builds the statements: feeds (including
+build_posts_list_query), nearby and recommended businesses, keyword search and
+calendar events. The statements it runs are captured with their parameters and
+planned again with EXPLAIN (FORMAT JSON), without running them. Inputs are taken
+from the dataset in benchmarks/dataset.py: the client following the most accounts,
+and the provider with the most appointments.
+
+Each plan is checked against the rules:
+- no Seq Scan on posts, appointments or users
+- a statement ordered by a PostGIS distance reads businesses through an index scan
+  that returns the rows in distance order (KNN, <->)
+
+snapshot writes the plans to --snapshots, one JSON file per case, without costs and
+row estimates so that a diff only shows structural changes. check plans again and
+prints the diff against those files. Both exit with 1 when a rule is broken or a
+service fails, and check also when a plan changed.
+
+    python -m benchmarks.query_plans snapshot
+    python -m benchmarks.query_plans check --cases following_feed nearby_businesses
+"""
+import argparse
+import asyncio
+import difflib
+import json
+import re
+from contextvars import ContextVar
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+
+from core.database import async_engine, read_async_engine, async_session_factory
+from core.query_budget import fingerprint_statement
+from core.dependencies import PaginationParams
+from core.enums.role_enum import RoleEnum
+from schema.auth.auth import RequestAuthUser
+from service.booking.apppointment.get_appointments import get_user_calendar_events
+from service.booking.business import get_businesses_by_distance, get_user_recommended_businesses
+from service.search.search import search_keyword
+from service.social.post import get_explore_feed_posts, get_following_posts
+
+SNAPSHOTS_DIR = Path(__file__).parent / "query_plans"
+NO_SEQ_SCAN_TABLES = ("posts", "appointments", "users")
+
+# Kept in the snapshots, costs, row estimates and widths change with every ANALYZE
+PLAN_KEYS = (
+    "Node Type", "Parent Relationship", "Subplan Name", "Join Type", "Strategy", "Relation Name", "Alias",
+    "Index Name", "Scan Direction", "Index Cond", "Order By", "Sort Key", "Group Key",
+)
+INDEX_SCANS = ("Index Scan", "Index Only Scan")
+
+_distance_order = re.compile(r"ORDER BY[^()]*\b(distance|ST_Distance|<->)", re.IGNORECASE)
+_captured: ContextVar[Optional[List[Tuple[str, Any]]]] = ContextVar("captured_statements", default=None)
+
+class PlanInputs:
+    def __init__(self, client: RequestAuthUser, provider_id: int, lon: float, lat: float,
+                 service_id: int, sub_filters: List[int], keyword: str):
+        self.client = client
+        self.provider_id = provider_id
+        self.lon = lon
+        self.lat = lat
+        self.service_id = service_id
+        self.sub_filters = sub_filters
+        self.keyword = keyword
+
+    @classmethod
+    async def load(cls, db: AsyncSession) -> "PlanInputs":
+        client = (await db.execute(text(
+            "SELECT u.id, u.username, u.email, r.name::text AS role FROM users u JOIN roles r ON r.id = u.role_id "
+            "WHERE u.id = (SELECT follower_id FROM follows GROUP BY follower_id ORDER BY count(*) DESC, follower_id LIMIT 1)"
+        ))).mappings().first()
+        provider_id = await db.scalar(text(
+            "SELECT user_id FROM appointments GROUP BY user_id ORDER BY count(*) DESC, user_id LIMIT 1"))
+
+        if client is None or provider_id is None:
+            raise SystemExit("The database has no follows or appointments, load it with benchmarks.dataset")
+
+        product = (await db.execute(text(
+            "SELECT ST_X(b.coordinates) AS lon, ST_Y(b.coordinates) AS lat, p.service_id, s.name AS service_name, "
+            "array_agg(psf.sub_filter_id ORDER BY psf.sub_filter_id) AS sub_filters FROM products p "
+            "JOIN businesses b ON b.id = p.business_id "
+            "JOIN services s ON s.id = p.service_id "
+            "JOIN product_sub_filters psf ON psf.product_id = p.id "
+            "GROUP BY p.id, b.id, s.name ORDER BY (p.user_id = :provider_id) DESC, p.id LIMIT 1"
+        ), {"provider_id": provider_id})).mappings().first()
+
+        if product is None:
+            raise SystemExit("The database has no products with sub-filters, load it with benchmarks.dataset")
+
+        return cls(
+            client=RequestAuthUser(id=client["id"], username=client["username"], email=client["email"], role=RoleEnum[client["role"]].value),
+            provider_id=provider_id,
+            lon=product["lon"],
+            lat=product["lat"],
+            service_id=product["service_id"],
+            sub_filters=list(product["sub_filters"]),
+            keyword=product["service_name"][:4].lower()
+        )
+
+def _pagination() -> PaginationParams:
+    # The feeds compute their offset from page, None would fail before the posts query
+    return PaginationParams(page=1, limit=10, cursor=None)
+
+def _request(user_id: int) -> Request:
+    return Request({"type": "http", "headers": [], "state": {"user": {"id": user_id}}})
+
+def _day(days: int) -> str:
+    return (date.today() + timedelta(days=days)).isoformat()
+
+PlanCase = Callable[[AsyncSession, PlanInputs], Awaitable[Any]]
+
+CASES: Dict[str, PlanCase] = {
+    "explore_feed": lambda db, inputs: get_explore_feed_posts(db, _pagination(), inputs.client, None),
+    "following_feed": lambda db, inputs: get_following_posts(db, _pagination(), inputs.client),
+    "nearby_businesses": lambda db, inputs: get_businesses_by_distance(
+        db, inputs.lon, inputs.lat, _day(1), _day(1), "10:00:00", "12:00:00", inputs.service_id, False,
+        _request(inputs.client.id), 1, 10, inputs.sub_filters),
+    "recommended_businesses": lambda db, inputs: get_user_recommended_businesses(
+        db, inputs.lat, inputs.lon, "Europe/Bucharest", 10),
+    "search_keyword": lambda db, inputs: search_keyword(db, inputs.keyword, inputs.lat, inputs.lon),
+    "calendar_events": lambda db, inputs: get_user_calendar_events(
+        db, _day(-3), _day(3), inputs.provider_id, 30),
+}
+
+def install_capture() -> None:
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        captured = _captured.get()
+        if captured is not None and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            captured.append((statement, parameters))
+
+    for engine in {async_engine, read_async_engine}:
+        event.listen(engine.sync_engine, "after_cursor_execute", _capture)
+
+def simplify(node: Dict[str, Any]) -> Dict[str, Any]:
+    simple = {key: node[key] for key in PLAN_KEYS if key in node}
+    if node.get("Plans"):
+        simple["Plans"] = [simplify(child) for child in node["Plans"]]
+    return simple
+
+def _walk(node: Dict[str, Any]):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+def check_rules(sql: str, plan: Dict[str, Any]) -> List[str]:
+    problems = []
+    nodes = list(_walk(plan))
+
+    for node in nodes:
+        if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in NO_SEQ_SCAN_TABLES:
+            problems.append(f"Seq Scan on {node['Relation Name']}")
+
+    if _distance_order.search(sql) and not any(
+        node.get("Node Type") in INDEX_SCANS and node.get("Relation Name") == "businesses" and node.get("Order By")
+        for node in nodes
+    ):
+        problems.append("ordered by distance without an index scan in distance order on businesses")
+
+    return problems
+
+async def explain_case(name: str, inputs: PlanInputs) -> Tuple[List[Dict[str, Any]], List[str], Optional[str]]:
+    captured: List[Tuple[str, Any]] = []
+    token = _captured.set(captured)
+    error = None
+
+    try:
+        async with async_session_factory() as db:
+            try:
+                await CASES[name](db, inputs)
+            except Exception as e:
+                # The statements run before the failure are still worth checking
+                error = f"{type(e).__name__}: {e}"
+            finally:
+                await db.rollback()
+    finally:
+        _captured.reset(token)
+
+    statements: List[Dict[str, Any]] = []
+    problems: List[str] = []
+    seen = set()
+
+    async with async_engine.connect() as conn:
+        for statement, parameters in captured:
+            sql = fingerprint_statement(statement)
+            if sql in seen:
+                continue
+            seen.add(sql)
+
+            result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            raw = result.scalar_one()
+            plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+
+            statements.append({"sql": sql, "plan": simplify(plan)})
+            problems.extend(f"statement {len(statements)}: {problem}" for problem in check_rules(sql, plan))
+
+    return statements, problems, error
+
+def render(name: str, statements: List[Dict[str, Any]]) -> str:
+    return json.dumps({"case": name, "statements": statements}, indent=2) + "\n"
+
+async def main(command: str, cases: List[str], snapshots: Path) -> int:
+    install_capture()
+
+    async with async_session_factory() as db:
+        inputs = await PlanInputs.load(db)
+    print(f"Inputs: client {inputs.client.id}, provider {inputs.provider_id}, service {inputs.service_id}, "
+          f"keyword '{inputs.keyword}'")
+
+    failed = False
+    for name in cases:
+        statements, problems, error = await explain_case(name, inputs)
+        rendered = render(name, statements)
+        path = snapshots / f"{name}.json"
+
+        status = "ok"
+        if error:
+            # Statements after the failure were never captured, the snapshot would be partial
+            print(f"  {name}: the service failed, {error}")
+            status = "service failed"
+            failed = True
+        if problems:
+            status = "rules broken" if status == "ok" else status + ", rules broken"
+            failed = True
+
+        if command == "snapshot":
+            if not error:
+                snapshots.mkdir(parents=True, exist_ok=True)
+                path.write_text(rendered)
+        elif not path.exists():
+            status = "no snapshot" if status == "ok" else status
+            failed = True
+        elif path.read_text() != rendered:
+            status = "plan changed" if status == "ok" else status + ", plan changed"
+            failed = True
+            diff = difflib.unified_diff(path.read_text().splitlines(), rendered.splitlines(),
+                                        fromfile=str(path), tofile=f"{name} (current)", lineterm="")
+            print("\n".join(diff))
+
+        print(f"{name:<24}{len(statements):>3} statements  {status}")
+        for problem in problems:
+            print(f"    {problem}")
+
+    await async_engine.dispose()
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("snapshot", "check"))
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--snapshots", type=Path, default=SNAPSHOTS_DIR)
+    args = parser.parse_args()
+
+    raise SystemExit(asyncio.run(main(args.command, args.cases, args.snapshots)))
@@ -0,0 +1,324 @@
+"""
+Redis cache for async service functions.
+
+    @cached(ttl=300, key="user:{user_id}:followers", tags=["user:{user_id}"])
+    async def get_user_followers(db: DBSession, user_id: int) -> List[UserResponse]: ...
+
+    await invalidate_tags(f"user:{user_id}")
+
+Code that runs inside a transaction it does not commit, such as a task handler, uses
+invalidate_tags_on_commit(db, ...) instead: the tags are dropped by
+flush_invalidations(db) once the commit is done, so a read in between cannot cache the
+old values again.
+
+Keys and tags are formatted with the call arguments. Without an explicit key, the key is
+built from the primitive and pydantic arguments, plus the id of ORM objects such as
+auth_user. Sessions, requests and clients are left out. Results are stored as JSON
+(orjson when installed) or msgpack (CACHE_SERIALIZER=msgpack). When the function
+returns pydantic models or ORM objects, pass response_model so that hits come back as
+the same type.
+
+One miss per key computes the value: callers in the same worker wait on it, and other
+workers wait on a short Redis lock. TTLs are jittered, so keys written together do not
+all expire together. When Redis is down the function simply runs.
+"""
+import asyncio
+import hashlib
+import inspect
+import os
+import random
+import uuid
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from core import redis_client
+from core.logger import logger
+from core.metrics import cache_requests
+
+CACHE_PREFIX = os.getenv("CACHE_PREFIX") or "cache"
+CACHE_SERIALIZER = (os.getenv("CACHE_SERIALIZER") or "json").lower()
+CACHE_TTL_JITTER = float(os.getenv("CACHE_TTL_JITTER") or 0.1)
+CACHE_LOCK_TIMEOUT = float(os.getenv("CACHE_LOCK_TIMEOUT") or 5)
+CACHE_LOCK_POLL_INTERVAL = 0.05
+
+_JSON = b"j"
+_MSGPACK = b"m"
+
+# KEYS: tag set / ARGV: ttl. Only ever pushes the expiry later, keys written with a longer TTL stay reachable
+EXTEND_TTL_SCRIPT = """
+local ttl = redis.call('TTL', KEYS[1])
+if ttl ~= -2 and ttl < tonumber(ARGV[1]) then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return ttl
+"""
+
+# KEYS: lock / ARGV: owner token
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_inflight: Dict[str, asyncio.Future] = {}
+
+# Encoding
+def _json_default(value: Any):
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Cannot cache value of type {type(value).__name__}")
+
+def encode_value(value: Any) -> bytes:
+    if CACHE_SERIALIZER == "msgpack":
+        import msgpack
+        return _MSGPACK + msgpack.packb(value, default=_json_default)
+
+    try:
+        import orjson
+        return _JSON + orjson.dumps(value, default=_json_default)
+    except ImportError:
+        import json
+        return _JSON + json.dumps(value, default=_json_default, separators=(",", ":")).encode()
+
+def decode_value(raw: bytes) -> Any:
+    marker, payload = raw[:1], raw[1:]
+
+    if marker == _MSGPACK:
+        import msgpack
+        return msgpack.unpackb(payload)
+
+    try:
+        import orjson
+        return orjson.loads(payload)
+    except ImportError:
+        import json
+        return json.loads(payload)
+
+def jittered_ttl(ttl: int) -> int:
+    return max(1, int(ttl * random.uniform(1 - CACHE_TTL_JITTER, 1 + CACHE_TTL_JITTER)))
+
+def _tag_key(tag: str) -> str:
+    return f"{CACHE_PREFIX}:tag:{tag}"
+
+# Keys
+def _key_part(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, (str, int, float, bool, Decimal, date, time)):
+        return repr(value)
+    if isinstance(value, Enum):
+        return repr(value.value)
+    if isinstance(value, BaseModel):
+        return value.model_dump_json()
+    if isinstance(value, (list, tuple, set, frozenset)):
+        parts = [str(_key_part(item)) for item in value]
+        return repr(sorted(parts) if isinstance(value, (set, frozenset)) else parts)
+
+    resource_id = getattr(value, "id", None)
+    if isinstance(resource_id, int):
+        return f"{type(value).__name__}:{resource_id}"
+    return None
+
+def _default_key(func: Callable, arguments: Dict[str, Any]) -> str:
+    parts = [f"{name}={part}" for name, value in arguments.items() if (part := _key_part(value)) is not None]
+    digest = hashlib.sha1("|".join(parts).encode()).hexdigest()
+    return f"{func.__module__}.{func.__qualname__}:{digest}"
+
+# Invalidation
+async def invalidate_tags(*tags: str) -> None:
+    client = redis_client.redis_client
+    if client is None or not tags:
+        return
+
+    try:
+        pipe = client.pipeline()
+        for tag in tags:
+            pipe.smembers(_tag_key(tag))
+        members = await pipe.execute()
+
+        keys = {key for tag_members in members for key in tag_members}
+        keys.update(_tag_key(tag) for tag in tags)
+        await client.delete(*keys)
+    except Exception as e:
+        logger.warning(f"[CACHE] Invalidation failed for tags: {tags}. Error: {e}")
+
+def invalidate_tags_on_commit(db: AsyncSession, *tags: str) -> None:
+    db.info.setdefault("cache_tags", set()).update(tags)
+
+async def flush_invalidations(db: AsyncSession) -> None:
+    tags = db.info.pop("cache_tags", None)
+    if tags:
+        await invalidate_tags(*tags)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_invalidations(session: Session):
+    session.info.pop("cache_tags", None)
+
+async def invalidate_keys(*keys: str) -> None:
+    client = redis_client.redis_client
+    if client is None or not keys:
+        return
+
+    try:
+        await client.delete(*(f"{CACHE_PREFIX}:{key}" for key in keys))
+    except Exception as e:
+        logger.warning(f"[CACHE] Invalidation failed for keys: {keys}. Error: {e}")
+
+# Decorator
+async def _read(client, key: str):
+    raw = await client.get(key)
+    return (True, decode_value(raw)) if raw is not None else (False, None)
+
+async def _write(client, key: str, value: Any, ttl: int, tags: List[str]) -> None:
+    expires_in = jittered_ttl(ttl)
+
+    pipe = client.pipeline()
+    pipe.set(key, encode_value(value), ex=expires_in)
+    for tag in tags:
+        pipe.sadd(_tag_key(tag), key)
+        # The tag set has to outlive every key it points to, whatever TTL wrote them
+        pipe.eval(EXTEND_TTL_SCRIPT, 1, _tag_key(tag), int(ttl * (1 + CACHE_TTL_JITTER)) + 1)
+    await pipe.execute()
+
+async def _wait_for_other_worker(client, key: str):
+    deadline = asyncio.get_running_loop().time() + CACHE_LOCK_TIMEOUT
+
+    while asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(CACHE_LOCK_POLL_INTERVAL)
+        hit, value = await _read(client, key)
+        if hit:
+            return hit, value
+        if not await client.exists(key + ":lock"):
+            break
+    return False, None
+
+def cached(
+    ttl: int,
+    key: Optional[str] = None,
+    tags: Optional[Iterable[str]] = None,
+    response_model: Any = None
+):
+    tag_templates = list(tags or [])
+    adapter = TypeAdapter(response_model) if response_model is not None else None
+
+    def decorator(func: Callable):
+        signature = inspect.signature(func)
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        def bind(args, kwargs) -> Dict[str, Any]:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return bound.arguments
+
+        def format_key(arguments: Dict[str, Any]) -> str:
+            return key.format(**arguments) if key else _default_key(func, arguments)
+
+        def to_cache(value: Any) -> Any:
+            if adapter is not None:
+                return adapter.dump_python(adapter.validate_python(value, from_attributes=True), mode="json")
+            return value
+
+        def from_cache(value: Any) -> Any:
+            return adapter.validate_python(value) if adapter is not None else value
+
+        async def compute(client, cache_key: str, arguments: Dict[str, Any], args, kwargs):
+            lock_key = cache_key + ":lock"
+            lock_token = uuid.uuid4().hex
+            try:
+                got_lock = await client.set(lock_key, lock_token, nx=True, px=int(CACHE_LOCK_TIMEOUT * 1000))
+            except Exception as e:
+                logger.warning(f"[CACHE] Lock failed for key: {cache_key}. Error: {e}")
+                return await func(*args, **kwargs)
+
+            if not got_lock:
+                try:
+                    hit, value = await _wait_for_other_worker(client, cache_key)
+                except Exception:
+                    hit, value = False, None
+                if hit:
+                    cache_requests.inc(name, "wait")
+                    return from_cache(value)
+
+            try:
+                result = await func(*args, **kwargs)
+                try:
+                    await _write(client, cache_key, to_cache(result), ttl, [tag.format(**arguments) for tag in tag_templates])
+                except Exception as e:
+                    logger.warning(f"[CACHE] Write failed for key: {cache_key}. Error: {e}")
+                return result
+            finally:
+                if got_lock:
+                    # The lock may have expired and been taken by another worker, only drop our own
+                    try:
+                        await client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, lock_token)
+                    except Exception:
+                        pass
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            client = redis_client.redis_client
+            if client is None:
+                return await func(*args, **kwargs)
+
+            arguments = bind(args, kwargs)
+            cache_key = f"{CACHE_PREFIX}:{format_key(arguments)}"
+
+            try:
+                hit, value = await _read(client, cache_key)
+            except Exception as e:
+                logger.warning(f"[CACHE] Read failed for key: {cache_key}. Error: {e}")
+                cache_requests.inc(name, "error")
+                return await func(*args, **kwargs)
+
+            if hit:
+                cache_requests.inc(name, "hit")
+                return from_cache(value)
+
+            # Single flight inside this worker
+            inflight = _inflight.get(cache_key)
+            if inflight is not None:
+                cache_requests.inc(name, "wait")
+                return await asyncio.shield(inflight)
+
+            cache_requests.inc(name, "miss")
+            future = asyncio.get_running_loop().create_future()
+            _inflight[cache_key] = future
+
+            try:
+                result = await compute(client, cache_key, arguments, args, kwargs)
+                future.set_result(result)
+                return result
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                future.set_exception(e)
+                # Nobody may be waiting, do not log "exception was never retrieved"
+                future.exception()
+                raise
+            finally:
+                _inflight.pop(cache_key, None)
+
+        def cache_key(*args, **kwargs) -> str:
+            return format_key(bind(args, kwargs))
+
+        async def invalidate(*args, **kwargs) -> None:
+            await invalidate_keys(cache_key(*args, **kwargs))
+
+        wrapper.cache_key = cache_key
+        wrapper.invalidate = invalidate
+        return wrapper
+    return decorator
@@ -1,7 +1,18 @@
+import base64
+import enum
+import hashlib
+import json
+import os
+from datetime import datetime, date, time
+from decimal import Decimal
 from typing import TypeVar, Optional, Dict, Union, Generic
 from fastapi import HTTPException, status
 from pydantic import BaseModel
-from sqlalchemy import select, Table, insert, delete, asc, desc, func, and_
+from sqlalchemy import select, Table, insert, update, delete, asc, desc, func, and_, or_, false, tuple_, text
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import Select
+from core import redis_client
 from core.dependencies import DBSession
 from models import Base
 from typing import List, Any, Type
@@ -10,9 +21,149 @@ from core.logger import logger
 SchemaT = TypeVar("SchemaT", bound=BaseModel)
 ModelT = TypeVar("ModelT", bound=Base)
 
+COUNT_CACHE_TTL = int(os.getenv("COUNT_CACHE_TTL") or 30)
+
+class CountStrategy(str, enum.Enum):
+    EXACT = "exact"
+    CACHED = "cached"
+    ESTIMATED = "estimated"
+
 class PaginatedResponse(BaseModel, Generic[SchemaT]):
-    count: int
+    count: Optional[int] = None
     results: List[SchemaT]
+    next_cursor: Optional[str] = None
+
+def _cursor_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+def _parse_cursor_value(column, value: Any) -> Any:
+    if value is None:
+        return None
+
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+
+    if issubclass(python_type, datetime):
+        return datetime.fromisoformat(value)
+    if issubclass(python_type, date):
+        return date.fromisoformat(value)
+    if issubclass(python_type, time):
+        return time.fromisoformat(value)
+    if issubclass(python_type, (Decimal, enum.Enum)):
+        return python_type(value)
+    return value
+
+def encode_cursor(values: List[Any]) -> str:
+    raw = json.dumps([_cursor_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, columns: List[Any]) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("Cursor does not match the ordering")
+        return [_parse_cursor_value(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError) as e:
+        logger.warning(f"Invalid pagination cursor: {cursor}. Error: {e}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Invalid cursor")
+
+def _count_cache_key(query: Select) -> str:
+    compiled = query.compile(dialect=postgresql.dialect())
+    raw = f"{compiled}|{sorted(compiled.params.items(), key=lambda item: item[0])!r}"
+    return "count:" + hashlib.sha256(raw.encode()).hexdigest()
+
+async def _exact_count(db: DBSession, query: Select) -> int:
+    return (await db.execute(select(func.count()).select_from(query.subquery()))).scalar_one()
+
+async def _cached_count(db: DBSession, query: Select, ttl: int) -> int:
+    client = redis_client.redis_client
+    if client is None:
+        return await _exact_count(db, query)
+
+    key = _count_cache_key(query)
+    try:
+        cached = await client.get(key)
+        if cached is not None:
+            return int(cached)
+    except Exception as e:
+        logger.warning(f"Count cache read failed for key: {key}. Error: {e}")
+        return await _exact_count(db, query)
+
+    count = await _exact_count(db, query)
+
+    try:
+        await client.set(key, count, ex=ttl)
+    except Exception as e:
+        logger.warning(f"Count cache write failed for key: {key}. Error: {e}")
+
+    return count
+
+async def _estimated_count(db: DBSession, query: Select, table: Optional[Table], ttl: int) -> int:
+    if table is None:
+        froms = query.get_final_froms()
+        table = froms[0] if len(froms) == 1 and isinstance(froms[0], Table) else None
+
+    # The planner estimate only describes a whole table
+    if query.whereclause is not None or table is None:
+        return await _cached_count(db, query, ttl)
+
+    estimate = await db.scalar(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)"),
+        {"table_name": table.fullname}
+    )
+
+    # -1 means the table was never analyzed
+    if estimate is None or estimate < 0:
+        return await _cached_count(db, query, ttl)
+
+    return int(estimate)
+
+async def db_count(
+    db: DBSession,
+    query: Select,
+    strategy: CountStrategy = CountStrategy.EXACT,
+    estimate_table: Optional[Table] = None,
+    ttl: int = COUNT_CACHE_TTL
+) -> int:
+    """
+    Number of rows returned by query.
+    exact: COUNT(*) over the query.
+    cached: exact count kept in Redis for ttl seconds, keyed by the SQL and its parameters.
+    estimated: planner row estimate of estimate_table (or the single table queried),
+    only used for unfiltered queries, otherwise falls back to cached.
+    """
+    if strategy == CountStrategy.CACHED:
+        return await _cached_count(db, query, ttl)
+    if strategy == CountStrategy.ESTIMATED:
+        return await _estimated_count(db, query, estimate_table, ttl)
+    return await _exact_count(db, query)
+
+def _after_cursor(columns: List[Any], values: List[Any], descending: Optional[bool]):
+    if not any(getattr(column.expression, "nullable", True) for column in columns) and None not in values:
+        position, cursor_values = tuple_(*columns), tuple_(*values)
+        return position < cursor_values if descending else position > cursor_values
+
+    # A row value compared with NULL is never true, so nullable columns are compared one
+    # at a time. NULLs sort last ascending and first descending, as in Postgres
+    def comes_after(column, value):
+        if descending:
+            return column.is_not(None) if value is None else column < value
+        return false() if value is None else or_(column > value, column.is_(None))
+
+    return or_(*(
+        and_(*(column.is_not_distinct_from(value) for column, value in zip(columns[:index], values[:index])),
+             comes_after(columns[index], values[index]))
+        for index in range(len(columns))
+    ))
 
 async def db_get_all(
     db: DBSession,
@@ -24,8 +175,18 @@ async def db_get_all(
     descending: Optional[bool] = False,
     schema: Optional[Type[SchemaT]] = None,
     page: Optional[int] = None,
-    limit: Optional[int] = None
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    with_count: Optional[bool] = None,
+    count_strategy: CountStrategy = CountStrategy.EXACT
 ) -> Union[List[ModelT], PaginatedResponse[SchemaT]]:
+    """
+    Without page/limit returns every row. With page and limit returns an OFFSET page,
+    with cursor and limit a keyset page that starts right after the cursor. Paginated
+    results are ordered by order_by plus id and always carry the next_cursor, so
+    clients can switch to the cursor after the first page. The COUNT query runs for
+    OFFSET pages only unless with_count says otherwise, using count_strategy.
+    """
     query_all = select(model)
 
     if joins:
@@ -36,34 +197,118 @@ async def db_get_all(
             column = getattr(model, field) if isinstance(field, str) else field
             query_all = query_all.where(column == value)
 
+    order_columns = []
     if order_by:
         if isinstance(order_by, str):
             order_by = [order_by]
         for column_name in order_by:
             column = getattr(model, column_name, None)
             if column is not None:
-                query_all = query_all.order_by(desc(column) if descending else asc(column))
+                order_columns.append(column)
             else:
                 raise ValueError(f"Column '{column_name}' does not exist in {model.__name__}")
 
-    count_query = select(func.count()).select_from(query_all.subquery())
+    is_keyset = cursor is not None and limit is not None
+    is_paginated = is_keyset or (page is not None and limit is not None)
+
+    # Keyset pages need a total order, id breaks the ties
+    if is_paginated and not any(column.key == "id" for column in order_columns):
+        order_columns.append(model.id) # type: ignore
+
+    for column in order_columns:
+        query_all = query_all.order_by(desc(column) if descending else asc(column))
+
+    count_query = query_all
 
-    if page is not None and limit is not None:
-        query_all = query_all.offset((page - 1) * limit).limit(limit)
+    if is_keyset:
+        if cursor:
+            query_all = query_all.where(_after_cursor(order_columns, decode_cursor(cursor, order_columns), descending))
+        query_all = query_all.limit(limit + 1)
+    elif is_paginated:
+        query_all = query_all.offset((page - 1) * limit).limit(limit + 1)
 
     result = await db.execute(query_all)
     data = result.scalars().unique().all() if unique else result.scalars().all()
 
+    if not is_paginated:
+        return [schema.model_validate(obj) for obj in data] if schema else data
+
+    has_next = len(data) > limit
+    data = data[:limit]
+    next_cursor = encode_cursor([getattr(data[-1], column.key) for column in order_columns]) if has_next else None
+
     if schema:
         data = [schema.model_validate(obj) for obj in data]
 
-    if page is not None and limit is not None:
-        total_result = await db.execute(count_query)
-        total = total_result.scalar_one()
+    total = None
+    if with_count if with_count is not None else not is_keyset:
+        total = await db_count(db, count_query, count_strategy)
+
+    return PaginatedResponse(count=total, results=data, next_cursor=next_cursor)
+
+def _sort_value(value: Any):
+    # Postgres sorts NULLs last ascending and first descending, reverse=True gives the same
+    return value is None, value
+
+def paginate_records(
+    records: List[Any],
+    model: Type[ModelT],
+    order_by: Optional[Union[str, List[str]]] = None,
+    descending: Optional[bool] = False,
+    schema: Optional[Type[SchemaT]] = None,
+    page: Optional[int] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> Union[List[Any], PaginatedResponse[SchemaT]]:
+    """
+    db_get_all over rows that are already in memory, same ordering, pages and cursors.
+    The count is always returned since it costs nothing here.
+    """
+    order_columns = []
+    if order_by:
+        if isinstance(order_by, str):
+            order_by = [order_by]
+        for column_name in order_by:
+            column = getattr(model, column_name, None)
+            if column is None:
+                raise ValueError(f"Column '{column_name}' does not exist in {model.__name__}")
+            order_columns.append(column)
+
+    is_keyset = cursor is not None and limit is not None
+    is_paginated = is_keyset or (page is not None and limit is not None)
+
+    if is_paginated and not any(column.key == "id" for column in order_columns):
+        order_columns.append(model.id) # type: ignore
+
+    def sort_key(values: List[Any]):
+        return tuple(_sort_value(value) for value in values)
+
+    def record_key(record: Any):
+        return sort_key([getattr(record, column.key) for column in order_columns])
+
+    data = sorted(records, key=record_key, reverse=bool(descending)) if order_columns else list(records)
+
+    if not is_paginated:
+        return [schema.model_validate(obj) for obj in data] if schema else data
+
+    total = len(data)
+
+    if is_keyset:
+        if cursor:
+            position = sort_key(decode_cursor(cursor, order_columns))
+            data = [record for record in data if (record_key(record) < position if descending else record_key(record) > position)]
+        data = data[:limit + 1]
+    else:
+        data = data[(page - 1) * limit:page * limit + 1]
+
+    has_next = len(data) > limit
+    data = data[:limit]
+    next_cursor = encode_cursor([getattr(data[-1], column.key) for column in order_columns]) if has_next else None
 
-        return PaginatedResponse(count=total, results=data)
+    if schema:
+        data = [schema.model_validate(obj) for obj in data]
 
-    return data
+    return PaginatedResponse(count=total, results=data, next_cursor=next_cursor)
 
 async def db_get_one(
     db: DBSession,
@@ -101,11 +346,21 @@ async def db_create(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail='No data provided')
 
-    obj_data = create_data.model_dump()
-    new_obj = model(**obj_data, **(extra_params or {}))
-    db.add(new_obj)
+    obj_data = {**create_data.model_dump(), **(extra_params or {})}
+
+    # Like the ORM insert, None leaves a column with a default to that default instead of sending NULL
+    columns = sa_inspect(model).columns
+    obj_data = {
+        key: value for key, value in obj_data.items()
+        if value is not None or key not in columns or (columns[key].default is None and columns[key].server_default is None)
+    }
+
+    # INSERT ... RETURNING hands back the row with its server side defaults, no refresh needed
+    result = await db.execute(
+        insert(model).values(**obj_data).returning(model)
+    )
+    new_obj = result.scalars().one()
     await db.commit()
-    await db.refresh(new_obj)
 
     return new_obj
 
@@ -114,12 +369,13 @@ async def db_delete(
     model: Type[ModelT],
     resource_id: int
 ):
-    db_obj = await db.get(model, resource_id)
+    result = await db.execute(
+        delete(model).where(model.id == resource_id).returning(model.id) # type: ignore
+    )
 
-    if not db_obj:
+    if result.scalar_one_or_none() is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail=f"{model.__name__} not found")
-    await db.delete(db_obj)
     await db.commit()
 
 async def db_update(
@@ -130,33 +386,54 @@ async def db_update(
     filters: Optional[Dict[str, Any]] = None,
     load_options: Optional[list] = None
 ) -> ModelT:
-    query_put = select(model)
+    query_put = update(model)
 
     if resource_id:
-        query_put = query_put.filter(model.id == resource_id) # type: ignore
+        query_put = query_put.where(model.id == resource_id) # type: ignore
     elif filters:
         query_put = query_put.filter_by(**filters)
     else:
         raise ValueError("Either 'resource_id' or 'filters' must be provided")
 
-    if load_options:
-        query_put = query_put.options(*load_options)
+    columns = sa_inspect(model).column_attrs.keys()
+    update_dict = {
+        key: value for key, value in update_data.model_dump(exclude_unset=True).items() if key in columns
+    }
 
-    result = await db.execute(query_put)
+    if not update_dict:
+        # Nothing to SET, a plain lookup keeps the 404 semantics
+        return await _db_get_updated(db, model, query_put.whereclause, load_options)
+
+    result = await db.execute(
+        query_put.values(**update_dict)
+        .returning(model)
+        .execution_options(populate_existing=True)
+    )
     resource = result.scalars().first()
 
     if not resource:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail=f"{model.__name__} not found")
 
-    update_dict = update_data.model_dump(exclude_unset=True)
-    for key, value in update_dict.items():
-        if hasattr(resource, key):
-            setattr(resource, key, value)
-
     await db.commit()
-    await db.refresh(resource)
 
+    if load_options:
+        return await _db_get_updated(db, model, model.id == resource.id, load_options) # type: ignore
+
+    return resource
+
+async def _db_get_updated(db: DBSession, model: Type[ModelT], where_clause, load_options: Optional[list]) -> ModelT:
+    query = select(model).where(where_clause)
+
+    if load_options:
+        query = query.options(*load_options).execution_options(populate_existing=True)
+
+    result = await db.execute(query)
+    resource = result.scalars().first()
+
+    if not resource:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"{model.__name__} not found")
     return resource
 
 async def db_get_many_to_many(
@@ -251,4 +528,98 @@ async def db_remove_many_to_many(
     await db.execute(delete(relation_table).where(
         (relation_table.c[list(relation_table.c.keys())[0]] == resource_one_id) & (relation_table.c[list(relation_table.c.keys())[1]] == resource_two_id)  # type: ignore
     ))
-    await db.commit()
\ No newline at end of file
+    await db.commit()
+
+def _relation_columns(relation_table: Table, model_one: Type[ModelT], model_two: Type[ModelT]):
+    column_one = column_two = None
+
+    for column in relation_table.c:
+        for foreign_key in column.foreign_keys:
+            if foreign_key.references(model_one.__table__):
+                column_one = column
+            elif foreign_key.references(model_two.__table__):
+                column_two = column
+
+    if column_one is None or column_two is None:
+        keys = list(relation_table.c.keys())
+        column_one, column_two = relation_table.c[keys[0]], relation_table.c[keys[1]]
+
+    return column_one, column_two
+
+def _unique_ids(resource_ids: List[int]) -> List[int]:
+    unique_ids = list(dict.fromkeys(resource_ids))
+
+    if not unique_ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No ids provided")
+    return unique_ids
+
+async def db_bulk_insert_many_to_many(
+    db: DBSession,
+    model_one: Type[ModelT],
+    resource_one_id: int,
+    model_two: Type[ModelT],
+    resource_two_ids: List[int],
+    relation_table: Table
+):
+    resource_two_ids = _unique_ids(resource_two_ids)
+    column_one, column_two = _relation_columns(relation_table, model_one, model_two)
+
+    # One round trip for every foreign key: does resource one exist, which of resource two do
+    existing_stmt = await db.execute(
+        select(
+            select(model_one.id).where(model_one.id == resource_one_id).exists().label("resource_one_exists"),
+            select(func.array_agg(model_two.id)).where(model_two.id.in_(resource_two_ids)).scalar_subquery()
+        )
+    )
+    resource_one_exists, existing_ids = existing_stmt.one()
+
+    if not resource_one_exists:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"{model_one.__name__} id: {resource_one_id} not found")
+
+    missing_ids = sorted(set(resource_two_ids) - set(existing_ids or []))
+    if missing_ids:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"{model_two.__name__} ids: {missing_ids} not found")
+
+    attached_stmt = await db.execute(
+        postgresql.insert(relation_table)
+        .values([{column_one.name: resource_one_id, column_two.name: resource_two_id} for resource_two_id in resource_two_ids])
+        .on_conflict_do_nothing()
+        .returning(column_two)
+    )
+    attached_ids = attached_stmt.scalars().all()
+    await db.commit()
+    attached = set(attached_ids)
+
+    return {
+        "detail": f"{len(attached_ids)} {model_two.__name__} attached to {model_one.__name__} id: {resource_one_id}",
+        "attached_ids": attached_ids,
+        "already_attached_ids": [resource_two_id for resource_two_id in resource_two_ids if resource_two_id not in attached]
+    }
+
+async def db_bulk_remove_many_to_many(
+    db: DBSession,
+    model_one: Type[ModelT],
+    resource_one_id: int,
+    model_two: Type[ModelT],
+    resource_two_ids: List[int],
+    relation_table: Table
+):
+    resource_two_ids = _unique_ids(resource_two_ids)
+    column_one, column_two = _relation_columns(relation_table, model_one, model_two)
+
+    detached_stmt = await db.execute(
+        delete(relation_table)
+        .where(column_one == resource_one_id, column_two.in_(resource_two_ids))
+        .returning(column_two)
+    )
+    detached_ids = detached_stmt.scalars().all()
+    await db.commit()
+    detached = set(detached_ids)
+
+    return {
+        "detail": f"{len(detached_ids)} {model_two.__name__} detached from {model_one.__name__} id: {resource_one_id}",
+        "detached_ids": detached_ids,
+        "not_associated_ids": [resource_two_id for resource_two_id in resource_two_ids if resource_two_id not in detached]
+    }
@@ -1,22 +1,215 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import declarative_base
+import time
+from typing import Dict, Any, Optional
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker, AsyncEngine
+from sqlalchemy.orm import declarative_base, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from dotenv import load_dotenv
+from core.logger import logger
+from core import redis_client
+from core.metrics import instrument_engine
+from core.query_budget import install_query_tracking
 import os
 
 #Load env
 load_dotenv()
 
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
 # Get the database URL from the env
 DATABASE_URL=os.getenv("DATABASE_URL")
+READ_DATABASE_URL=os.getenv("READ_DATABASE_URL")
+
+# Engine settings, defaults are the production profile
+DB_ECHO = _env_bool("DB_ECHO", False)
+DB_POOL_SIZE = _env_int("DB_POOL_SIZE", 10)
+DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 5)
+DB_POOL_TIMEOUT = _env_int("DB_POOL_TIMEOUT", 10)
+DB_POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 1800)
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+DB_STATEMENT_CACHE_SIZE = _env_int("DB_STATEMENT_CACHE_SIZE", 100)
+
+# Seconds a user keeps reading from the primary after one of their writes
+DB_READ_STICKY_SECONDS = _env_int("DB_READ_STICKY_SECONDS", 5)
+
+class PoolStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.timeouts = 0
+        self.overflow_events = 0
+
+    def record_wait(self, wait_ms: float) -> None:
+        self.checkouts += 1
+        self.wait_total_ms += wait_ms
+        self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "checkouts": self.checkouts,
+            "wait_avg_ms": round(self.wait_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+            "wait_max_ms": round(self.wait_max_ms, 3),
+            "timeouts": self.timeouts,
+            "overflow_events": self.overflow_events,
+        }
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long callers wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            self.stats.record_wait((time.perf_counter() - started) * 1000)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+def build_async_engine(url: str) -> AsyncEngine:
+    engine = create_async_engine(
+        url,
+        echo=DB_ECHO,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args={
+            "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        }
+    )
+
+    instrument_engine(engine)
+    install_query_tracking(engine)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _count_overflow(dbapi_connection, connection_record):
+        pool = engine.sync_engine.pool
+        if isinstance(pool, InstrumentedAsyncPool) and pool.overflow() > 0:
+            pool.stats.overflow_events += 1
+
+    return engine
+
+def get_pool_status(engine: AsyncEngine) -> Dict[str, Any]:
+    pool = engine.sync_engine.pool
+    status = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "timeout_s": DB_POOL_TIMEOUT,
+    }
+
+    if isinstance(pool, InstrumentedAsyncPool):
+        status.update(pool.stats.as_dict())
+
+    return status
 
 # Create an asynchronous engine
-async_engine = create_async_engine(DATABASE_URL, echo=True)
+async_engine = build_async_engine(DATABASE_URL)
+
+# Read replica engine, falls back to the primary when no replica is configured
+read_async_engine = build_async_engine(READ_DATABASE_URL) if READ_DATABASE_URL else async_engine
 
 async_session_factory = async_sessionmaker(bind=async_engine, expire_on_commit=False, class_=AsyncSession)
+read_async_session_factory = async_sessionmaker(bind=read_async_engine, expire_on_commit=False, class_=AsyncSession)
 
 Base = declarative_base()
 
+@event.listens_for(Session, "after_commit")
+def _flag_commit(session: Session):
+    session.info["has_committed"] = True
+
+# Read-your-writes: users who just wrote are routed to the primary for a while
+_sticky_until: Dict[int, float] = {}
+_STICKY_LOCAL_MAX_SIZE = 10000
+
+def _sticky_key(user_id: int) -> str:
+    return f"db:sticky:{user_id}"
+
+def _get_request_user_id(request: Request) -> Optional[int]:
+    user = getattr(request.state, "user", None)
+    return getattr(user, "id", None)
+
+async def mark_primary_sticky(user_id: int) -> None:
+    if DB_READ_STICKY_SECONDS <= 0 or read_async_engine is async_engine:
+        return
+
+    if len(_sticky_until) >= _STICKY_LOCAL_MAX_SIZE:
+        now = time.monotonic()
+        for key in [k for k, until in _sticky_until.items() if until <= now]:
+            del _sticky_until[key]
+        if len(_sticky_until) >= _STICKY_LOCAL_MAX_SIZE:
+            _sticky_until.clear()
+
+    _sticky_until[user_id] = time.monotonic() + DB_READ_STICKY_SECONDS
+
+    # Share the flag with the other workers
+    if redis_client.redis_client is not None:
+        try:
+            await redis_client.redis_client.set(_sticky_key(user_id), 1, ex=DB_READ_STICKY_SECONDS)
+        except Exception as e:
+            logger.warning(f"[DB] Could not store primary stickiness for user: {user_id}. Error: {e}")
+
+async def is_primary_sticky(user_id: int) -> bool:
+    until = _sticky_until.get(user_id)
+    if until is not None:
+        if until > time.monotonic():
+            return True
+        _sticky_until.pop(user_id, None)
+
+    if redis_client.redis_client is None:
+        return False
+
+    try:
+        return bool(await redis_client.redis_client.exists(_sticky_key(user_id)))
+    except Exception as e:
+        # When in doubt read from the primary
+        logger.warning(f"[DB] Could not read primary stickiness for user: {user_id}. Error: {e}")
+        return True
+
 #Dependecy to get a DB session
-async def get_db():
+async def get_db(request: Request):
     async with async_session_factory() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+        if session.info.get("has_committed"):
+            user_id = _get_request_user_id(request)
+            if user_id is not None:
+                await mark_primary_sticky(user_id)
+
+#Dependecy to get a DB session for read only GET handlers
+async def get_read_db(request: Request):
+    factory = read_async_session_factory
+
+    if read_async_engine is not async_engine:
+        user_id = _get_request_user_id(request)
+        if user_id is not None and await is_primary_sticky(user_id):
+            factory = async_session_factory
+
+    async with factory() as session:
+        yield session
@@ -1,3 +1,4 @@
+import hmac
 import os
 
 import httpx
@@ -15,7 +16,7 @@ except ImportError:
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from .database import get_db
+from .database import get_db, get_read_db
 from models import Base
 from core.security import decode_token, oauth2_bearer
 from core.logger import logger
@@ -27,20 +28,23 @@ class PaginationParams:
     def __init__(
             self,
             page: Optional[int] = Query(None, ge=1),
-            limit: Optional[int] = Query(None, ge=1)
+            limit: Optional[int] = Query(None, ge=1),
+            cursor: Optional[str] = Query(None, max_length=512)
     ):
         self.page = page
         self.limit = limit
+        self.cursor = cursor
 
 DBSession: TypeAlias = Annotated[AsyncSession, Depends(get_db)]
+ReadDBSession: TypeAlias = Annotated[AsyncSession, Depends(get_read_db)]
 HTTPClient: TypeAlias = Annotated[httpx.AsyncClient, Depends(get_http_client)]
 RedisClient: TypeAlias = Annotated[Redis, Depends(init_redis)]
 Pagination: TypeAlias = Annotated[PaginationParams, Depends()]
 
-async def get_user_by_token(token: str = Depends(oauth2_bearer)) -> RequestAuthUser:
+async def authenticate_token(token: str) -> RequestAuthUser:
     payload = await decode_token(token, os.getenv("SECRET_KEY"))
 
-    if payload and payload.id is None:
+    if payload is None or payload.id is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials"
@@ -53,6 +57,15 @@ async def get_user_by_token(token: str = Depends(oauth2_bearer)) -> RequestAuthU
         role=payload.role
     )
 
+async def get_user_by_token(request: Request, token: str = Depends(oauth2_bearer)) -> RequestAuthUser:
+    # AuthMiddleware already verified this token, reuse it instead of decoding twice
+    user = getattr(request.state, "user", None)
+
+    if user is not None:
+        return cast(RequestAuthUser, user)
+
+    return await authenticate_token(token)
+
 def get_authenticated_user_from_request(request: Request) -> RequestAuthUser:
     user = getattr(request.state, "user", None)
 
@@ -111,6 +124,16 @@ async def check_resource_ownership(
 
     return resource
 
+def require_internal_token(request: Request) -> None:
+    # Metrics and health expose routes, pool state and traffic, they are for the
+    # scraper and the probes only. Without INTERNAL_API_TOKEN nobody gets in
+    expected = os.getenv("INTERNAL_API_TOKEN")
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+
+    if not expected or scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), expected.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="You do not have permission to perform this action")
+
 # Roles dependencies
 SuperAdminSession = Depends(allowed_roles([RoleEnum.SUPER_ADMIN]))
 BusinessSession = Depends(allowed_roles([RoleEnum.BUSINESS]))
@@ -124,4 +147,5 @@ BusinessAndEmployeesSession = Depends(allowed_roles([RoleEnum.BUSINESS, RoleEnum
 BusinessAndManagerSession = Depends(allowed_roles([RoleEnum.BUSINESS, RoleEnum.MANAGER]))
 
 # Auth dependencies
-UserSession = Depends(get_user_by_token)
\ No newline at end of file
+UserSession = Depends(get_user_by_token)
+InternalSession = Depends(require_internal_token)
\ No newline at end of file
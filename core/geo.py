@@ -0,0 +1,59 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+
+# shapely and timezonefinder are heavy to import and only a few endpoints need them,
+# so they are loaded on first use instead of when the worker boots
+
+# Coordinates are rounded to this many decimals before a timezone lookup (2 ~ 1.1 km cells)
+TIMEZONE_GRID_DECIMALS = int(os.getenv("TIMEZONE_GRID_DECIMALS") or 2)
+TIMEZONE_CACHE_MAX_SIZE = int(os.getenv("TIMEZONE_CACHE_MAX_SIZE") or 4096)
+
+_timezone_finder = None
+_timezone_finder_lock = threading.Lock()
+_timezone_cache: OrderedDict[Tuple[float, float], str] = OrderedDict()
+
+def to_shape(element):
+    from geoalchemy2.shape import to_shape as geoalchemy_to_shape
+    return geoalchemy_to_shape(element)
+
+def get_timezone_finder():
+    """Process wide TimezoneFinder, its polygon data is read from disk only once."""
+    global _timezone_finder
+
+    if _timezone_finder is None:
+        with _timezone_finder_lock:
+            if _timezone_finder is None:
+                from timezonefinder import TimezoneFinder
+                _timezone_finder = TimezoneFinder(in_memory=True)
+    return _timezone_finder
+
+def _grid_cell(lat: float, lng: float) -> Tuple[float, float]:
+    return round(lat, TIMEZONE_GRID_DECIMALS), round(lng, TIMEZONE_GRID_DECIMALS)
+
+def _lookup_timezone(lat: float, lng: float) -> Optional[str]:
+    return get_timezone_finder().timezone_at_land(lng=lng, lat=lat)
+
+async def timezone_at(lat: float, lng: float) -> Optional[str]:
+    # The cell is only the cache key, the lookup uses the exact point so a coastal
+    # address does not round into the sea or across a border
+    cell = _grid_cell(lat, lng)
+
+    if cell in _timezone_cache:
+        _timezone_cache.move_to_end(cell)
+        return _timezone_cache[cell]
+
+    timezone = await run_in_threadpool(_lookup_timezone, lat, lng)
+    if timezone is None:
+        return None
+
+    _timezone_cache[cell] = timezone
+    while len(_timezone_cache) > TIMEZONE_CACHE_MAX_SIZE:
+        _timezone_cache.popitem(last=False)
+
+    return timezone
+
+async def preload_timezone_finder() -> None:
+    await run_in_threadpool(get_timezone_finder)
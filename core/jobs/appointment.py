@@ -1,36 +1,83 @@
-from core.database import async_session_factory
-from core.enums.appointment_status_enum import AppointmentStatusEnum
-from core.logger import logger
-from sqlalchemy import select, and_
+import os
+import zlib
 from datetime import datetime, timezone
 
+from sqlalchemy import select, update, and_, func
+
+from core.database import async_engine
+from core.enums.appointment_status_enum import AppointmentStatusEnum
+from core.logger import logger, struct_logger
+from core.metrics import job_rows_updated, job_runs_skipped
 from models import Appointment
 
-async def update_appointment_status():
-    async with async_session_factory() as db:
-        try:
-            now = datetime.now(timezone.utc)
-            appointments_result = await db.execute(
-                select(Appointment)
-                .where(
-                    and_(
-                        Appointment.start_date <= now,
-                        Appointment.status == AppointmentStatusEnum.IN_PROGRESS
-                    )
-                )
+APPOINTMENT_STATUS_BATCH_SIZE = int(os.getenv("APPOINTMENT_STATUS_BATCH_SIZE") or 500)
+APPOINTMENT_STATUS_MAX_BATCHES = int(os.getenv("APPOINTMENT_STATUS_MAX_BATCHES") or 20)
+
+# The scheduler already claims each tick for a single worker. The advisory lock is defence
+# in depth, for a run that outlives its lease or is started by hand while another is running
+APPOINTMENT_STATUS_LOCK_ID = zlib.crc32(b"update_appointment_status")
+
+def _finish_batch_stmt(now: datetime):
+    batch = (
+        select(Appointment.id)
+        .where(
+            and_(
+                Appointment.start_date <= now,
+                Appointment.status == AppointmentStatusEnum.IN_PROGRESS
             )
-            appointments = appointments_result.scalars().all()
+        )
+        .order_by(Appointment.id)
+        .limit(APPOINTMENT_STATUS_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+    )
+
+    return (
+        update(Appointment)
+        .where(Appointment.id.in_(batch.scalar_subquery()))
+        .values(status=AppointmentStatusEnum.FINISHED)
+        .returning(Appointment.id)
+    )
+
+async def update_appointment_status():
+    try:
+        async with async_engine.connect() as conn:
+            locked = await conn.scalar(select(func.pg_try_advisory_lock(APPOINTMENT_STATUS_LOCK_ID)))
+            await conn.commit()
+
+            if not locked:
+                job_runs_skipped.inc("update_appointment_status")
+                return
+
+            try:
+                now = datetime.now(timezone.utc)
+                updated = 0
+
+                for _ in range(APPOINTMENT_STATUS_MAX_BATCHES):
+                    result = await conn.execute(_finish_batch_stmt(now))
+                    batch_count = len(result.all())
+                    await conn.commit()
 
-            if len(appointments) > 0:
-                logger.info(f"[Scheduler] {now.isoformat()} - Found {len(appointments)} appointments to update")
+                    updated += batch_count
+                    if batch_count < APPOINTMENT_STATUS_BATCH_SIZE:
+                        break
+            finally:
+                try:
+                    await conn.rollback()
+                    await conn.execute(select(func.pg_advisory_unlock(APPOINTMENT_STATUS_LOCK_ID)))
+                    await conn.commit()
+                except Exception:
+                    # A session level lock outlives the transaction, never hand it back to the pool
+                    await conn.invalidate()
+                    raise
 
-                for a in appointments:
-                    a.status = AppointmentStatusEnum.FINISHED
+        job_rows_updated.inc("update_appointment_status", amount=updated)
 
-                await db.commit()
-                logger.info(f"[Scheduler] Appointments updated successfully.")
-            else:
-                logger.info(f"[Scheduler] {now.isoformat()} - Not Found appointments to update")
+        if updated > 0:
+            struct_logger.info("scheduler.appointments_updated", count=updated)
+        else:
+            struct_logger.info("scheduler.appointments_not_found")
 
-        except Exception as e:
-            logger.error(f"[Scheduler] Error while updating appointments: {str(e)}")
\ No newline at end of file
+    except Exception as e:
+        logger.error(f"[Scheduler] Error while updating appointments: {str(e)}")
+        # The scheduler retries the run with backoff
+        raise
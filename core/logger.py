@@ -1,44 +1,210 @@
+import atexit
+import json
 import os
+import random
 import sys
-import structlog
+import threading
+import time
+import traceback
+from collections import deque
 from loguru import logger
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Any, Deque, Dict, Optional, Tuple
 
-log_dir = Path(__file__).resolve().parent.parent
+log_dir = Path(__file__).resolve().parent.parent / "logs"
 
 if not log_dir.exists():
     os.makedirs(log_dir, exist_ok=True)
 
+LOG_LEVEL = (os.getenv("LOG_LEVEL") or "INFO").upper()
+LOG_FORMAT = (os.getenv("LOG_FORMAT") or "text").lower()
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE") or 256)
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL") or 0.5)
+
+# Hard cap on queued memory: at most LOG_QUEUE_MAX_RECORDS records of LOG_MAX_MESSAGE_CHARS each
+LOG_QUEUE_MAX_RECORDS = int(os.getenv("LOG_QUEUE_MAX_RECORDS") or 10000)
+LOG_MAX_MESSAGE_CHARS = int(os.getenv("LOG_MAX_MESSAGE_CHARS") or 8192)
+
+LOG_FILE_MAX_BYTES = 10 * 1024 * 1024
+LOG_FILE_RETENTION = timedelta(days=7)
+
+LEVELS = {"TRACE": 5, "DEBUG": 10, "INFO": 20, "SUCCESS": 25, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+
+# Default sampling rates per event, overridable with LOG_SAMPLE_RATES="event=rate,event=rate"
+SAMPLE_RATES: Dict[str, float] = {
+    "static_map.cache_hit": 0.01,
+    "scheduler.appointments_not_found": 0.05,
+}
+
+for _item in filter(None, (os.getenv("LOG_SAMPLE_RATES") or "").split(",")):
+    _event, _, _rate = _item.partition("=")
+    SAMPLE_RATES[_event.strip()] = float(_rate)
+
+LogRecord = Tuple[float, str, str, Optional[Dict[str, Any]]]
+
+def _truncate(value: str) -> str:
+    return value if len(value) <= LOG_MAX_MESSAGE_CHARS else value[:LOG_MAX_MESSAGE_CHARS] + "...[truncated]"
+
+class LogWriter:
+    """Bounded queue of log records, rendered and written in batches by a background thread."""
+
+    def __init__(self):
+        self._queue: Deque[LogRecord] = deque()
+        self._condition = threading.Condition()
+        self._dropped = 0
+        self._stopped = False
+        self._file = None
+        self._file_date = None
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, record: LogRecord) -> None:
+        with self._condition:
+            if len(self._queue) >= LOG_QUEUE_MAX_RECORDS:
+                self._dropped += 1
+                return
+
+            self._queue.append(record)
+            if len(self._queue) >= LOG_BATCH_SIZE:
+                self._condition.notify()
+
+    def close(self) -> None:
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if not self._queue and not self._stopped:
+                    self._condition.wait(LOG_FLUSH_INTERVAL)
+
+                batch = list(self._queue)
+                self._queue.clear()
+                dropped, self._dropped = self._dropped, 0
+                stopped = self._stopped
+
+            if dropped:
+                batch.append((time.time(), "WARNING", f"[LOGGER] Queue full, dropped {dropped} records", None))
+
+            if batch:
+                try:
+                    self._write("".join(self._render(record) for record in batch))
+                except Exception:
+                    traceback.print_exc(file=sys.stderr)
+
+            if stopped:
+                if self._file is not None:
+                    self._file.close()
+                return
+
+    @staticmethod
+    def _render(record: LogRecord) -> str:
+        timestamp, level, message, fields = record
+
+        if LOG_FORMAT == "json":
+            payload = {"timestamp": datetime.fromtimestamp(timestamp).isoformat(), "level": level, "message": message}
+            if fields:
+                payload.update(fields)
+            return json.dumps(payload, default=str) + "\n"
+
+        line = f"{datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d at %H:%M:%S')} | {level} | {message}"
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line + "\n"
+
+    def _write(self, chunk: str) -> None:
+        sys.stdout.write(chunk)
+        sys.stdout.flush()
+
+        log_file = self._get_file()
+        log_file.write(chunk)
+        log_file.flush()
+
+    def _get_file(self):
+        today = datetime.now().strftime('%Y-%m-%d')
+        path = log_dir / f"app_{today}.log"
+
+        if self._file is not None and (self._file_date != today or self._file.tell() >= LOG_FILE_MAX_BYTES):
+            self._file.close()
+            self._file = None
+
+            if path.exists() and path.stat().st_size >= LOG_FILE_MAX_BYTES:
+                path.rename(log_dir / f"app_{today}.{datetime.now().strftime('%H-%M-%S')}.log")
+            self._remove_expired_files()
+
+        if self._file is None:
+            self._file = open(path, "a", encoding="utf-8")
+            self._file_date = today
+
+        return self._file
+
+    @staticmethod
+    def _remove_expired_files() -> None:
+        expires_before = time.time() - LOG_FILE_RETENTION.total_seconds()
+        for old_file in log_dir.glob("app_*.log"):
+            if old_file.stat().st_mtime < expires_before:
+                old_file.unlink(missing_ok=True)
+
+log_writer = LogWriter()
+atexit.register(log_writer.close)
+
+def _loguru_sink(message) -> None:
+    record = message.record
+    text = record["message"]
+
+    if record["exception"] is not None:
+        text += "\n" + "".join(traceback.format_exception(*record["exception"]))
+
+    log_writer.submit((record["time"].timestamp(), record["level"].name, _truncate(text), record["extra"] or None))
+
 logger.remove()
 
-logger.add(
-    sys.stdout,
-    format="{time:YYYY-MM-DD at HH:mm:ss} | {level} | {message}",
-    level="INFO",
-    colorize=True,
-    enqueue=True
-)
-
-logger.add(
-    log_dir / f"logs/app_{datetime.now().strftime('%Y-%m-%d')}.log",
-    level="INFO",
-    rotation="10 MB",
-    retention="7 days",
-    encoding="utf-8",
-    enqueue=True
-)
-
-# Configure Structlog for structured logs
-structlog.configure(
-    processors=[
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.JSONRenderer()
-    ]
-)
-
-# Create global loggers
-struct_logger = structlog.get_logger()
+logger.add(_loguru_sink, format="{message}", level=LOG_LEVEL)
+
+class StructLogger:
+    """
+    Structured event logging. Fields are only rendered by the writer thread, and
+    nothing is built at all for records below LOG_LEVEL or skipped by sampling.
+
+        struct_logger.info("static_map.cache_hit", key=key)
+        struct_logger.info("google.details_ok", sample=0.1, duration_ms=dur)
+    """
+
+    def __init__(self):
+        self.min_level = LEVELS.get(LOG_LEVEL, LEVELS["INFO"])
+
+    def log(self, level: str, event: str, sample: Optional[float] = None, **fields: Any) -> None:
+        if LEVELS[level] < self.min_level:
+            return
+
+        rate = sample if sample is not None else SAMPLE_RATES.get(event)
+        if rate is not None and rate < 1:
+            if random.random() >= rate:
+                return
+            fields["sample_rate"] = rate
+
+        for key, value in fields.items():
+            if isinstance(value, str) and len(value) > LOG_MAX_MESSAGE_CHARS:
+                fields[key] = _truncate(value)
+
+        log_writer.submit((time.time(), level, event, fields))
+
+    def debug(self, event: str, **fields: Any) -> None:
+        self.log("DEBUG", event, **fields)
+
+    def info(self, event: str, **fields: Any) -> None:
+        self.log("INFO", event, **fields)
+
+    def warning(self, event: str, **fields: Any) -> None:
+        self.log("WARNING", event, **fields)
+
+    def error(self, event: str, **fields: Any) -> None:
+        self.log("ERROR", event, **fields)
+
+struct_logger = StructLogger()
 
 # Expose them for direct import
-__all__ = ["logger", "struct_logger"]
\ No newline at end of file
+__all__ = ["logger", "struct_logger", "log_writer"]
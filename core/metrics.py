@@ -0,0 +1,257 @@
+"""
+In-process Prometheus style metrics.
+
+Counters and histograms are plain dicts updated on the event loop, no locks and no
+client library. With several uvicorn workers set METRICS_DIR to a directory shared
+by the workers of a node (and emptied when the node starts): every worker dumps a
+snapshot there every METRICS_FLUSH_INTERVAL seconds and /metrics merges them all.
+"""
+import asyncio
+import json
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Any
+
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL") or 5)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def snapshot(self) -> List[Any]:
+        return [[list(labels), value] for labels, value in self.values.items()]
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> [count per bucket (last one is +Inf), sum]
+        self.values: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        state = self.values.get(labels)
+        if state is None:
+            state = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    def snapshot(self) -> List[Any]:
+        return [[list(labels), [list(counts), total]] for labels, (counts, total) in self.values.items()]
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, Any] = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def collect(self) -> Dict[str, Dict[Tuple[str, ...], Any]]:
+        """Own values merged with the snapshots of the other workers."""
+        merged: Dict[str, Dict[Tuple[str, ...], Any]] = {name: {} for name in self.metrics}
+        snapshots = [self.snapshot()]
+
+        if METRICS_DIR:
+            own_file = _snapshot_path()
+            for path in Path(METRICS_DIR).glob("*.json"):
+                if path == own_file:
+                    continue
+                try:
+                    snapshots.append(json.loads(path.read_text()))
+                except (OSError, ValueError):
+                    continue
+
+        for snapshot in snapshots:
+            for name, values in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+
+                for labels, value in values:
+                    key = tuple(labels)
+                    current = merged[name].get(key)
+
+                    if metric.type == "counter":
+                        merged[name][key] = (current or 0) + value
+                    elif current is None:
+                        merged[name][key] = [list(value[0]), value[1]]
+                    else:
+                        current[0] = [a + b for a, b in zip(current[0], value[0])]
+                        current[1] += value[1]
+
+        return merged
+
+    def render(self) -> str:
+        lines = []
+
+        for name, values in self.collect().items():
+            metric = self.metrics[name]
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+
+            for labels, value in sorted(values.items()):
+                label_pairs = [f'{key}="{_escape(label)}"' for key, label in zip(metric.labelnames, labels)]
+
+                if metric.type == "counter":
+                    lines.append(f"{name}{_format_labels(label_pairs)} {value}")
+                    continue
+
+                counts, total = value
+                cumulative = 0
+                for bound, count in zip(list(metric.buckets) + ["+Inf"], counts):
+                    cumulative += count
+                    bucket_pairs = label_pairs + ['le="' + str(bound) + '"']
+                    lines.append(f"{name}_bucket{_format_labels(bucket_pairs)} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(label_pairs)} {total}")
+                lines.append(f"{name}_count{_format_labels(label_pairs)} {cumulative}")
+
+        return "\n".join(lines) + "\n"
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(pairs: List[str]) -> str:
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _snapshot_path() -> Path:
+    return Path(METRICS_DIR) / f"{os.getpid()}.json"
+
+registry = Registry()
+
+# Metrics
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status"))
+http_request_db_statements = registry.histogram(
+    "http_request_db_statements", "DB statements executed per HTTP request", ("method", "route"), COUNT_BUCKETS)
+http_request_db_duration = registry.histogram(
+    "http_request_db_duration_seconds", "Time spent in DB statements per HTTP request", ("method", "route"))
+db_statement_duration = registry.histogram(
+    "db_statement_duration_seconds", "DB statement latency", ("operation",), DB_LATENCY_BUCKETS)
+redis_command_duration = registry.histogram(
+    "redis_command_duration_seconds", "Redis command latency", ("command",), DB_LATENCY_BUCKETS)
+outbound_request_duration = registry.histogram(
+    "outbound_request_duration_seconds", "Outbound HTTP call latency", ("service", "operation"))
+job_duration = registry.histogram(
+    "job_duration_seconds", "Scheduled job run time", ("job", "status"))
+job_rows_updated = registry.counter(
+    "job_rows_updated_total", "Rows changed by scheduled jobs", ("job",))
+job_runs_skipped = registry.counter(
+    "job_runs_skipped_total", "Scheduled job runs skipped because another worker holds the lock", ("job",))
+job_retries = registry.counter(
+    "job_retries_total", "Scheduled job runs that failed and were rescheduled with backoff", ("job",))
+tasks_processed = registry.counter(
+    "tasks_processed_total", "Background tasks by result (success, duplicate, retry, dead)", ("task", "result"))
+emails_sent = registry.counter(
+    "emails_sent_total", "Outbox email deliveries by result (sent, retry, failed)", ("result",))
+cache_requests = registry.counter(
+    "cache_requests_total", "Cached function lookups by result (hit, miss, wait, error)", ("function", "result"))
+
+# Per request DB statement counters, set by MetricsMiddleware
+class RequestDBStats:
+    __slots__ = ("statements", "duration")
+
+    def __init__(self):
+        self.statements = 0
+        self.duration = 0.0
+
+request_db_stats: ContextVar[Optional[RequestDBStats]] = ContextVar("request_db_stats", default=None)
+
+@contextmanager
+def timed(histogram: Histogram, *labels: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - started, *labels)
+
+def timed_job(name: str, job):
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        status = "success"
+        try:
+            return await job(*args, **kwargs)
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            job_duration.observe(time.perf_counter() - started, name, status)
+
+    wrapper.__name__ = getattr(job, "__name__", name)
+    return wrapper
+
+def instrument_engine(engine) -> None:
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        duration = time.perf_counter() - started
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement else "UNKNOWN"
+
+        db_statement_duration.observe(duration, operation)
+
+        stats = request_db_stats.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.duration += duration
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_started"):
+            connection.info["query_started"].pop()
+
+def write_snapshot() -> None:
+    if not METRICS_DIR:
+        return
+
+    path = _snapshot_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(registry.snapshot()))
+    tmp_path.replace(path)
+
+async def run_snapshot_writer() -> None:
+    while True:
+        await asyncio.sleep(METRICS_FLUSH_INTERVAL)
+        try:
+            write_snapshot()
+        except OSError:
+            pass
@@ -1,24 +1,74 @@
-from fastapi import HTTPException, Response, Request
+from typing import Optional, Sequence
+from fastapi import HTTPException
 from starlette import status
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.datastructures import Headers
 from starlette.responses import JSONResponse
-from core.dependencies import get_user_by_token
+from starlette.types import ASGIApp, Scope, Receive, Send
+from core.dependencies import authenticate_token
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        auth_header = request.headers.get("Authorization")
+# Paths that never need the token parsed up front (public, served to <img> tags, or
+# behind INTERNAL_API_TOKEN instead of a user token)
+DEFAULT_EXCLUDED_PATHS = (
+    "/health",
+    "/metrics",
+    "/auth/login",
+    "/auth/register",
+    "/auth/refresh",
+    "/maps/static",
+)
 
-        if auth_header and auth_header.lower().startswith("bearer "):
-            token = auth_header[7:]
+class AuthMiddleware:
+    def __init__(self, app: ASGIApp, excluded_paths: Optional[Sequence[str]] = None):
+        self.app = app
+        self.excluded_paths = tuple(
+            path.rstrip("/") for path in (excluded_paths if excluded_paths is not None else DEFAULT_EXCLUDED_PATHS)
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault("state", {})
+        state["user"] = None
+
+        if self._is_excluded(scope):
+            await self.app(scope, receive, send)
+            return
+
+        token = self._get_bearer_token(scope)
+
+        if token:
             try:
-                request.state.user = await get_user_by_token(token)
+                state["user"] = await authenticate_token(token)
             except HTTPException:
-                return JSONResponse(
+                response = JSONResponse(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     content={"detail": "Invalid or expired token"}
                 )
-        else:
-            request.state.user = None
-        response = await call_next(request)
-        return response
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
 
+    def _is_excluded(self, scope: Scope) -> bool:
+        path: str = scope.get("path", "")
+        root_path: str = scope.get("root_path", "")
+
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+
+        path = path.rstrip("/")
+
+        for excluded in self.excluded_paths:
+            if path == excluded or path.startswith(excluded + "/"):
+                return True
+        return False
+
+    @staticmethod
+    def _get_bearer_token(scope: Scope) -> Optional[str]:
+        auth_header = Headers(scope=scope).get("Authorization")
+
+        if auth_header and auth_header.lower().startswith("bearer "):
+            return auth_header[7:]
+        return None
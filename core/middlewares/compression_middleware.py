@@ -0,0 +1,196 @@
+import os
+import zlib
+from typing import Optional, Sequence, List
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Scope, Receive, Send, Message
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE") or 1024)
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL") or 6)
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY") or 4)
+
+# Routes whose bodies are already compressed (PNG/JPEG proxies) or tiny and hot
+DEFAULT_EXCLUDED_PATHS = (
+    "/maps/static",
+    "/health",
+)
+
+# Content types that do not shrink any further
+INCOMPRESSIBLE_TYPES = ("image/", "video/", "audio/", "application/zip", "application/gzip", "application/octet-stream")
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = {}
+
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    candidates = (("br", "gzip") if brotli is not None else ("gzip",))
+
+    for coding in candidates:
+        if accepted.get(coding, wildcard) > 0:
+            return coding
+    return None
+
+class Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+class CompressionMiddleware:
+    """
+    gzip, or brotli when the package is installed and the client accepts it. Bodies
+    under minimum_size go out untouched; streamed bodies are compressed chunk by chunk.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        gzip_level: int = COMPRESSION_GZIP_LEVEL,
+        brotli_quality: int = COMPRESSION_BROTLI_QUALITY,
+        excluded_paths: Optional[Sequence[str]] = None
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.excluded_paths = tuple(
+            path.rstrip("/") for path in (excluded_paths if excluded_paths is not None else DEFAULT_EXCLUDED_PATHS)
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD" or self._is_excluded(scope):
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressedResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    def _is_excluded(self, scope: Scope) -> bool:
+        path: str = scope.get("path", "")
+        root_path: str = scope.get("root_path", "")
+
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+
+        path = path.rstrip("/")
+
+        for excluded in self.excluded_paths:
+            if path == excluded or path.startswith(excluded + "/"):
+                return True
+        return False
+
+class _CompressedResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start_message: Optional[Message] = None
+        self.buffer: List[bytes] = []
+        self.buffered = 0
+        self.compressor: Optional[Compressor] = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            self.passthrough = not self._is_compressible(message)
+            if self.passthrough:
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            self.buffer.append(body)
+            self.buffered += len(body)
+
+            if more_body and self.buffered < self.middleware.minimum_size:
+                return
+
+            data = b"".join(self.buffer)
+            self.buffer = []
+
+            if not more_body and len(data) < self.middleware.minimum_size:
+                await self._send(self.start_message)
+                await self._send({"type": "http.response.body", "body": data, "more_body": False})
+                return
+
+            self.compressor = Compressor(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+            compressed = self.compressor.compress(data)
+
+            if not more_body:
+                compressed += self.compressor.flush()
+
+            await self._send_start(compressed_length=None if more_body else len(compressed))
+            await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+            return
+
+        compressed = self.compressor.compress(body)
+        if not more_body:
+            compressed += self.compressor.flush()
+        await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+    def _is_compressible(self, message: Message) -> bool:
+        if message["status"] < 200 or message["status"] in (204, 304):
+            return False
+
+        headers = Headers(raw=message.get("headers", []))
+        if "content-encoding" in headers:
+            return False
+
+        content_type = headers.get("content-type", "")
+        return not content_type.startswith(INCOMPRESSIBLE_TYPES)
+
+    async def _send_start(self, compressed_length: Optional[int]) -> None:
+        headers = MutableHeaders(raw=list(self.start_message.get("headers", [])))
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+
+        if compressed_length is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(compressed_length)
+
+        # Strong validators describe the identity bytes, the encoded body needs a weak one
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag
+
+        await self._send({**self.start_message, "headers": headers.raw})
@@ -0,0 +1,40 @@
+import time
+from starlette.types import ASGIApp, Scope, Receive, Send, Message
+from core.metrics import http_request_duration, http_request_db_statements, http_request_db_duration, \
+    request_db_stats, RequestDBStats
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = RequestDBStats()
+        token = request_db_stats.set(stats)
+        started = time.perf_counter()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - started
+            request_db_stats.reset(token)
+
+            # Label by route template, never by the raw path, to keep cardinality bounded
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "<unmatched>"
+            method = scope["method"]
+
+            http_request_duration.observe(duration, method, route_path, str(status_code))
+            http_request_db_statements.observe(stats.statements, method, route_path)
+            http_request_db_duration.observe(stats.duration, method, route_path)
@@ -0,0 +1,90 @@
+"""
+Startup profiler.
+
+Imports a module (the ASGI app by default) in a fresh interpreter started with
+'-X importtime' and reports where the import time goes, plus the peak memory of
+the process once the import is done.
+
+    python -m core.profiling
+    python -m core.profiling --module main --top 40 --group-by package
+"""
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+REPORT_MARKER = "__startup_profile__"
+
+def run_import(module: str) -> Tuple[str, float, int]:
+    code = (
+        "import resource, time\n"
+        "started = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - started\n"
+        "rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+        f"print('{REPORT_MARKER}', elapsed, rss_kb)\n"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True
+    )
+
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing '{module}' failed:\n{completed.stderr[-4000:]}")
+
+    for line in completed.stdout.splitlines():
+        if line.startswith(REPORT_MARKER):
+            _, elapsed, rss_kb = line.split()
+            return completed.stderr, float(elapsed), int(rss_kb)
+
+    raise RuntimeError("Startup profile report not found in the interpreter output")
+
+def parse_importtime(output: str) -> Dict[str, Tuple[int, int]]:
+    """Returns {module: (self_us, cumulative_us)} from '-X importtime' output."""
+    timings = {}
+
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+
+    return timings
+
+def group_by_package(timings: Dict[str, Tuple[int, int]]) -> Dict[str, Tuple[int, int]]:
+    grouped: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+
+    for name, (self_us, _) in timings.items():
+        grouped[name.split(".")[0]][0] += self_us
+
+    # Cumulative time of a package is the cumulative time of its top level import
+    for package, values in grouped.items():
+        values[1] = timings.get(package, (0, values[0]))[1]
+
+    return {package: (values[0], values[1]) for package, values in grouped.items()}
+
+def print_report(module: str, timings: Dict[str, Tuple[int, int]], elapsed: float, rss_kb: int, top: int, label: str):
+    print(f"import {module}: {elapsed * 1000:.1f} ms, peak RSS {rss_kb / 1024:.1f} MB, {len(timings)} modules")
+    print(f"{label:<60}{'self ms':>10}{'cumulative ms':>16}")
+
+    ranked = sorted(timings.items(), key=lambda item: item[1][1], reverse=True)
+    for name, (self_us, cumulative_us) in ranked[:top]:
+        print(f"{name:<60}{self_us / 1000:>10.1f}{cumulative_us / 1000:>16.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=30)
+    parser.add_argument("--group-by", choices=["module", "package"], default="module")
+    args = parser.parse_args()
+
+    stderr, elapsed, rss_kb = run_import(args.module)
+    timings = parse_importtime(stderr)
+
+    if args.group_by == "package":
+        timings = group_by_package(timings)
+
+    print_report(args.module, timings, elapsed, rss_kb, args.top, args.group_by)
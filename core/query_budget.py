@@ -0,0 +1,116 @@
+"""
+Per-request query budget and N+1 detector.
+
+Routes declare how many SQL statements they are allowed to run:
+
+    @router.get("/appointments")
+    @query_budget(max_queries=6)
+    async def get_appointments_by_user(...): ...
+
+QUERY_BUDGET_MODE selects what happens when a route goes over its budget or runs the
+same statement (modulo parameters) more than max_duplicates times, which is how an
+N+1 loop shows up: 'off' (default, no tracking at all), 'warn' (log it) or 'raise'
+(fail the request, meant for tests and debug runs). In 'raise' mode the statement that
+would go over the budget is refused before it runs, so the request fails inside its
+transaction and nothing it wrote gets committed.
+"""
+import os
+import re
+from collections import Counter
+from contextvars import ContextVar
+from functools import wraps
+from typing import Optional
+
+from core.logger import logger
+
+QUERY_BUDGET_MODE = (os.getenv("QUERY_BUDGET_MODE") or "off").lower()
+QUERY_BUDGET_MAX_DUPLICATES = int(os.getenv("QUERY_BUDGET_MAX_DUPLICATES") or 3)
+
+_whitespace = re.compile(r"\s+")
+_literals = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_in_lists = re.compile(r"\bIN\s*\([^)]*\)", re.IGNORECASE)
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+class QueryTracker:
+    __slots__ = ("route", "max_queries", "max_duplicates", "statements", "fingerprints")
+
+    def __init__(self, route: str = "", max_queries: int = 0, max_duplicates: int = QUERY_BUDGET_MAX_DUPLICATES):
+        self.route = route
+        self.max_queries = max_queries
+        self.max_duplicates = max_duplicates
+        self.statements = 0
+        self.fingerprints: Counter = Counter()
+
+    def record(self, statement: str) -> None:
+        sql = fingerprint_statement(statement)
+
+        if QUERY_BUDGET_MODE == "raise":
+            if self.statements + 1 > self.max_queries:
+                raise QueryBudgetExceeded(
+                    f"[QUERY BUDGET] {self.route}: query {self.statements + 1} refused, budget is {self.max_queries}")
+            if self.fingerprints[sql] + 1 > self.max_duplicates:
+                raise QueryBudgetExceeded(
+                    f"[QUERY BUDGET] {self.route}: possible N+1, refused run {self.fingerprints[sql] + 1}: {sql[:300]}")
+
+        self.statements += 1
+        self.fingerprints[sql] += 1
+
+    def duplicates(self, max_duplicates: int):
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count > max_duplicates]
+
+query_tracker: ContextVar[Optional[QueryTracker]] = ContextVar("query_tracker", default=None)
+
+def fingerprint_statement(statement: str) -> str:
+    statement = _in_lists.sub("IN (...)", statement)
+    statement = _literals.sub("?", statement)
+    return _whitespace.sub(" ", statement).strip()
+
+def install_query_tracking(engine) -> None:
+    if QUERY_BUDGET_MODE == "off":
+        return
+
+    from sqlalchemy import event
+
+    # Before execution, so that 'raise' mode stops the statement instead of reporting it
+    @event.listens_for(getattr(engine, "sync_engine", engine), "before_cursor_execute")
+    def _track_statement(conn, cursor, statement, parameters, context, executemany):
+        tracker = query_tracker.get()
+        if tracker is not None:
+            tracker.record(statement)
+
+def _report(tracker: QueryTracker) -> None:
+    problems = []
+
+    if tracker.statements > tracker.max_queries:
+        problems.append(f"{tracker.statements} queries, budget is {tracker.max_queries}")
+
+    for sql, count in tracker.duplicates(tracker.max_duplicates):
+        problems.append(f"possible N+1, ran {count} times: {sql[:300]}")
+
+    if problems:
+        logger.warning(f"[QUERY BUDGET] {tracker.route}: " + "; ".join(problems))
+
+def query_budget(max_queries: int, max_duplicates: int = QUERY_BUDGET_MAX_DUPLICATES):
+    def decorator(endpoint):
+        if QUERY_BUDGET_MODE == "off":
+            return endpoint
+
+        @wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            tracker = QueryTracker(endpoint.__qualname__, max_queries, max_duplicates)
+            token = query_tracker.set(tracker)
+            try:
+                result = await endpoint(*args, **kwargs)
+            finally:
+                query_tracker.reset(token)
+
+            # 'raise' mode already refused the statement that went over, after the
+            # endpoint returned its writes are committed and only a warning is left
+            if QUERY_BUDGET_MODE == "warn":
+                _report(tracker)
+            return result
+
+        return wrapper
+    return decorator
@@ -4,6 +4,12 @@ from typing import Union
 from core.logger import logger
 
 from redis.asyncio import Redis
+from core.metrics import redis_command_duration, timed
+
+class InstrumentedRedis(Redis):
+    async def execute_command(self, *args, **options):
+        with timed(redis_command_duration, str(args[0]).upper() if args else "UNKNOWN"):
+            return await super().execute_command(*args, **options)
 
 redis_client: Union[Redis, None] = None
 
@@ -18,7 +24,7 @@ async def init_redis() -> Redis:
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail=f"Missing REDIS_URL"
             )
-        redis_client = Redis.from_url(redis_url, decode_responses=False)
+        redis_client = InstrumentedRedis.from_url(redis_url, decode_responses=False)
     return redis_client
 
 async def close_redis():
@@ -1,8 +1,197 @@
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
+"""
+Redis backed job scheduler shared by every worker of every node.
+
+Each registered job has one member in the SCHEDULER_DUE_KEY sorted set, scored by the
+time (ms) it is next due. Workers poll the set and claim due jobs with a Lua script that
+also moves the score to the end of a lease, so a job is handed to exactly one worker.
+While it runs, the owner heartbeats to push the lease forward. If the owner dies, the
+lease runs out, the job becomes due again and another worker picks it up. On success
+the job is rescheduled after its interval. On failure it is retried with exponential
+backoff, up to max_retries, and then waits for its next regular run.
+
+Schedules live in Redis, so a restart does not reset or lose them.
+
+    scheduler.register("reconcile_counters", reconcile_counters, interval=timedelta(minutes=10))
+"""
+import asyncio
+import os
+import time
+import uuid
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from core import redis_client
+from core.logger import logger
+from core.metrics import timed_job, job_runs_skipped, job_retries
 from core.jobs.appointment import update_appointment_status
 
-scheduler = AsyncIOScheduler()
+SCHEDULER_DUE_KEY = "scheduler:due"
+SCHEDULER_LEASES_KEY = "scheduler:leases"
+SCHEDULER_ATTEMPTS_KEY = "scheduler:attempts"
+SCHEDULER_POLL_INTERVAL = float(os.getenv("SCHEDULER_POLL_INTERVAL") or 1)
+SCHEDULER_CLAIM_BATCH = int(os.getenv("SCHEDULER_CLAIM_BATCH") or 10)
+
+# KEYS: due, leases / ARGV: now, lease ms, token prefix, limit
+CLAIM_SCRIPT = """
+local names = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[4]))
+for _, name in ipairs(names) do
+    redis.call('ZADD', KEYS[1], tonumber(ARGV[1]) + tonumber(ARGV[2]), name)
+    redis.call('HSET', KEYS[2], name, ARGV[3] .. name)
+end
+return names
+"""
+
+# KEYS: due, leases / ARGV: name, token, score, release (1 drops the lease)
+LEASE_SCRIPT = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('ZADD', KEYS[1], tonumber(ARGV[3]), ARGV[1])
+if ARGV[4] == '1' then
+    redis.call('HDEL', KEYS[2], ARGV[1])
+end
+return 1
+"""
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+class ScheduledJob:
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[None]],
+        interval: timedelta,
+        lease: timedelta = timedelta(seconds=60),
+        max_retries: int = 3,
+        retry_backoff: timedelta = timedelta(seconds=5)
+    ):
+        self.name = name
+        self.func = timed_job(name, func)
+        self.interval_ms = int(interval.total_seconds() * 1000)
+        self.lease_ms = int(lease.total_seconds() * 1000)
+        self.max_retries = max_retries
+        self.retry_backoff_ms = int(retry_backoff.total_seconds() * 1000)
+
+    def retry_delay_ms(self, attempt: int) -> int:
+        return min(self.retry_backoff_ms * 2 ** (attempt - 1), self.interval_ms)
+
+class DistributedScheduler:
+    def __init__(self):
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self.token_prefix = f"{uuid.uuid4().hex}:"
+        self._loop_task: Optional[asyncio.Task] = None
+        self._running: Dict[str, asyncio.Task] = {}
+
+    def register(self, name: str, func: Callable[[], Awaitable[None]], interval: timedelta, **options) -> ScheduledJob:
+        job = ScheduledJob(name, func, interval, **options)
+        self.jobs[name] = job
+        return job
+
+    def start(self) -> None:
+        if self._loop_task is None:
+            self._loop_task = asyncio.create_task(self._run())
+
+    def shutdown(self, wait: bool = False) -> None:
+        # Running jobs are cancelled with the worker, their leases expire and another worker retries them
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            self._loop_task = None
+
+        if not wait:
+            for task in self._running.values():
+                task.cancel()
+
+    async def _run(self) -> None:
+        client = redis_client.redis_client
+        if client is None:
+            logger.error("[SCHEDULER] Redis is not initialised, jobs will not run")
+            return
+
+        claim = client.register_script(CLAIM_SCRIPT)
+        lease = client.register_script(LEASE_SCRIPT)
+
+        await self._ensure_scheduled(client)
+
+        while True:
+            try:
+                lease_ms = max(job.lease_ms for job in self.jobs.values()) if self.jobs else 60000
+                names: List[bytes] = await claim(
+                    keys=[SCHEDULER_DUE_KEY, SCHEDULER_LEASES_KEY],
+                    args=[_now_ms(), lease_ms, self.token_prefix, SCHEDULER_CLAIM_BATCH]
+                )
+
+                for raw_name in names:
+                    name = raw_name.decode() if isinstance(raw_name, bytes) else raw_name
+                    job = self.jobs.get(name)
+
+                    # Registered by another version of the app, its lease will hand it back
+                    if job is None or name in self._running:
+                        job_runs_skipped.inc(name)
+                        continue
+
+                    self._running[name] = asyncio.create_task(self._execute(client, lease, job))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[SCHEDULER] Error while claiming jobs: {e}")
+
+            await asyncio.sleep(SCHEDULER_POLL_INTERVAL)
+
+    async def _ensure_scheduled(self, client) -> None:
+        # NX keeps the schedule that is already in Redis, new jobs are due right away
+        now = _now_ms()
+        if self.jobs:
+            await client.zadd(SCHEDULER_DUE_KEY, {name: now for name in self.jobs}, nx=True)
+
+    async def _execute(self, client, lease, job: ScheduledJob) -> None:
+        token = self.token_prefix + job.name
+        keys = [SCHEDULER_DUE_KEY, SCHEDULER_LEASES_KEY]
+        run = asyncio.create_task(job.func())
+        heartbeat_every = job.lease_ms / 3000
+
+        try:
+            while not run.done():
+                await asyncio.wait({run}, timeout=heartbeat_every)
+                if run.done():
+                    break
+
+                if not await lease(keys=keys, args=[job.name, token, _now_ms() + job.lease_ms, 0]):
+                    logger.warning(f"[SCHEDULER] Lease lost for job: {job.name}, cancelling this run")
+                    run.cancel()
+                    return
+
+            error = run.exception()
+            if error is None:
+                await client.hdel(SCHEDULER_ATTEMPTS_KEY, job.name)
+                next_run = _now_ms() + job.interval_ms
+            else:
+                attempt = await client.hincrby(SCHEDULER_ATTEMPTS_KEY, job.name, 1)
+                logger.error(f"[SCHEDULER] Job: {job.name} failed, attempt {attempt}. Error: {error}")
+
+                if attempt <= job.max_retries:
+                    job_retries.inc(job.name)
+                    next_run = _now_ms() + job.retry_delay_ms(attempt)
+                else:
+                    await client.hdel(SCHEDULER_ATTEMPTS_KEY, job.name)
+                    next_run = _now_ms() + job.interval_ms
+
+            await lease(keys=keys, args=[job.name, token, next_run, 1])
+        except asyncio.CancelledError:
+            run.cancel()
+            raise
+        except Exception as e:
+            # Without a working heartbeat the lease runs out and another worker claims the job,
+            # so this run must stop here rather than carry on without an owner
+            run.cancel()
+            logger.error(f"[SCHEDULER] Error while running job: {job.name}, run cancelled. Error: {e}")
+        finally:
+            self._running.pop(job.name, None)
+
+scheduler = DistributedScheduler()
+
+# Registry
+scheduler.register("update_appointment_status", update_appointment_status, interval=timedelta(minutes=1))
 
 def start():
-    scheduler.add_job(update_appointment_status, "interval", minutes=1)
-    scheduler.start()
\ No newline at end of file
+    scheduler.start()
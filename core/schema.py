@@ -0,0 +1,153 @@
+"""
+Schema fingerprint check and explicit DDL command.
+
+Workers only compare the fingerprint of the declared models with the one stored
+in the database; creating tables and indexes is done on purpose with the commands
+below. sync only creates what is missing, so it refuses to stamp the fingerprint when
+existing tables differ from the models, those need a migration.
+
+    python -m core.schema sync
+    python -m core.schema check
+"""
+import argparse
+import asyncio
+import hashlib
+import sys
+from typing import List, Optional
+
+from sqlalchemy import text, inspect, MetaData
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from core.logger import logger
+
+SCHEMA_VERSION_TABLE = "schema_version"
+
+def _type_signature(column) -> str:
+    try:
+        return str(column.type.compile(dialect=postgresql.dialect()))
+    except Exception:
+        return repr(column.type)
+
+def compute_schema_fingerprint(metadata: MetaData) -> str:
+    parts = []
+
+    for table in sorted(metadata.tables.values(), key=lambda t: t.fullname):
+        parts.append(f"table:{table.fullname}")
+
+        for column in table.columns:
+            parts.append(
+                f"column:{column.name}:{_type_signature(column)}:"
+                f"{column.nullable}:{column.primary_key}:{column.unique}:{column.index}"
+            )
+
+        for fk in sorted(table.foreign_keys, key=lambda f: (f.parent.name, f.target_fullname)):
+            parts.append(f"fk:{fk.parent.name}:{fk.target_fullname}:{fk.ondelete}")
+
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            columns = ",".join(str(expr) for expr in index.expressions)
+            parts.append(f"index:{index.name}:{columns}:{index.unique}")
+
+        for constraint in sorted(table.constraints, key=lambda c: str(c.name or "")):
+            parts.append(f"constraint:{constraint.name}:{type(constraint).__name__}")
+
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+async def get_stored_fingerprint(engine: AsyncEngine) -> Optional[str]:
+    async with engine.connect() as conn:
+        exists = await conn.scalar(text("SELECT to_regclass(:table_name)"), {"table_name": SCHEMA_VERSION_TABLE})
+        if exists is None:
+            return None
+
+        return await conn.scalar(text(f"SELECT fingerprint FROM {SCHEMA_VERSION_TABLE} WHERE id = 1"))
+
+async def is_schema_current(engine: AsyncEngine, metadata: MetaData) -> bool:
+    return await get_stored_fingerprint(engine) == compute_schema_fingerprint(metadata)
+
+class SchemaDriftError(RuntimeError):
+    def __init__(self, differences: List[str]):
+        super().__init__("Existing tables differ from the models, a migration is needed: " + "; ".join(differences))
+        self.differences = differences
+
+def find_schema_differences(sync_conn, metadata: MetaData) -> List[str]:
+    """What create_all cannot fix: columns and indexes of existing tables that differ from the models."""
+    inspector = inspect(sync_conn)
+    differences = []
+
+    for table in sorted(metadata.tables.values(), key=lambda t: t.fullname):
+        if not inspector.has_table(table.name, schema=table.schema):
+            differences.append(f"{table.fullname}: missing")
+            continue
+
+        live_columns = {column["name"]: column for column in inspector.get_columns(table.name, schema=table.schema)}
+        for column in table.columns:
+            live = live_columns.pop(column.name, None)
+            if live is None:
+                differences.append(f"{table.fullname}.{column.name}: missing column")
+            elif live["nullable"] != column.nullable and not column.primary_key:
+                differences.append(f"{table.fullname}.{column.name}: nullable is {live['nullable']}, model says {column.nullable}")
+        for name in sorted(live_columns):
+            differences.append(f"{table.fullname}.{name}: column not in the model")
+
+        live_indexes = {index["name"] for index in inspector.get_indexes(table.name, schema=table.schema)}
+        for index in table.indexes:
+            if index.name and index.name not in live_indexes:
+                differences.append(f"{table.fullname}: missing index {index.name}")
+
+    return differences
+
+async def sync_schema(engine: AsyncEngine, metadata: MetaData) -> str:
+    fingerprint = compute_schema_fingerprint(metadata)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata.create_all)
+
+        # create_all never alters an existing table, only stamp the fingerprint when the live schema matches
+        differences = await conn.run_sync(find_schema_differences, metadata)
+        if differences:
+            raise SchemaDriftError(differences)
+
+        await conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {SCHEMA_VERSION_TABLE} ("
+            "id INTEGER PRIMARY KEY, "
+            "fingerprint VARCHAR(64) NOT NULL, "
+            "applied_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+        ))
+        await conn.execute(
+            text(
+                f"INSERT INTO {SCHEMA_VERSION_TABLE} (id, fingerprint, applied_at) VALUES (1, :fingerprint, now()) "
+                "ON CONFLICT (id) DO UPDATE SET fingerprint = EXCLUDED.fingerprint, applied_at = EXCLUDED.applied_at"
+            ),
+            {"fingerprint": fingerprint}
+        )
+
+    return fingerprint
+
+async def _run(command: str) -> int:
+    from core.database import async_engine
+    from models import Base
+
+    try:
+        if command == "sync":
+            try:
+                fingerprint = await sync_schema(async_engine, Base.metadata)
+            except SchemaDriftError as e:
+                for difference in e.differences:
+                    logger.error(f"[SCHEMA] {difference}")
+                logger.error("[SCHEMA] Not synced, existing tables differ from the models. Migrate them first")
+                return 1
+            logger.info(f"[SCHEMA] Schema synced. Fingerprint: {fingerprint}")
+            return 0
+
+        current = await is_schema_current(async_engine, Base.metadata)
+        logger.info(f"[SCHEMA] Schema is {'current' if current else 'out of date'}")
+        return 0 if current else 1
+    finally:
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["sync", "check"])
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(_run(args.command)))
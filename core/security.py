@@ -1,16 +1,16 @@
+import hashlib
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from typing import Optional, cast, Any
+from typing import Optional, cast, Any, Tuple
 
-from argon2.exceptions import InvalidHash
 from dotenv import load_dotenv
 import os
 
 from fastapi import HTTPException
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
-from passlib.exc import UnknownHashError
 from pydantic.v1 import EmailStr
 from starlette import status
 
@@ -19,22 +19,76 @@ from schema.auth.token import TokenPayload, EncodedTokenClaims
 
 load_dotenv()
 
-pwd_context = CryptContext(
-    schemes=["argon2"],
-    deprecated="auto"
-)
+_pwd_context = None
+
+def get_pwd_context():
+    # passlib/argon2 are only needed by login and register, load them on first use
+    global _pwd_context
+
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(
+            schemes=["argon2"],
+            deprecated="auto"
+        )
+    return _pwd_context
+
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE") or 10000)
+
+class VerifiedTokenCache:
+    """Bounded LRU of already verified token claims, keyed by token hash and dropped at 'exp'."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, Tuple[float, TokenPayload]] = OrderedDict()
+
+    @staticmethod
+    def key(token: str, secret_key: str) -> str:
+        return hashlib.sha256(f"{secret_key}:{token}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[TokenPayload]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, payload = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return payload
+
+    def set(self, key: str, expires_at: float, payload: TokenPayload) -> None:
+        if self.max_size <= 0:
+            return
+
+        self._entries[key] = (expires_at, payload)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+verified_token_cache = VerifiedTokenCache(TOKEN_CACHE_MAX_SIZE)
+
 # Hash Password
 async def hash_password(password: str) -> str:
     return cast(
         str,
-        await run_in_threadpool(pwd_context.hash, password)
+        await run_in_threadpool(get_pwd_context().hash, password)
     )
 
 async def verify_password(plain_password: str, hashed_password: str) -> None:
+    from argon2.exceptions import InvalidHash
+    from passlib.exc import UnknownHashError
+
     try:
-        ok = await run_in_threadpool(pwd_context.verify, plain_password, hashed_password)
+        ok = await run_in_threadpool(get_pwd_context().verify, plain_password, hashed_password)
     except (UnknownHashError, InvalidHash, ValueError, TypeError) as e:
         logger.error(f"Password verify failed: {e}")
         raise HTTPException(
@@ -81,6 +135,12 @@ async def create_token(
 
 # Decode JWT token
 async def decode_token(token: str, secret_key: str) -> Optional[TokenPayload]:
+    cache_key = VerifiedTokenCache.key(token, secret_key)
+    cached = verified_token_cache.get(cache_key)
+
+    if cached is not None:
+        return cached
+
     try:
         algorithm = os.getenv("ALGORITHM") or "HS256"
 
@@ -88,7 +148,7 @@ async def decode_token(token: str, secret_key: str) -> Optional[TokenPayload]:
 
         claims = cast(EncodedTokenClaims, raw)
 
-        return TokenPayload(
+        payload = TokenPayload(
             id=claims["id"],
             username=claims["sub"],
             fullname=claims["fullname"],
@@ -96,6 +156,12 @@ async def decode_token(token: str, secret_key: str) -> Optional[TokenPayload]:
             role=claims["role"]
         )
 
+        expires_at = raw.get("exp")
+        if isinstance(expires_at, (int, float)):
+            verified_token_cache.set(cache_key, float(expires_at), payload)
+
+        return payload
+
     except JWTError as e:
         logger.error(f"Token could not be decoded. Error: {e}")
         return None
\ No newline at end of file
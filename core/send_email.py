@@ -1,24 +1,270 @@
-import httpx
+"""
+Email outbox. Requests add a row to email_outbox in their own transaction with
+queue_email, and every worker runs run_email_sender, which delivers the pending rows
+through the shared HTTP client.
+
+Rows are claimed with FOR UPDATE SKIP LOCKED, so two workers never send the same email.
+Up to EMAIL_BATCH_SIZE claimed emails go out in one call to the provider's batch
+endpoint, with at most EMAIL_SEND_CONCURRENCY calls in flight. Timeouts, 429 and 5xx
+answers are retried with exponential backoff up to EMAIL_MAX_ATTEMPTS. A batch
+rejected with another 4xx is sent again one email at a time, so that only the bad
+address fails.
+
+Every call carries an Idempotency-Key derived from the outbox ids, so an email the
+provider accepted before the client timed out is not delivered again by the retry.
+The rows of a batch that failed with a retryable error keep its key in batch_key and
+are claimed and sent again as the same batch.
+
+RESEND_API_URL can point at a local stand-in, see benchmarks/email_stub.py.
+"""
+import asyncio
+import hashlib
 import os
+from datetime import timedelta
+from itertools import groupby
+from typing import Any, Dict, List, Optional
+
+import httpx
+from sqlalchemy import select, update, func, event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from core.database import async_session_factory
+from core.http_client import get_http_client
+from core.logger import logger
+from core.metrics import emails_sent
+from models import EmailOutbox
 
 RESEND_API_KEY = os.getenv("RESEND_API_KEY")
+RESEND_API_URL = (os.getenv("RESEND_API_URL") or "https://api.resend.com").rstrip("/")
 FROM_EMAIL = os.getenv("RESEND_FROM_EMAIL")
 
-async def send_verification_email(to_email: str, verify_link: str):
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://api.resend.com/emails",
-            headers={"Authorization": f"Bearer {RESEND_API_KEY}"},
-            json={
-                "from": f"ScrollBooker <{FROM_EMAIL}>",
-                "to": [to_email],
-                "subject": "Verifica-ti adresa de email",
-                "html": f"""
-                <h2>Bun venit pe ScrollBooker.</h2>
-                <p>Da click mai jos pentru a-ti valida adresa de email</p>
-                <a href="{verify_link}">Confirma emailul</a>
-                <p>Daca nu ai creat acest cont, ignora acest email.</p>    
-                """
-            }
+EMAIL_BATCH_ENDPOINT = (os.getenv("EMAIL_BATCH_ENDPOINT") or "true").lower() in ("1", "true", "yes", "on")
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE") or 100)
+EMAIL_SEND_CONCURRENCY = int(os.getenv("EMAIL_SEND_CONCURRENCY") or 4)
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS") or 8)
+EMAIL_RETRY_BASE_DELAY = int(os.getenv("EMAIL_RETRY_BASE_DELAY") or 10)
+EMAIL_RETRY_MAX_DELAY = int(os.getenv("EMAIL_RETRY_MAX_DELAY") or 3600)
+EMAIL_CLAIM_LEASE = int(os.getenv("EMAIL_CLAIM_LEASE") or 120)
+EMAIL_POLL_INTERVAL = float(os.getenv("EMAIL_POLL_INTERVAL") or 2)
+
+_sender_wakeup = asyncio.Event()
+
+class EmailDeliveryError(Exception):
+    def __init__(self, message: str, retryable: bool):
+        super().__init__(message)
+        self.retryable = retryable
+
+# Queue
+def queue_email(db: AsyncSession, to_emails: List[str], subject: str, html: str) -> None:
+    db.add(EmailOutbox(to_emails=to_emails, subject=subject, html=html))
+    db.info["email_pending"] = True
+
+def queue_verification_email(db: AsyncSession, to_email: str, verify_link: str) -> None:
+    queue_email(
+        db,
+        to_emails=[to_email],
+        subject="Verifica-ti adresa de email",
+        html=f"""
+        <h2>Bun venit pe ScrollBooker.</h2>
+        <p>Da click mai jos pentru a-ti valida adresa de email</p>
+        <a href="{verify_link}">Confirma emailul</a>
+        <p>Daca nu ai creat acest cont, ignora acest email.</p>
+        """
+    )
+
+@event.listens_for(Session, "after_commit")
+def _wake_sender(session: Session):
+    if session.info.pop("email_pending", False):
+        _sender_wakeup.set()
+
+@event.listens_for(Session, "after_rollback")
+def _forget_pending(session: Session):
+    session.info.pop("email_pending", None)
+
+# Delivery
+def _payload(email: EmailOutbox) -> Dict[str, Any]:
+    return {
+        "from": f"ScrollBooker <{FROM_EMAIL}>",
+        "to": email.to_emails,
+        "subject": email.subject,
+        "html": email.html,
+    }
+
+def _idempotency_key(emails: List[EmailOutbox]) -> str:
+    if len(emails) == 1:
+        return f"email-{emails[0].id}"
+    if emails[0].batch_key:
+        return emails[0].batch_key
+
+    ids = ",".join(str(email.id) for email in sorted(emails, key=lambda email: email.id))
+    return f"batch-{hashlib.sha1(ids.encode()).hexdigest()}"
+
+async def _post(path: str, json: Any, idempotency_key: str) -> Any:
+    try:
+        response = await get_http_client().post(
+            f"{RESEND_API_URL}{path}",
+            headers={"Authorization": f"Bearer {RESEND_API_KEY}", "Idempotency-Key": idempotency_key},
+            json=json
+        )
+    except httpx.HTTPError as e:
+        raise EmailDeliveryError(f"{type(e).__name__}: {e}", retryable=True)
+
+    if response.status_code == 429 or response.status_code >= 500:
+        raise EmailDeliveryError(f"{response.status_code}: {response.text[:300]}", retryable=True)
+    if response.status_code >= 400:
+        raise EmailDeliveryError(f"{response.status_code}: {response.text[:300]}", retryable=False)
+    return response.json()
+
+async def _send_one(email: EmailOutbox) -> Optional[str]:
+    body = await _post("/emails", _payload(email), _idempotency_key([email]))
+    return body.get("id") if isinstance(body, dict) else None
+
+async def _send_batch(emails: List[EmailOutbox], idempotency_key: str) -> List[Optional[str]]:
+    body = await _post("/emails/batch", [_payload(email) for email in emails], idempotency_key)
+    data = body.get("data", []) if isinstance(body, dict) else []
+    ids = [item.get("id") for item in data]
+    return ids + [None] * (len(emails) - len(ids))
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(EMAIL_RETRY_BASE_DELAY * 2 ** (attempts - 1), EMAIL_RETRY_MAX_DELAY))
+
+async def _mark_sent(db: AsyncSession, email: EmailOutbox, provider_id: Optional[str]) -> None:
+    await db.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id == email.id)
+        .values(sent_at=func.now(), provider_id=provider_id, attempts=EmailOutbox.attempts + 1, last_error=None)
+    )
+    emails_sent.inc("sent")
+
+async def _mark_failed(db: AsyncSession, email: EmailOutbox, error: EmailDeliveryError,
+                       batch_key: Optional[str] = None) -> None:
+    attempts = email.attempts + 1
+    values: Dict[str, Any] = {"attempts": attempts, "last_error": str(error)[:500]}
+
+    if error.retryable and attempts < EMAIL_MAX_ATTEMPTS:
+        values["next_attempt_at"] = func.now() + _retry_delay(attempts)
+        values["batch_key"] = batch_key
+        emails_sent.inc("retry")
+    else:
+        values["failed_at"] = func.now()
+        emails_sent.inc("failed")
+        logger.error(f"[EMAIL] Email id: {email.id} to: {email.to_emails} failed after {attempts} attempts. Error: {error}")
+
+    await db.execute(update(EmailOutbox).where(EmailOutbox.id == email.id).values(**values))
+
+async def _deliver(emails: List[EmailOutbox], semaphore: asyncio.Semaphore) -> None:
+    results: List[tuple] = []
+    batch_key: Optional[str] = None
+
+    async def send_singly(email: EmailOutbox) -> None:
+        try:
+            results.append((email, await _send_one(email), None))
+        except EmailDeliveryError as e:
+            results.append((email, None, e))
+
+    async with semaphore:
+        if EMAIL_BATCH_ENDPOINT and len(emails) > 1:
+            key = _idempotency_key(emails)
+            try:
+                for email, provider_id in zip(emails, await _send_batch(emails, key)):
+                    results.append((email, provider_id, None))
+            except EmailDeliveryError as e:
+                if e.retryable:
+                    # The provider may have taken it, only the same batch under the same key is safe to send again
+                    batch_key = key
+                    results.extend((email, None, e) for email in emails)
+                else:
+                    # One bad address rejects the whole batch, find it
+                    for email in emails:
+                        await send_singly(email)
+        else:
+            for email in emails:
+                await send_singly(email)
+
+    async with async_session_factory() as db:
+        async with db.begin():
+            for email, provider_id, error in results:
+                if error is None:
+                    await _mark_sent(db, email, provider_id)
+                else:
+                    await _mark_failed(db, email, error, batch_key)
+
+async def _claim(limit: int) -> List[EmailOutbox]:
+    pending = (
+        select(EmailOutbox.id)
+        .where(
+            EmailOutbox.sent_at.is_(None),
+            EmailOutbox.failed_at.is_(None),
+            EmailOutbox.next_attempt_at <= func.now()
         )
-        response.raise_for_status()
\ No newline at end of file
+        .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+
+    # Pushing next_attempt_at past the lease hides the rows from the other senders while they go out
+    async with async_session_factory() as db:
+        async with db.begin():
+            claimed = (await db.execute(pending.add_columns(EmailOutbox.batch_key))).all()
+            ids = [row.id for row in claimed]
+
+            # The rest of a retried batch cut off by the limit, so that it goes out whole again
+            batch_keys = {row.batch_key for row in claimed if row.batch_key}
+            if batch_keys:
+                rest = await db.execute(
+                    select(EmailOutbox.id)
+                    .where(
+                        EmailOutbox.batch_key.in_(batch_keys),
+                        EmailOutbox.id.not_in(ids),
+                        EmailOutbox.sent_at.is_(None),
+                        EmailOutbox.failed_at.is_(None)
+                    )
+                    .with_for_update(skip_locked=True)
+                )
+                ids.extend(rest.scalars().all())
+
+            result = await db.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id.in_(ids))
+                .values(next_attempt_at=func.now() + timedelta(seconds=EMAIL_CLAIM_LEASE))
+                .returning(EmailOutbox)
+                .execution_options(synchronize_session=False)
+            )
+            return list(result.scalars().all())
+
+def _batch_size() -> int:
+    return EMAIL_BATCH_SIZE if EMAIL_BATCH_ENDPOINT else 1
+
+async def send_pending_emails() -> int:
+    batch_size = _batch_size()
+    emails = await _claim(batch_size * EMAIL_SEND_CONCURRENCY)
+    if not emails:
+        return 0
+
+    semaphore = asyncio.Semaphore(EMAIL_SEND_CONCURRENCY)
+
+    # Retried batches go out as they were first sent, the new emails are batched together
+    retried = sorted((email for email in emails if email.batch_key), key=lambda email: (email.batch_key, email.id))
+    batches = [list(group) for _key, group in groupby(retried, key=lambda email: email.batch_key)]
+    fresh = [email for email in emails if not email.batch_key]
+    batches.extend(fresh[index:index + batch_size] for index in range(0, len(fresh), batch_size))
+    await asyncio.gather(*(_deliver(batch, semaphore) for batch in batches))
+    return len(emails)
+
+async def run_email_sender() -> None:
+    while True:
+        try:
+            # A full claim means there is more waiting
+            if await send_pending_emails() == _batch_size() * EMAIL_SEND_CONCURRENCY:
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"[EMAIL] Sender error: {e}")
+
+        try:
+            await asyncio.wait_for(_sender_wakeup.wait(), timeout=EMAIL_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _sender_wakeup.clear()
@@ -0,0 +1,287 @@
+"""
+Background tasks for the side effects of a request: notifications, counters, ratings.
+
+    @task("social.update_post_counter")
+    async def apply_post_counter(db: AsyncSession, post_id: int, column: str, delta: int) -> None: ...
+
+    apply_post_counter.enqueue(db, post_id=post_id, column="like_count", delta=1)
+
+enqueue adds a row to outbox_tasks in the caller's session, so the task is committed
+or rolled back together with the request. After the commit, a relay in every worker
+moves pending rows to the TASK_STREAM_KEY Redis stream. Consumers read the stream
+through a consumer group and run the handler in a transaction that also deletes the
+outbox row. A message delivered twice finds no row and is skipped, so each task is
+applied once.
+
+A failed task is retried with exponential backoff through the TASK_DELAYED_KEY sorted
+set. After max_attempts the row is kept with failed_at set and the task is copied to
+TASK_DEAD_LETTER_KEY. To replay it, clear failed_at and dispatched_at.
+Messages left pending by a dead consumer are claimed by another one after
+TASK_CLAIM_IDLE. Rows dispatched but never applied, for example after the stream was
+trimmed or lost, are sent again after TASK_REDISPATCH_AFTER.
+"""
+import asyncio
+import os
+import socket
+import time
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import select, update, delete, func, or_, event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from core import redis_client
+from core.cache import flush_invalidations
+from core.database import async_session_factory
+from core.logger import logger
+from core.metrics import tasks_processed
+from models import OutboxTask
+
+TASK_STREAM_KEY = "tasks:stream"
+TASK_DELAYED_KEY = "tasks:delayed"
+TASK_DEAD_LETTER_KEY = "tasks:dead"
+TASK_GROUP = "tasks"
+
+TASK_WORKER_CONCURRENCY = int(os.getenv("TASK_WORKER_CONCURRENCY") or 4)
+TASK_MAX_ATTEMPTS = int(os.getenv("TASK_MAX_ATTEMPTS") or 5)
+TASK_RETRY_BASE_DELAY = float(os.getenv("TASK_RETRY_BASE_DELAY") or 2)
+TASK_RETRY_MAX_DELAY = float(os.getenv("TASK_RETRY_MAX_DELAY") or 300)
+TASK_RELAY_INTERVAL = float(os.getenv("TASK_RELAY_INTERVAL") or 0.5)
+TASK_RELAY_BATCH = int(os.getenv("TASK_RELAY_BATCH") or 200)
+TASK_CLAIM_IDLE = int(os.getenv("TASK_CLAIM_IDLE") or 60)
+TASK_REDISPATCH_AFTER = int(os.getenv("TASK_REDISPATCH_AFTER") or 900)
+TASK_STREAM_MAXLEN = int(os.getenv("TASK_STREAM_MAXLEN") or 100000)
+TASK_READ_BLOCK_MS = 2000
+
+# KEYS: delayed, stream / ARGV: now, limit, maxlen
+PROMOTE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+for _, member in ipairs(due) do
+    local sep = string.find(member, ':', 1, true)
+    redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[3], '*',
+        'id', string.sub(member, 1, sep - 1), 'name', string.sub(member, sep + 1))
+    redis.call('ZREM', KEYS[1], member)
+end
+return #due
+"""
+
+TaskHandler = Callable[..., Awaitable[None]]
+
+class Task:
+    def __init__(self, name: str, func: TaskHandler, max_attempts: int):
+        self.name = name
+        self.func = func
+        self.max_attempts = max_attempts
+
+    def retry_delay(self, attempt: int) -> float:
+        return min(TASK_RETRY_BASE_DELAY * 2 ** (attempt - 1), TASK_RETRY_MAX_DELAY)
+
+TASKS: Dict[str, Task] = {}
+
+_relay_wakeup = asyncio.Event()
+
+def task(name: str, max_attempts: int = TASK_MAX_ATTEMPTS):
+    def decorator(func: TaskHandler):
+        TASKS[name] = Task(name, func, max_attempts)
+
+        def enqueue(db: AsyncSession, **payload: Any) -> None:
+            enqueue_task(db, name, **payload)
+
+        func.enqueue = enqueue
+        return func
+    return decorator
+
+def enqueue_task(db: AsyncSession, name: str, **payload: Any) -> None:
+    db.add(OutboxTask(name=name, payload=payload))
+    db.info["outbox_pending"] = True
+
+@event.listens_for(Session, "after_commit")
+def _wake_relay(session: Session):
+    if session.info.pop("outbox_pending", False):
+        _relay_wakeup.set()
+
+@event.listens_for(Session, "after_rollback")
+def _forget_pending(session: Session):
+    session.info.pop("outbox_pending", None)
+
+# Relay
+async def _relay_outbox(client) -> int:
+    stale = func.now() - timedelta(seconds=TASK_REDISPATCH_AFTER)
+    pending = (
+        select(OutboxTask.id)
+        .where(
+            OutboxTask.failed_at.is_(None),
+            or_(OutboxTask.dispatched_at.is_(None), OutboxTask.dispatched_at < stale)
+        )
+        .order_by(OutboxTask.id)
+        .limit(TASK_RELAY_BATCH)
+        .with_for_update(skip_locked=True)
+    )
+
+    async with async_session_factory() as db:
+        async with db.begin():
+            result = await db.execute(
+                update(OutboxTask)
+                .where(OutboxTask.id.in_(pending))
+                .values(dispatched_at=func.now())
+                .returning(OutboxTask.id, OutboxTask.name)
+                .execution_options(synchronize_session=False)
+            )
+            rows = result.all()
+
+            # The rows stay pending if Redis does not take them
+            if rows:
+                pipe = client.pipeline(transaction=False)
+                for row in rows:
+                    pipe.xadd(TASK_STREAM_KEY, {"id": row.id, "name": row.name},
+                              maxlen=TASK_STREAM_MAXLEN, approximate=True)
+                await pipe.execute()
+
+    return len(rows)
+
+async def _run_relay(client) -> None:
+    promote = client.register_script(PROMOTE_SCRIPT)
+
+    while True:
+        try:
+            await promote(keys=[TASK_DELAYED_KEY, TASK_STREAM_KEY],
+                          args=[time.time(), TASK_RELAY_BATCH, TASK_STREAM_MAXLEN])
+
+            # A full batch means there is more waiting
+            if await _relay_outbox(client) == TASK_RELAY_BATCH:
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"[TASKS] Outbox relay error: {e}")
+
+        try:
+            await asyncio.wait_for(_relay_wakeup.wait(), timeout=TASK_RELAY_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _relay_wakeup.clear()
+
+# Consumers
+async def _apply(task_id: int, name: str) -> str:
+    handler = TASKS.get(name)
+
+    async with async_session_factory() as db:
+        async with db.begin():
+            result = await db.execute(
+                delete(OutboxTask)
+                .where(OutboxTask.id == task_id, OutboxTask.failed_at.is_(None))
+                .returning(OutboxTask.payload)
+            )
+            payload = result.scalar_one_or_none()
+
+            if payload is None:
+                return "duplicate"
+            if handler is None:
+                raise LookupError(f"No handler registered for task: {name}")
+
+            await handler.func(db, **payload)
+
+        # After the commit, a read in between would cache the old values again
+        await flush_invalidations(db)
+        return "success"
+
+async def _fail(client, task_id: int, name: str, error: Exception) -> None:
+    handler = TASKS.get(name)
+    max_attempts = handler.max_attempts if handler is not None else TASK_MAX_ATTEMPTS
+
+    async with async_session_factory() as db:
+        async with db.begin():
+            result = await db.execute(
+                update(OutboxTask)
+                .where(OutboxTask.id == task_id)
+                .values(attempts=OutboxTask.attempts + 1, last_error=str(error)[:500], dispatched_at=func.now())
+                .returning(OutboxTask.attempts)
+            )
+            attempts: Optional[int] = result.scalar_one_or_none()
+            if attempts is None:
+                return
+
+            if attempts >= max_attempts:
+                await db.execute(update(OutboxTask).where(OutboxTask.id == task_id).values(failed_at=func.now()))
+                await client.xadd(TASK_DEAD_LETTER_KEY, {"id": task_id, "name": name, "error": str(error)[:500]},
+                                  maxlen=TASK_STREAM_MAXLEN, approximate=True)
+                tasks_processed.inc(name, "dead")
+                logger.error(f"[TASKS] Task: {name} id: {task_id} dead lettered after {attempts} attempts. Error: {error}")
+                return
+
+            delay = handler.retry_delay(attempts) if handler is not None else TASK_RETRY_MAX_DELAY
+            await client.zadd(TASK_DELAYED_KEY, {f"{task_id}:{name}": time.time() + delay})
+            tasks_processed.inc(name, "retry")
+            logger.warning(f"[TASKS] Task: {name} id: {task_id} failed, attempt {attempts}, retry in {delay}s. Error: {error}")
+
+async def _handle(client, message_id: bytes, fields: Dict[bytes, bytes]) -> None:
+    task_id = int(fields[b"id"])
+    name = fields[b"name"].decode()
+
+    try:
+        tasks_processed.inc(name, await _apply(task_id, name))
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        # Not acknowledged if this fails too, the message is claimed again later
+        await _fail(client, task_id, name, e)
+
+    await client.xack(TASK_STREAM_KEY, TASK_GROUP, message_id)
+
+async def _run_consumer(client, consumer: str) -> None:
+    last_claim = 0.0
+
+    while True:
+        try:
+            messages = []
+
+            if time.monotonic() - last_claim > TASK_CLAIM_IDLE / 2:
+                last_claim = time.monotonic()
+                claimed = await client.xautoclaim(TASK_STREAM_KEY, TASK_GROUP, consumer,
+                                                  min_idle_time=TASK_CLAIM_IDLE * 1000, count=10)
+                messages.extend(claimed[1])
+
+            if not messages:
+                entries = await client.xreadgroup(TASK_GROUP, consumer, {TASK_STREAM_KEY: ">"},
+                                                  count=10, block=TASK_READ_BLOCK_MS)
+                for _stream, stream_messages in entries or []:
+                    messages.extend(stream_messages)
+
+            for message_id, fields in messages:
+                # Trimmed while pending, the outbox row sends it again
+                if not fields:
+                    await client.xack(TASK_STREAM_KEY, TASK_GROUP, message_id)
+                    continue
+                try:
+                    await _handle(client, message_id, fields)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"[TASKS] Could not settle message: {message_id}. Error: {e}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"[TASKS] Consumer: {consumer} error: {e}")
+            await asyncio.sleep(1)
+
+async def _ensure_group(client) -> None:
+    try:
+        await client.xgroup_create(TASK_STREAM_KEY, TASK_GROUP, id="0", mkstream=True)
+    except Exception as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+async def run_task_workers() -> None:
+    client = redis_client.redis_client
+    if client is None:
+        logger.error("[TASKS] Redis is not initialised, background tasks will stay in the outbox")
+        return
+
+    await _ensure_group(client)
+    consumer_prefix = f"{socket.gethostname()}-{os.getpid()}"
+
+    await asyncio.gather(
+        _run_relay(client),
+        *(_run_consumer(client, f"{consumer_prefix}-{index}") for index in range(TASK_WORKER_CONCURRENCY))
+    )
@@ -1,8 +1,13 @@
+import os
+import time
+import asyncio
 import httpx
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from core.database import async_engine
-from core.dependencies import UserSession
+from core.schema import is_schema_current, sync_schema, SchemaDriftError
+from core.geo import preload_timezone_finder
+from core.dependencies import UserSession, InternalSession
 from core.middlewares.cors_middleware import CORSCustomMiddleware
 from core.redis_client import init_redis, close_redis
 from core.logger import logger
@@ -13,37 +18,100 @@ from api.v1.endpoints.auth import auth
 from api.v1.endpoints.onboarding import onboarding
 from api.v1.endpoints.social import follow, hashtag, post, bookmark_posts,repost, like, comment
 from api.v1.endpoints.booking import business, product, appointment, schedule, review, employment_request
-from api.v1.endpoints.nomenclature import business_domain, business_type, service, filter, sub_filter, service_domain, profession, currency, problem
+from api.v1.endpoints.nomenclature import business_domain, business_type, service, filter, sub_filter, service_domain, profession, currency, problem, tree
 from api.v1.endpoints.integration import google
+from api.v1.endpoints.health import health, metrics
 from core.middlewares.auth_middleware import AuthMiddleware
+from core.middlewares.metrics_middleware import MetricsMiddleware
+from core.middlewares.compression_middleware import CompressionMiddleware
 from core.exceptions import register_exception_handler
 from core.scheduler import start as start_scheduler, scheduler
+from core.tasks import run_task_workers
+from core.send_email import run_email_sender
 from core import http_client
+from core.metrics import run_snapshot_writer, write_snapshot
+from service.nomenclature.snapshot import load_nomenclature_snapshot, run_nomenclature_listener
+
+SCHEMA_AUTO_SYNC = os.getenv("DB_SCHEMA_AUTO_SYNC", "false").lower() in ("1", "true", "yes", "on")
+TIMEZONE_FINDER_PRELOAD = os.getenv("TIMEZONE_FINDER_PRELOAD", "true").lower() in ("1", "true", "yes", "on")
+
+def log_phase(name: str, started: float):
+    logger.info(f"[STARTUP] {name} ready in {round((time.perf_counter() - started) * 1000, 2)} ms")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # DB Session
-    async with async_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-
-    # Scheduler
-    start_scheduler()
+    startup_started = time.perf_counter()
+
+    # DB Schema
+    phase_started = time.perf_counter()
+    if not await is_schema_current(async_engine, Base.metadata):
+        if SCHEMA_AUTO_SYNC:
+            try:
+                await sync_schema(async_engine, Base.metadata)
+                logger.info("[DB] Schema synced")
+            except SchemaDriftError as e:
+                logger.error(f"[DB] Schema not synced. {e}")
+        else:
+            logger.warning("[DB] Schema fingerprint does not match the models. Run 'python -m core.schema sync'")
+    log_phase("DB", phase_started)
 
     # Redis
+    phase_started = time.perf_counter()
     await init_redis()
     logger.info("[REDIS] Connected Successfully")
+    log_phase("Redis", phase_started)
+
+    # Scheduler, jobs are claimed through Redis so only one worker runs each of them
+    phase_started = time.perf_counter()
+    start_scheduler()
+    log_phase("Scheduler", phase_started)
+
+    # Background tasks, relayed from the outbox table to the Redis stream and consumed here
+    task_workers = asyncio.create_task(run_task_workers())
 
     # HTTP Client
+    phase_started = time.perf_counter()
     http_client.async_client = httpx.AsyncClient(
         timeout=httpx.Timeout(5.0, read=5.0, connect=3.0),
         limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
         headers={"Accept": "application/json"}
     )
     logger.info("[HTTP_CLIENT] Connected Successfully")
+    log_phase("HTTP Client", phase_started)
+
+    # Email outbox, delivered on the shared HTTP client
+    email_sender = asyncio.create_task(run_email_sender())
+
+    # Nomenclature snapshot, kept fresh by the version bumps published on Redis
+    phase_started = time.perf_counter()
+    try:
+        await load_nomenclature_snapshot()
+    except Exception as e:
+        logger.error(f"[NOMENCLATURE] Snapshot not loaded at startup, it will load on first use. Error: {e}")
+    nomenclature_listener = asyncio.create_task(run_nomenclature_listener())
+    log_phase("Nomenclature", phase_started)
+
+    # Timezone Finder, loaded in the background so it does not delay startup
+    timezone_preload = asyncio.create_task(preload_timezone_finder()) if TIMEZONE_FINDER_PRELOAD else None
+
+    # Metrics snapshots shared with the other workers
+    metrics_writer = asyncio.create_task(run_snapshot_writer())
+
+    log_phase("Application", startup_started)
 
     try:
         yield
     finally:
+        if timezone_preload is not None and not timezone_preload.done():
+            timezone_preload.cancel()
+
+        scheduler.shutdown(wait=False)
+        task_workers.cancel()
+        email_sender.cancel()
+        nomenclature_listener.cancel()
+        metrics_writer.cancel()
+        write_snapshot()
+
         if http_client.async_client is not None:
             await http_client.async_client.aclose()
             http_client.async_client = None
@@ -52,16 +120,20 @@ async def lifespan(app: FastAPI):
         await close_redis()
         logger.info("[REDIS] Connection closed")
 
-        scheduler.shutdown(wait=False)
-
 app = FastAPI(lifespan=lifespan, root_path="/api/v1")
 
 app.add_middleware(AuthMiddleware) #type: ignore
 app.add_middleware(CORSCustomMiddleware) #type: ignore
+app.add_middleware(CompressionMiddleware) #type: ignore
+app.add_middleware(MetricsMiddleware) #type: ignore
 
 # Error exception handler
 register_exception_handler(app)
 
+# Health
+app.include_router(health.router, dependencies=[InternalSession])
+app.include_router(metrics.router, dependencies=[InternalSession])
+
 # Auth
 app.include_router(auth.router)
 
@@ -90,6 +162,7 @@ app.include_router(filter.router, dependencies=[UserSession])
 app.include_router(sub_filter.router, dependencies=[UserSession])
 app.include_router(service.router, dependencies=[UserSession])
 app.include_router(service_domain.router, dependencies=[UserSession])
+app.include_router(tree.router, dependencies=[UserSession])
 app.include_router(business.router, dependencies=[UserSession])
 app.include_router(product.router, dependencies=[UserSession])
 app.include_router(appointment.router, dependencies=[UserSession])
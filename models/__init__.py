@@ -53,4 +53,8 @@ from models.user.role_permissions import role_permissions
 from models.user.user_counters import UserCounters
 from models.nomenclature.consent import Consent
 from models.user.notification import Notification
-from models.user.user_currency import UserCurrency
\ No newline at end of file
+from models.user.user_currency import UserCurrency
+
+# TASKS
+from models.tasks.outbox_task import OutboxTask
+from models.tasks.email_outbox import EmailOutbox
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, BigInteger, Integer, String, Text, TIMESTAMP, func, Index
+from sqlalchemy.dialects.postgresql import JSONB
+
+from models import Base
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(BigInteger, primary_key=True)
+    to_emails = Column(JSONB, nullable=False)
+    subject = Column(String(255), nullable=False)
+    html = Column(Text, nullable=False)
+
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(String(500), nullable=True)
+    provider_id = Column(String(100), nullable=True)
+    # Set when a batch failed with a retryable error, the rows are sent again together
+    batch_key = Column(String(64), nullable=True)
+
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    next_attempt_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    sent_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    failed_at = Column(TIMESTAMP(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("idx_email_outbox_pending", "next_attempt_at", "id",
+              postgresql_where=sent_at.is_(None) & failed_at.is_(None)),
+    )
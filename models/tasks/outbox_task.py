@@ -0,0 +1,22 @@
+from sqlalchemy import Column, BigInteger, Integer, String, TIMESTAMP, func, Index
+from sqlalchemy.dialects.postgresql import JSONB
+
+from models import Base
+
+class OutboxTask(Base):
+    __tablename__ = "outbox_tasks"
+
+    id = Column(BigInteger, primary_key=True)
+    name = Column(String(100), nullable=False)
+    payload = Column(JSONB, nullable=False, default=dict)
+
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(String(500), nullable=True)
+
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    dispatched_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    failed_at = Column(TIMESTAMP(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("idx_outbox_tasks_pending", "dispatched_at", "id", postgresql_where=failed_at.is_(None)),
+    )
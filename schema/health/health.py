@@ -0,0 +1,21 @@
+from typing import Optional
+from pydantic import BaseModel
+
+class DBPoolStatusResponse(BaseModel):
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    max_overflow: int
+    timeout_s: int
+    checkouts: int = 0
+    wait_avg_ms: float = 0.0
+    wait_max_ms: float = 0.0
+    timeouts: int = 0
+    overflow_events: int = 0
+
+class DBHealthResponse(BaseModel):
+    status: str
+    latency_ms: Optional[float] = None
+    pool: DBPoolStatusResponse
+    read_pool: Optional[DBPoolStatusResponse] = None
@@ -30,3 +30,6 @@ class SubFilterLoadOnly(BaseModel):
 
 class FilterWithSubFiltersResponse(FilterResponse):
     sub_filters: Optional[List[SubFilterLoadOnly]] = []
+
+class FilterIdsUpdate(BaseModel):
+    filter_ids: List[int] = Field(min_length=1, max_length=500)
@@ -30,4 +30,7 @@ class BusinessTypeLoadOnly(BaseModel):
         from_attributes = True
 
 class ProfessionWithBusinessTypesResponse(ProfessionResponse):
-    business_types: Optional[List[BusinessTypeLoadOnly]] = []
\ No newline at end of file
+    business_types: Optional[List[BusinessTypeLoadOnly]] = []
+
+class ProfessionIdsUpdate(BaseModel):
+    profession_ids: List[int] = Field(min_length=1, max_length=500)
@@ -0,0 +1,66 @@
+from typing import Optional, List
+
+from pydantic import BaseModel
+
+class TreeSubFilter(BaseModel):
+    id: int
+    name: str
+    active: bool
+
+    class Config:
+        from_attributes = True
+
+class TreeFilter(BaseModel):
+    id: int
+    name: str
+    active: bool
+    sub_filters: List[TreeSubFilter] = []
+
+    class Config:
+        from_attributes = True
+
+class TreeService(BaseModel):
+    id: int
+    name: str
+    order_index: int
+    service_domain_id: Optional[int] = None
+    keywords: Optional[List[str]] = None
+    active: Optional[bool] = None
+    filters: List[TreeFilter] = []
+
+    class Config:
+        from_attributes = True
+
+class TreeProfession(BaseModel):
+    id: int
+    name: str
+    active: bool
+
+    class Config:
+        from_attributes = True
+
+class TreeBusinessType(BaseModel):
+    id: int
+    name: str
+    plural: Optional[str] = None
+    has_employees: Optional[bool] = None
+    active: bool
+    services: List[TreeService] = []
+    filters: List[TreeFilter] = []
+    professions: List[TreeProfession] = []
+
+    class Config:
+        from_attributes = True
+
+class TreeBusinessDomain(BaseModel):
+    id: int
+    name: str
+    short_name: str
+    active: bool
+    business_types: List[TreeBusinessType] = []
+
+    class Config:
+        from_attributes = True
+
+class NomenclatureTreeResponse(BaseModel):
+    business_domains: List[TreeBusinessDomain]
@@ -85,7 +85,7 @@ async def register_user(
         # base_url = os.getenv("APP_BASE_URL")
         # link = f"{base_url}/verify-email/token={token}"
         #
-        # await send_verification_email(to_email=str(user_register.email), verify_link=link)
+        # queue_verification_email(db, to_email=str(user_register.email), verify_link=link)
 
         await db.refresh(new_user)
 
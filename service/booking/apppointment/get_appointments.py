@@ -20,7 +20,7 @@ from schema.booking.appointment import AppointmentBusiness, \
 from core.dependencies import DBSession, AuthenticatedUser, Pagination
 from models import Appointment, Schedule, User, Business, Currency, AppointmentProduct, Product, UserCounters, Review
 from schema.nomenclature.currency import CurrencyMiniResponse
-from service.booking.business import get_business_by_user_id
+from service.booking.business import get_business_by_user_id, get_businesses_by_user_ids
 
 STATIC_MAP_ROUTE = os.getenv("STATIC_MAP_ROUTE")
 
@@ -198,6 +198,9 @@ async def get_appointments_by_user_id(
     appointments: List[AppointmentResponse] = []
     apt_id_to_index: Dict[int, int] = {}
 
+    # One statement for the businesses of every provider on the page
+    businesses = await get_businesses_by_user_ids(db, list({row.Appointment.user_id for row in rows})) if rows else {}
+
     for idx, (
          appointment,
          review,
@@ -207,7 +210,7 @@ async def get_appointments_by_user_id(
          p_id, p_fullname, p_username, p_avatar, p_prof
     ) in enumerate(rows):
         is_customer = appointment.customer_id == auth_user_id
-        business = await get_business_by_user_id(db, p_id)
+        business = businesses[p_id]
 
         dto = AppointmentResponse(
                 id=appointment.id,
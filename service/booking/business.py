@@ -1,25 +1,25 @@
 import os
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from sqlalchemy.orm import joinedload
 from fastapi import HTTPException, Query, Request, Response
 
-from core.crud_helpers import PaginatedResponse
+from core.crud_helpers import PaginatedResponse, CountStrategy, db_count
 from core.dependencies import RedisClient, Pagination, AuthenticatedUser
 from core.enums.day_of_week_enum import DayOfWeekEnum
 from core.enums.registration_step_enum import RegistrationStepEnum
 from core.logger import logger
+from core.cache import invalidate_tags
 from core.data_utils import local_to_utc_fulldate
+from core.geo import to_shape, timezone_at
 from core.dependencies import DBSession, HTTPClient
 from starlette import status
 from models import Business, Service, Product, Appointment, User, UserCounters, Schedule, Follow, \
     SubFilter, EmploymentRequest, BusinessType
 from sqlalchemy import select, and_, or_, func, not_, exists, text, literal_column
-from geoalchemy2.shape import to_shape
 from geoalchemy2 import Geography
-from timezonefinder import TimezoneFinder
 
 from models.booking.product_sub_filters import product_sub_filters
 from schema.booking.business import BusinessCreate, BusinessResponse, BusinessHasEmployeesUpdate, \
@@ -117,6 +117,23 @@ async def get_business_location(
         map_url=map_url
     )
 
+def _business_response(business: Business) -> BusinessResponse:
+    point = to_shape(business.coordinates)
+    latitude = point.y
+    longitude = point.x
+
+    return BusinessResponse(
+        id=business.id,
+        business_type_id=business.business_type_id,
+        owner_id=business.owner_id,
+        description=business.description,
+        timezone=business.timezone,
+        address=business.address,
+        services=business.services,
+        coordinates=BusinessCoordinates(lat=latitude, lng=longitude),
+        has_employees=business.has_employees
+    )
+
 async def get_business_by_user_id(db: DBSession, user_id: int) -> BusinessResponse:
     business_query = await db.execute(select(Business, User.id).where(
         and_(
@@ -134,22 +151,28 @@ async def get_business_by_user_id(db: DBSession, user_id: int) -> BusinessRespon
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail='Business not found')
 
-    point = to_shape(business.coordinates)
-    latitude = point.y
-    longitude = point.x
+    return _business_response(business)
 
-    return BusinessResponse(
-        id=business.id,
-        business_type_id=business.business_type_id,
-        owner_id=business.owner_id,
-        description=business.description,
-        timezone=business.timezone,
-        address=business.address,
-        services=business.services,
-        coordinates=BusinessCoordinates(lat=latitude, lng=longitude),
-        has_employees=business.has_employees
+async def get_businesses_by_user_ids(db: DBSession, user_ids: List[int]) -> Dict[int, BusinessResponse]:
+    """Same as get_business_by_user_id for many users, in one statement."""
+    business_query = await db.execute(select(Business, User.id).where(
+        and_(
+            User.id.in_(user_ids),
+            or_(
+                Business.owner_id == User.id,
+                Business.id == User.employee_business_id
+            )
+        )).options(joinedload(Business.services))
     )
 
+    businesses = {user_id: _business_response(business) for business, user_id in business_query.unique().all()}
+
+    if any(user_id not in businesses for user_id in user_ids):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail='Business not found')
+
+    return businesses
+
 async def get_business_employees_by_id(
         db: DBSession,
         business_id: int,
@@ -165,9 +188,7 @@ async def get_business_employees_by_id(
        .where(User.employee_business_id == business_id)
    )
 
-   count = await db.scalar(
-       select(func.count()).select_from(base_q.subquery())
-   )
+   count = await db_count(db, base_q, CountStrategy.EXACT)
 
    stmt = (
        select(
@@ -437,8 +458,11 @@ async def create_new_business(
         owner = await db.get(User, auth_user_id)
         business_type = await db.get(BusinessType, business_data.business_type_id)
 
-        tf = TimezoneFinder()
-        business_timezone = tf.timezone_at_land(lng=place.lng, lat=place.lat)
+        business_timezone = await timezone_at(lat=place.lat, lng=place.lng)
+        if business_timezone is None:
+            logger.error(f"No timezone found for place: {business_data.place_id} at lat: {place.lat}, lng: {place.lng}")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail='The business address could not be matched to a timezone')
 
         stmt_owner_has_business = await db.execute(
             select(Business).
@@ -502,6 +526,9 @@ async def create_new_business(
         await db.commit()
         await db.refresh(owner)
 
+        # Name, profession, address and opening hours are part of the cached profile
+        await invalidate_tags(f"user:{auth_user_id}")
+
         return BusinessCreateResponse(
             authState=UserAuthStateResponse(
                 is_validated=owner.is_validated,
@@ -509,6 +536,9 @@ async def create_new_business(
             ),
             business_id=business_id
         )
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
         await db.rollback()
 
@@ -541,6 +571,7 @@ async def update_business_has_employees(
         db.add(business)
         await db.commit()
         await db.refresh(business)
+        await invalidate_tags(f"user:{auth_user_id}")
 
         return await get_business_by_id(db, business_id=business.id)
 
@@ -622,4 +653,5 @@ async def approve_business_by_owner_id(
     business_owner.is_validated = True
 
     await db.commit()
+    await invalidate_tags(f"user:{user_id}")
     return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
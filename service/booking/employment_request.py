@@ -4,6 +4,7 @@ from fastapi import HTTPException, Response, Request, status
 from sqlalchemy.orm import joinedload
 from sqlalchemy import select, and_, delete
 
+from core.cache import invalidate_tags
 from core.crud_helpers import db_create, db_get_one
 from core.dependencies import DBSession, AuthenticatedUser
 from core.enums.employment_requests_status_enum import EmploymentRequestsStatusEnum
@@ -17,6 +18,7 @@ import calendar
 
 from schema.user.notification import NotificationEmploymentData
 from service.booking.business import get_business_by_user_id
+from service.user.notification import create_notification
 
 async def get_employment_requests_by_user_id(
         db: DBSession,
@@ -123,14 +125,15 @@ async def create_employment_request(
             profession_id=profession.id
         )
 
-        notification = Notification(
-            type=NotificationTypeEnum.EMPLOYMENT_REQUEST,
+        # Written inline, responding to the request marks this notification as deleted
+        await create_notification(
+            db,
+            type=NotificationTypeEnum.EMPLOYMENT_REQUEST.value,
             sender_id=auth_user_id,
             receiver_id=employment_create.employee_id,
             data=employment_data.model_dump(),
             message="Employment Request Sent By Business"
         )
-        db.add(notification)
         await db.commit()
 
         return Response(status_code=status.HTTP_201_CREATED)
@@ -227,14 +230,14 @@ async def respond_employment_request(
                 )
 
                 # Send Business Notification
-                notification = Notification(
-                        type=NotificationTypeEnum.EMPLOYMENT_REQUEST_ACCEPT,
-                        sender_id=auth_user_id,
-                        receiver_id=employment_request.employer_id,
-                        data=employment_data.model_dump(),
-                        message=f"Employment Accepted By {auth_user_id}"
-                    )
-                db.add(notification)
+                create_notification.enqueue(
+                    db,
+                    type=NotificationTypeEnum.EMPLOYMENT_REQUEST_ACCEPT.value,
+                    sender_id=auth_user_id,
+                    receiver_id=employment_request.employer_id,
+                    data=employment_data.model_dump(),
+                    message=f"Employment Accepted By {auth_user_id}"
+                )
 
             else:
                 # Delete Employment Request
@@ -249,14 +252,14 @@ async def respond_employment_request(
                 )
 
                 # Send Business Notification
-                notification = Notification(
-                        type=NotificationTypeEnum.EMPLOYMENT_REQUEST_DENIED,
-                        sender_id=auth_user_id,
-                        receiver_id=employment_request.employee_id if is_employer else employment_request.employer_id,
-                        data=employment_data.model_dump(),
-                        message=f"Employment Denied By {auth_user_id}"
-                    )
-                db.add(notification)
+                create_notification.enqueue(
+                    db,
+                    type=NotificationTypeEnum.EMPLOYMENT_REQUEST_DENIED.value,
+                    sender_id=auth_user_id,
+                    receiver_id=employment_request.employee_id if is_employer else employment_request.employer_id,
+                    data=employment_data.model_dump(),
+                    message=f"Employment Denied By {auth_user_id}"
+                )
 
             previous_notification_result = await db.execute(
                 select(Notification)
@@ -270,8 +273,11 @@ async def respond_employment_request(
 
             if not previous_notification:
                 logger.error(f"Previous notification related to employment_request id {employment_request_id} was not found")
-            previous_notification.is_deleted = True
+            else:
+                previous_notification.is_deleted = True
 
+        # An accepted request changes the employee's profession, business and opening hours
+        await invalidate_tags(f"user:{auth_user.id}")
         return Response(status_code=status.HTTP_204_NO_CONTENT)
 
     except Exception as e:
@@ -24,6 +24,7 @@ async def get_products_by_user_id(
         schema=ProductWithSubFiltersResponse,
         page=pagination.page,
         limit=pagination.limit,
+        cursor=pagination.cursor,
         unique=True,
         joins=[joinedload(Product.sub_filters).joinedload(SubFilter.filter)]
     )
@@ -48,6 +49,7 @@ async def get_products_by_user_id_and_service_id(
         joins=[joinedload(Product.sub_filters).joinedload(SubFilter.filter)],
         page=pagination.page,
         limit=pagination.limit,
+        cursor=pagination.cursor,
         order_by="created_at",
         unique=True,
         descending=True
@@ -1,54 +1,46 @@
-from decimal import Decimal
 from typing import Optional, List
 
 from fastapi import HTTPException, Query, Response, Request, status
 from sqlalchemy.orm import joinedload
-from sqlalchemy import select, insert, update, func, literal, case, and_
+from sqlalchemy import select, insert, update, func, and_
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.cache import invalidate_tags_on_commit
 from core.crud_helpers import PaginatedResponse
 from core.dependencies import DBSession, Pagination, AuthenticatedUser
+from core.logger import logger
+from core.tasks import task
 from models import User, Review, UserCounters, ReviewLike, ReviewProductOwnerLike, Service, Product, Appointment
 from schema.booking.review import ReviewCreate, ReviewSummaryResponse, RatingBreakdown, UserReviewResponse, \
     ReviewResponse, ReviewUpdate
 
-async def _apply_rating_change(
-    db: DBSession,
-    user_id: int,
-    delta_count: int,
-    delta_sum: Decimal,
-) -> UserCounters:
+@task("booking.refresh_ratings")
+async def refresh_ratings(db: AsyncSession, user_id: int) -> None:
+    # Recomputed from the reviews instead of applying deltas, so that runs in any
+    # order, or retried, leave the same counters
     uc = UserCounters
 
-    count_new_expr = uc.ratings_count + literal(delta_count)
-
-    numerator_expr = (uc.ratings_average * uc.ratings_count) + literal(delta_sum)
-    denom_expr = func.nullif(count_new_expr, 0)
+    locked = await db.execute(select(uc.user_id).where(uc.user_id == user_id).with_for_update())
+    if locked.first() is None:
+        logger.warning(f"[TASKS] User Counters not found for user_id: {user_id}, ratings refresh skipped")
+        return
 
-    avg_new_expr = case(
-        (count_new_expr > 0, numerator_expr / denom_expr),
-        else_=literal(0.0)
+    # A statement after the lock, so it sees every review committed before it
+    ratings = (
+        select(func.count(Review.id).label("count"), func.avg(Review.rating).label("average"))
+        .where(Review.user_id == user_id, Review.parent_id.is_(None))
+        .subquery()
     )
 
-    stmt = (
+    await db.execute(
         update(uc)
         .where(uc.user_id == user_id)
         .values(
-            ratings_count=count_new_expr,
-            ratings_average=avg_new_expr,
+            ratings_count=select(ratings.c.count).scalar_subquery(),
+            ratings_average=select(func.coalesce(ratings.c.average, 0.0)).scalar_subquery(),
         )
-        .returning(uc.user_id, uc.ratings_count, uc.ratings_average)
     )
-
-    result = await db.execute(stmt)
-    row = result.first()
-    if not row:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User Counters not found",
-        )
-
-    counters = (await db.execute(select(uc).where(uc.user_id == user_id))).scalars().first()
-    return counters
+    invalidate_tags_on_commit(db, f"user:{user_id}")
 
 async def get_reviews_by_user_id(
         db: DBSession,
@@ -206,12 +198,7 @@ async def create_new_review(
 
         # Update User Counters
         if review_create.parent_id is None:
-            await _apply_rating_change(
-                db=db,
-                user_id=review.user_id,
-                delta_count=1,
-                delta_sum=review.rating
-            )
+            refresh_ratings.enqueue(db, user_id=review.user_id)
 
         # Update Appointment
         appointment.has_written_review = True
@@ -256,13 +243,8 @@ async def update_review_by_id(
         db.add(review)
         await db.flush()
 
-        if review_update.rating != review.rating:
-            await _apply_rating_change(
-                db=db,
-                user_id=review.user_id,
-                delta_count=0,
-                delta_sum=Decimal(review_update.rating - review.rating)
-            )
+        if review.parent_id is None:
+            refresh_ratings.enqueue(db, user_id=review.user_id)
 
         return review
 
@@ -297,12 +279,8 @@ async def delete_review_by_id(
 
         await db.delete(review)
 
-        await _apply_rating_change(
-            db=db,
-            user_id=review.user_id,
-            delta_count=-1,
-            delta_sum=-review.rating
-        )
+        if review.parent_id is None:
+            refresh_ratings.enqueue(db, user_id=review.user_id)
 
         # Update Appointment
         appointment.has_written_review = False
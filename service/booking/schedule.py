@@ -10,6 +10,7 @@ from schema.booking.schedule import ScheduleCreate, ScheduleUpdate, ScheduleResp
 from models import Schedule, Business, User
 import calendar
 from core.logger import logger
+from core.cache import invalidate_tags
 
 from service.booking.business import get_business_by_user_id
 
@@ -77,6 +78,9 @@ async def create_user_schedule(
     db.add(new_schedule)
     await db.commit()
     await db.refresh(new_schedule)
+
+    # Opening hours are part of the cached profile
+    await invalidate_tags(f"user:{auth_user_id}")
     return new_schedule
 
 async def update_user_schedule(
@@ -95,6 +99,7 @@ async def update_user_schedule(
     await db.commit()
     await db.refresh(schedule)
 
+    await invalidate_tags(f"user:{auth_user_id}")
     return schedule
 
 async def update_user_schedules(
@@ -103,13 +108,32 @@ async def update_user_schedules(
         auth_user: AuthenticatedUser
 ) -> List[ScheduleResponse]:
     try:
-        updated_schedules = []
+        auth_user_id = auth_user.id
+        schedule_ids = [schedule.id for schedule in schedule_update]
+
+        # One statement for all schedules, with the same checks as check_resource_ownership
+        schedules_stmt = await db.execute(select(Schedule).where(Schedule.id.in_(schedule_ids)))
+        schedules = {schedule.id: schedule for schedule in schedules_stmt.scalars().all()}
+
+        for schedule_id in schedule_ids:
+            schedule = schedules.get(schedule_id)
+            if not schedule:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                    detail="Schedule not found")
+            if schedule.user_id != auth_user_id:
+                raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                                    detail="You do not have permission to perform this action")
+
+        await get_business(db, auth_user_id)
 
         for schedule in schedule_update:
-            updated_schedule = await update_user_schedule(db, schedule.id, schedule, auth_user)
-            updated_schedules.append(updated_schedule)
+            schedules[schedule.id].start_time = schedule.start_time
+            schedules[schedule.id].end_time = schedule.end_time
+
+        await db.commit()
 
-        return updated_schedules
+        await invalidate_tags(f"user:{auth_user_id}")
+        return [schedules[schedule_id] for schedule_id in schedule_ids]
 
     except Exception as e:
         await db.rollback()
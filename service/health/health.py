@@ -0,0 +1,25 @@
+import time
+from sqlalchemy import text
+from core.database import async_engine, read_async_engine, get_pool_status
+from core.logger import logger
+from schema.health.health import DBHealthResponse, DBPoolStatusResponse
+
+async def get_db_health() -> DBHealthResponse:
+    latency_ms = None
+    db_status = "ok"
+
+    try:
+        started = time.perf_counter()
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        latency_ms = round((time.perf_counter() - started) * 1000, 3)
+    except Exception as e:
+        logger.error(f"[DB] Health check failed. Error: {e}")
+        db_status = "unavailable"
+
+    return DBHealthResponse(
+        status=db_status,
+        latency_ms=latency_ms,
+        pool=DBPoolStatusResponse(**get_pool_status(async_engine)),
+        read_pool=DBPoolStatusResponse(**get_pool_status(read_async_engine)) if read_async_engine is not async_engine else None
+    )
@@ -11,7 +11,8 @@ from fastapi import status, HTTPException
 from starlette.responses import Response
 
 from core.dependencies import HTTPClient, RedisClient
-from core.logger import logger
+from core.logger import logger, struct_logger
+from core.metrics import outbound_request_duration, timed
 from schema.integration.google import PlacesResponse, PlacePredictionResponse, GooglePlaceDetailsResponse, \
     BusinessPlaceDetailsResponse, GooglePlaceDetailsResult, StaticMapQuery
 
@@ -39,7 +40,8 @@ async def search_places(
     }
     t0 = time.perf_counter()
     try:
-        resp = await client.get(url, params=params)
+        with timed(outbound_request_duration, "google", "places_autocomplete"):
+            resp = await client.get(url, params=params)
         resp.raise_for_status()
     except httpx.HTTPError as e:
         logger.error(f"Google Autocomplete Error, Query: {query}, url: {url}, Error: {e}")
@@ -48,9 +50,8 @@ async def search_places(
             detail="Something went wrong"
         )
 
-    logger.info(
-        f"Google Autocomplete OK. Query: {query}, status_code: {resp.status_code}, duration_ms: {round((time.perf_counter() - t0) * 1000, 2)}",
-    )
+    struct_logger.info("google.autocomplete_ok", query=query, status_code=resp.status_code,
+                       duration_ms=round((time.perf_counter() - t0) * 1000, 2))
     payload = resp.json()
     google_status = payload.get("status", "OK")
 
@@ -92,7 +93,8 @@ async def get_place_details(
 
     t0 = time.perf_counter()
     try:
-        resp = await client.get(url, params=params)
+        with timed(outbound_request_duration, "google", "place_details"):
+            resp = await client.get(url, params=params)
         resp.raise_for_status()
     except httpx.HTTPError as e:
         logger.error(f"Google Details Error, Place id: {place_id}, url: {url}, Error: {e}")
@@ -102,8 +104,7 @@ async def get_place_details(
         )
 
     dur = round((time.perf_counter() - t0) * 1000, 2)
-    logger.bind(event="google_details_http_ok", place_id=place_id,
-                status_code=resp.status_code, duration_ms=dur).info("request finished")
+    struct_logger.info("google.details_ok", place_id=place_id, status_code=resp.status_code, duration_ms=dur)
 
     payload = resp.json()
     data = GooglePlaceDetailsResponse.model_validate(payload)
@@ -188,7 +189,7 @@ async def fetch_static_map(
 
         if cached_body and cached_headers:
             content_type = cached_headers.get(b"content-type", b"image/png").decode()
-            logger.info(f"[STATIC MAP] Cache HIT - key={key}")
+            struct_logger.info("static_map.cache_hit", key=key)
             return Response(
                 content=cached_body,
                 media_type=content_type,
@@ -199,11 +200,12 @@ async def fetch_static_map(
                 },
             )
 
-    logger.info(f"[STATIC MAP] Cache MISS - fetching from Google API for key={key}")
+    struct_logger.info("static_map.cache_miss", key=key)
     qstr = urlencode(sorted(params, key=lambda kv: (kv[0], kv[1])), doseq=True)
     url = f"{STATIC_BASE_URL}?{qstr}"
 
-    r = await http_client.get(url)
+    with timed(outbound_request_duration, "google", "static_map"):
+        r = await http_client.get(url)
     if r.status_code != 200:
         logger.error(f"[STATIC MAP] Google Error {r.status_code}: {r.text[:200]}")
         raise HTTPException(
@@ -224,7 +226,7 @@ async def fetch_static_map(
     pipe.expire(key + ":hdr", DEFAULT_EDGE_TTL)
     await pipe.execute()
 
-    logger.info(f"[STATIC MAP] Cached new image - key={key} - size={len(r.content)} bytes")
+    struct_logger.info("static_map.cached", key=key, size=len(r.content))
 
     return Response(
         content=r.content,
@@ -1,19 +1,21 @@
-from sqlalchemy.orm import joinedload
-from core.crud_helpers import db_create, db_delete, db_update, db_get_one, db_get_all, PaginatedResponse
+from core.crud_helpers import db_create, db_delete, db_update, PaginatedResponse, paginate_records
 from core.dependencies import DBSession, Pagination
 from models import BusinessType, Service, Filter, Profession
+from service.nomenclature.snapshot import get_nomenclature_snapshot, invalidates_nomenclature
 from schema.nomenclature.business_type import BusinessTypeCreate, BusinessTypeUpdate, BusinessTypeResponse
 
 async def get_all_business_types(
         db: DBSession,
         pagination: Pagination
 ) -> PaginatedResponse[BusinessTypeResponse]:
-    return await db_get_all(
-        db=db,
+    snapshot = await get_nomenclature_snapshot()
+    return paginate_records(
+        list(snapshot.business_types.values()),
         model=BusinessType,
         schema=BusinessTypeResponse,
         page=pagination.page,
         limit=pagination.limit,
+        cursor=pagination.cursor,
         order_by="business_domain_id"
     )
 
@@ -22,43 +24,40 @@ async def get_business_types_by_profession_id(
         profession_id: int,
         pagination: Pagination
 ):
-    profession = await db_get_one(
-        db=db,
-        model=Profession,
-        filters={Profession.id: profession_id},
-        joins=[joinedload(Profession.business_types)])
-    return profession.business_types
+    snapshot = await get_nomenclature_snapshot()
+    return snapshot.get(snapshot.professions, Profession, profession_id).business_types
 
 async def get_business_types_by_filter_id(db: DBSession, filter_id: int):
-    filter_data = await db_get_one(db,
-                                  model=Filter,
-                                  filters={Filter.id: filter_id},
-                                  joins=[joinedload(Filter.business_types)])
-    return filter_data.business_types
+    snapshot = await get_nomenclature_snapshot()
+    return snapshot.get(snapshot.filters, Filter, filter_id).business_types
 
 async def get_business_types_by_business_domain_id(
         db: DBSession,
         business_domain_id: int,
         pagination: Pagination
 ) -> PaginatedResponse[BusinessTypeResponse]:
-    return await db_get_all(
-        db=db,
+    snapshot = await get_nomenclature_snapshot()
+    return paginate_records(
+        [record for record in snapshot.business_types.values() if record.business_domain_id == business_domain_id],
         model=BusinessType,
         schema=BusinessTypeResponse,
-        filters={BusinessType.business_domain_id: business_domain_id},
         page=pagination.page,
-        limit=pagination.limit
+        limit=pagination.limit,
+        cursor=pagination.cursor
     )
 
 async def get_business_types_by_service_id(db: DBSession, service_id: int):
-    service = await db_get_one(db, model=Service, filters={Service.id: service_id}, joins=[joinedload(Service.business_types)])
-    return service.business_types
+    snapshot = await get_nomenclature_snapshot()
+    return snapshot.get(snapshot.services, Service, service_id).business_types
 
+@invalidates_nomenclature
 async def create_new_business_type(db: DBSession, business_type_create: BusinessTypeCreate):
     return await db_create(db, model=BusinessType, create_data=business_type_create)
 
+@invalidates_nomenclature
 async def delete_business_type_by_id(db: DBSession, business_type_id: int):
     return await db_delete(db, model=BusinessType, resource_id=business_type_id)
 
+@invalidates_nomenclature
 async def update_business_type_by_id(db: DBSession, business_type_update: BusinessTypeUpdate, business_type_id: int):
     return await db_update(db, model=BusinessType, update_data=business_type_update, resource_id=business_type_id)
@@ -4,28 +4,33 @@ from fastapi import HTTPException, Request, status
 from sqlalchemy import select, and_, delete, insert
 from sqlalchemy.orm import selectinload
 
-from core.crud_helpers import db_create, db_get_all, db_update, PaginatedResponse
+from core.crud_helpers import db_create, db_update, PaginatedResponse, paginate_records
 from core.dependencies import DBSession, Pagination, AuthenticatedUser
 from models import Currency, User, UserCurrency, Product
+from service.nomenclature.snapshot import get_nomenclature_snapshot, invalidates_nomenclature
 from schema.nomenclature.currency import CurrencyCreate, CurrencyResponse, CurrencyUpdate, UserCurrenciesUpdate
 
 async def get_all_currencies(
         db: DBSession,
         pagination: Pagination
 ) -> PaginatedResponse[CurrencyResponse]:
-    return await db_get_all(
-        db=db,
+    snapshot = await get_nomenclature_snapshot()
+    return paginate_records(
+        list(snapshot.currencies.values()),
         model=Currency,
         schema=CurrencyResponse,
         page=pagination.page,
         limit=pagination.limit,
+        cursor=pagination.cursor,
         order_by="created_at",
         descending=True
     )
 
+@invalidates_nomenclature
 async def create_new_currency(db: DBSession, currency_create: CurrencyCreate):
     return await db_create(db, model=Currency, create_data=currency_create)
 
+@invalidates_nomenclature
 async def update_currency_by_id(db: DBSession, currency_id: int, currency_update: CurrencyUpdate):
     return await db_update(db, model=Currency, resource_id=currency_id, update_data=currency_update)
 
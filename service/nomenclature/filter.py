@@ -1,25 +1,26 @@
 from typing import List, Union
 
-from sqlalchemy.orm import joinedload
-
-from core.crud_helpers import db_create, db_update, db_delete, db_get_one, \
-    db_insert_many_to_many, db_remove_many_to_many, db_get_all, PaginatedResponse
+from core.crud_helpers import db_create, db_update, db_delete, paginate_records, \
+    db_insert_many_to_many, db_remove_many_to_many, PaginatedResponse, \
+    db_bulk_insert_many_to_many, db_bulk_remove_many_to_many
 from core.dependencies import DBSession, Pagination
 from models.nomenclature.business_type_filters import business_type_filters
 from schema.nomenclature.filter import FilterCreate, FilterUpdate, FilterWithSubFiltersResponse
 from models import Filter, BusinessType
+from service.nomenclature.snapshot import get_nomenclature_snapshot, invalidates_nomenclature
 
 async def get_all_filters(
         db: DBSession,
         pagination: Pagination
 ) -> Union[PaginatedResponse[FilterWithSubFiltersResponse], List[FilterWithSubFiltersResponse]]:
-    return await db_get_all(
-        db=db,
+    snapshot = await get_nomenclature_snapshot()
+    return paginate_records(
+        list(snapshot.filters.values()),
         model=Filter,
-        schema= FilterWithSubFiltersResponse,
-        unique=True,
+        schema=FilterWithSubFiltersResponse,
         page=pagination.page,
         limit=pagination.limit,
+        cursor=pagination.cursor,
         order_by="created_at",
         descending=True
     )
@@ -28,23 +29,22 @@ async def get_filters_by_business_type_id(
         db: DBSession,
         business_type_id: int
 ) -> List[FilterWithSubFiltersResponse]:
-    business_type = await db_get_one(
-        db=db,
-        model=BusinessType,
-        filters={BusinessType.id: business_type_id},
-        joins=[joinedload(BusinessType.filters)]
-    )
-    return business_type.filters
+    snapshot = await get_nomenclature_snapshot()
+    return snapshot.get(snapshot.business_types, BusinessType, business_type_id).filters
 
+@invalidates_nomenclature
 async def create_new_filter(db: DBSession, filter_create: FilterCreate):
     return await db_create(db, model=Filter, create_data=filter_create)
 
+@invalidates_nomenclature
 async def update_filter_by_id(db: DBSession, filter_update: FilterUpdate, filter_id: int):
     return await db_update(db, model=Filter, update_data=filter_update, resource_id=filter_id)
 
+@invalidates_nomenclature
 async def delete_filter_by_id(db: DBSession, filter_id: int):
     return await db_delete(db, model=Filter, resource_id=filter_id)
 
+@invalidates_nomenclature
 async def attach_filters_to_business_type(db: DBSession, business_type_id: int, filter_id: int):
     return await db_insert_many_to_many(
         db=db,
@@ -55,6 +55,7 @@ async def attach_filters_to_business_type(db: DBSession, business_type_id: int,
         relation_table=business_type_filters
     )
 
+@invalidates_nomenclature
 async def detach_filters_from_business_type(db: DBSession, business_type_id: int, filter_id: int):
     return await db_remove_many_to_many(
         db=db,
@@ -63,4 +64,26 @@ async def detach_filters_from_business_type(db: DBSession, business_type_id: int
         model_two=Filter,
         resource_two_id=filter_id,
         relation_table=business_type_filters
-    )
\ No newline at end of file
+    )
+
+@invalidates_nomenclature
+async def bulk_attach_filters_to_business_type(db: DBSession, business_type_id: int, filter_ids: List[int]):
+    return await db_bulk_insert_many_to_many(
+        db=db,
+        model_one=BusinessType,
+        resource_one_id=business_type_id,
+        model_two=Filter,
+        resource_two_ids=filter_ids,
+        relation_table=business_type_filters
+    )
+
+@invalidates_nomenclature
+async def bulk_detach_filters_from_business_type(db: DBSession, business_type_id: int, filter_ids: List[int]):
+    return await db_bulk_remove_many_to_many(
+        db=db,
+        model_one=BusinessType,
+        resource_one_id=business_type_id,
+        model_two=Filter,
+        resource_two_ids=filter_ids,
+        relation_table=business_type_filters
+    )
@@ -1,12 +1,12 @@
 from typing import List, Union
 
-from sqlalchemy.orm import joinedload
-
-from core.crud_helpers import db_create, db_update, db_delete, db_get_one, db_get_all, \
-    db_insert_many_to_many, db_remove_many_to_many, PaginatedResponse
+from core.crud_helpers import db_create, db_update, db_delete, paginate_records, \
+    db_insert_many_to_many, db_remove_many_to_many, PaginatedResponse, \
+    db_bulk_insert_many_to_many, db_bulk_remove_many_to_many
 from core.dependencies import DBSession, Pagination
 from models import Profession, BusinessType
 from models.nomenclature.business_type_professions import business_type_professions
+from service.nomenclature.snapshot import get_nomenclature_snapshot, invalidates_nomenclature
 from schema.nomenclature.profession import ProfessionCreate, ProfessionUpdate, \
     ProfessionWithBusinessTypesResponse, ProfessionResponse
 
@@ -14,51 +14,52 @@ async def get_professions_by_business_type_id(
         db: DBSession,
         business_type_id: int
 ) -> List[ProfessionResponse]:
-    business_type = await db_get_one(
-        db=db,
-        model=BusinessType,
-        filters={BusinessType.id: business_type_id},
-        joins=[joinedload(BusinessType.professions)]
-    )
-    return business_type.professions
+    snapshot = await get_nomenclature_snapshot()
+    return snapshot.get(snapshot.business_types, BusinessType, business_type_id).professions
 
 async def get_all_professions_with_business_types(
         db: DBSession,
         pagination: Pagination
 ) -> PaginatedResponse[ProfessionWithBusinessTypesResponse]:
-    return await db_get_all(
-        db=db,
+    snapshot = await get_nomenclature_snapshot()
+    return paginate_records(
+        list(snapshot.professions.values()),
         model=Profession,
         schema=ProfessionWithBusinessTypesResponse,
-        joins=[joinedload(Profession.business_types).load_only(BusinessType.name)],
-        unique=True,
         page=pagination.page,
-        limit=pagination.limit
+        limit=pagination.limit,
+        cursor=pagination.cursor
     )
 
 async def get_all_professions(
         db: DBSession,
         pagination: Pagination
 ) -> Union[PaginatedResponse[ProfessionResponse], List[ProfessionResponse]]:
-    return await db_get_all(
-        db=db,
+    snapshot = await get_nomenclature_snapshot()
+    return paginate_records(
+        list(snapshot.professions.values()),
         model=Profession,
         schema=ProfessionResponse,
         page=pagination.page,
         limit=pagination.limit,
+        cursor=pagination.cursor,
         order_by="created_at",
         descending=True
     )
 
+@invalidates_nomenclature
 async def create_new_profession(db: DBSession, profession_create: ProfessionCreate):
     return await db_create(db, model=Profession, create_data=profession_create)
 
+@invalidates_nomenclature
 async def update_profession_by_id(db: DBSession, profession_update: ProfessionUpdate, profession_id: int):
     return await db_update(db, model=Profession, update_data=profession_update, resource_id=profession_id)
 
+@invalidates_nomenclature
 async def delete_profession_by_id(db: DBSession, profession_id: int):
     return await db_delete(db, model=Profession, resource_id=profession_id)
 
+@invalidates_nomenclature
 async def attach_professions_to_business_type(db: DBSession, business_type_id: int, profession_id: int):
     return await db_insert_many_to_many(db,
                     model_one=BusinessType,
@@ -67,6 +68,7 @@ async def attach_professions_to_business_type(db: DBSession, business_type_id: i
                     resource_two_id=profession_id,
                     relation_table=business_type_professions)
 
+@invalidates_nomenclature
 async def detach_professions_from_business_type(db: DBSession, business_type_id: int, profession_id):
     return await db_remove_many_to_many(db,
                     model_one=BusinessType,
@@ -74,3 +76,21 @@ async def detach_professions_from_business_type(db: DBSession, business_type_id:
                     model_two=Profession,
                     resource_two_id=profession_id,
                     relation_table=business_type_professions)
+
+@invalidates_nomenclature
+async def bulk_attach_professions_to_business_type(db: DBSession, business_type_id: int, profession_ids: List[int]):
+    return await db_bulk_insert_many_to_many(db,
+                    model_one=BusinessType,
+                    resource_one_id=business_type_id,
+                    model_two=Profession,
+                    resource_two_ids=profession_ids,
+                    relation_table=business_type_professions)
+
+@invalidates_nomenclature
+async def bulk_detach_professions_from_business_type(db: DBSession, business_type_id: int, profession_ids: List[int]):
+    return await db_bulk_remove_many_to_many(db,
+                    model_one=BusinessType,
+                    resource_one_id=business_type_id,
+                    model_two=Profession,
+                    resource_two_ids=profession_ids,
+                    relation_table=business_type_professions)
@@ -11,22 +11,26 @@ from core.enums.role_enum import RoleEnum
 from models import Service, BusinessType, Business, User, business_services, Product, Filter, service_filters
 from schema.nomenclature.service import ServiceCreate, ServiceUpdate, ServiceResponse, ServiceIdsUpdate, \
     ServiceWithEmployeesResponse, ServiceEmployee
-from core.crud_helpers import db_create, db_delete, db_update, db_get_all, db_insert_many_to_many, \
-    db_remove_many_to_many, db_get_one, db_get_many_to_many, PaginatedResponse
+from core.crud_helpers import db_create, db_delete, db_update, db_insert_many_to_many, \
+    db_remove_many_to_many, db_get_many_to_many, PaginatedResponse, paginate_records, \
+    db_bulk_insert_many_to_many, db_bulk_remove_many_to_many
 from models.nomenclature.service_business_types import service_business_types
 from core.logger import logger
+from service.nomenclature.snapshot import get_nomenclature_snapshot, invalidates_nomenclature
 from collections import defaultdict
 
 async def get_all_services(
         db: DBSession,
         pagination: Pagination
 ) -> Union[PaginatedResponse[ServiceResponse], List[ServiceResponse]]:
-    return await db_get_all(
-        db=db,
+    snapshot = await get_nomenclature_snapshot()
+    return paginate_records(
+        list(snapshot.services.values()),
         model=Service,
         schema=ServiceResponse,
         page=pagination.page,
         limit=pagination.limit,
+        cursor=pagination.cursor,
         order_by=["service_domain_id", "order_index"],
         descending=True
     )
@@ -35,26 +39,22 @@ async def get_services_by_business_type_id(
         db: DBSession,
         business_type_id: int
 ) -> List[ServiceResponse]:
-    business_type = await db_get_one(
-        db=db,
-        model=BusinessType,
-        filters={BusinessType.id: business_type_id},
-        joins=[joinedload(BusinessType.services)]
-    )
-    return business_type.services
+    snapshot = await get_nomenclature_snapshot()
+    return snapshot.get(snapshot.business_types, BusinessType, business_type_id).services
 
 async def get_services_by_service_domain_id(
         db: DBSession,
         service_domain_id: int,
         pagination: Pagination
 ) -> Union[PaginatedResponse[ServiceResponse], List[ServiceResponse]]:
-    return await db_get_all(
-        db=db,
+    snapshot = await get_nomenclature_snapshot()
+    return paginate_records(
+        [record for record in snapshot.services.values() if record.service_domain_id == service_domain_id],
         model=Service,
         schema=ServiceResponse,
-        filters={ Service.service_domain_id: service_domain_id },
         page=pagination.page,
-        limit=pagination.limit
+        limit=pagination.limit,
+        cursor=pagination.cursor
     )
 
 async def get_services_by_business_id(
@@ -165,12 +165,15 @@ async def get_services_by_user_id(
         )
     return response
 
+@invalidates_nomenclature
 async def create_new_service(db: DBSession, new_service: ServiceCreate):
     return await db_create(db, model=Service, create_data=new_service)
 
+@invalidates_nomenclature
 async def update_service_by_id(db: DBSession, service_id: int, service_data: ServiceUpdate):
     return await db_update(db, resource_id=service_id, model=Service, update_data=service_data)
 
+@invalidates_nomenclature
 async def delete_service_by_id(db: DBSession, service_id: int):
     return await db_delete(db, model=Service, resource_id=service_id)
 
@@ -262,6 +265,7 @@ async def get_all_service_filter_relation(db: DBSession, service_id: int, filter
         relation_table=service_filters
     )
 
+@invalidates_nomenclature
 async def attach_service_to_filter(db: DBSession, service_id: int, filter_id: int):
     return await db_insert_many_to_many(db,
         model_one=Service,
@@ -271,6 +275,7 @@ async def attach_service_to_filter(db: DBSession, service_id: int, filter_id: in
         relation_table=service_filters
     )
 
+@invalidates_nomenclature
 async def detach_service_from_filter(db: DBSession, service_id: int, filter_id: int):
     return await db_remove_many_to_many(db,
         model_one=Service,
@@ -280,6 +285,7 @@ async def detach_service_from_filter(db: DBSession, service_id: int, filter_id:
         relation_table=service_filters
     )
 
+@invalidates_nomenclature
 async def attach_service_to_business_type(db: DBSession, business_type_id: int, service_id: int):
     return await db_insert_many_to_many(db,
         model_one=Service,
@@ -289,6 +295,7 @@ async def attach_service_to_business_type(db: DBSession, business_type_id: int,
         relation_table=service_business_types
     )
 
+@invalidates_nomenclature
 async def detach_service_from_business_type(db: DBSession, business_type_id: int, service_id: int):
     return await db_remove_many_to_many(db,
         model_one=Service,
@@ -298,4 +305,42 @@ async def detach_service_from_business_type(db: DBSession, business_type_id: int
         relation_table=service_business_types
     )
 
+@invalidates_nomenclature
+async def bulk_attach_services_to_business_type(db: DBSession, business_type_id: int, service_ids: List[int]):
+    return await db_bulk_insert_many_to_many(db,
+        model_one=BusinessType,
+        resource_one_id=business_type_id,
+        model_two=Service,
+        resource_two_ids=service_ids,
+        relation_table=service_business_types
+    )
+
+@invalidates_nomenclature
+async def bulk_detach_services_from_business_type(db: DBSession, business_type_id: int, service_ids: List[int]):
+    return await db_bulk_remove_many_to_many(db,
+        model_one=BusinessType,
+        resource_one_id=business_type_id,
+        model_two=Service,
+        resource_two_ids=service_ids,
+        relation_table=service_business_types
+    )
+
+@invalidates_nomenclature
+async def bulk_attach_filters_to_service(db: DBSession, service_id: int, filter_ids: List[int]):
+    return await db_bulk_insert_many_to_many(db,
+        model_one=Service,
+        resource_one_id=service_id,
+        model_two=Filter,
+        resource_two_ids=filter_ids,
+        relation_table=service_filters
+    )
 
+@invalidates_nomenclature
+async def bulk_detach_filters_from_service(db: DBSession, service_id: int, filter_ids: List[int]):
+    return await db_bulk_remove_many_to_many(db,
+        model_one=Service,
+        resource_one_id=service_id,
+        model_two=Filter,
+        resource_two_ids=filter_ids,
+        relation_table=service_filters
+    )
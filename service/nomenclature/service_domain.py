@@ -1,21 +1,24 @@
 from typing import Union, List
 
-from core.crud_helpers import db_create, db_update, db_delete, db_get_all, PaginatedResponse
+from core.crud_helpers import db_create, db_update, db_delete, PaginatedResponse, paginate_records
 from core.dependencies import DBSession, Pagination
 from schema.nomenclature.service_domain import ServiceDomainCreate, ServiceDomainUpdate, \
     ServiceDomainResponse
 from models import ServiceDomain
+from service.nomenclature.snapshot import get_nomenclature_snapshot, invalidates_nomenclature
 
 async def get_all_service_domains(
         db: DBSession,
         pagination: Pagination
 ) -> Union[PaginatedResponse[ServiceDomainResponse], List[ServiceDomainResponse]]:
-    return await db_get_all(
-        db=db,
+    snapshot = await get_nomenclature_snapshot()
+    return paginate_records(
+        list(snapshot.service_domains.values()),
         model=ServiceDomain,
         schema=ServiceDomainResponse,
         page=pagination.page,
         limit=pagination.limit,
+        cursor=pagination.cursor,
         order_by="created_at",
         descending=True
     )
@@ -25,17 +28,19 @@ async def get_service_domains_by_business_domain_id(
         business_domain_id: int,
         pagination: Pagination
 ) -> Union[PaginatedResponse[ServiceDomainResponse], List[ServiceDomainResponse]]:
-    return await db_get_all(
-        db=db,
+    snapshot = await get_nomenclature_snapshot()
+    return paginate_records(
+        [record for record in snapshot.service_domains.values() if record.business_domain_id == business_domain_id],
         model=ServiceDomain,
         schema=ServiceDomainResponse,
-        filters={ ServiceDomain.business_domain_id: business_domain_id },
         page=pagination.page,
         limit=pagination.limit,
+        cursor=pagination.cursor,
         order_by="created_at",
         descending=True
     )
 
+@invalidates_nomenclature
 async def create_new_service_domain(
         db: DBSession,
         service_domain_create: ServiceDomainCreate
@@ -46,6 +51,7 @@ async def create_new_service_domain(
         create_data=service_domain_create
     )
 
+@invalidates_nomenclature
 async def update_service_domain_by_id(
         db: DBSession,
         service_domain_update: ServiceDomainUpdate,
@@ -58,6 +64,7 @@ async def update_service_domain_by_id(
         resource_id=service_domain_id
     )
 
+@invalidates_nomenclature
 async def delete_service_domain_by_id(
         db: DBSession,
         service_domain_id: int
@@ -0,0 +1,235 @@
+"""
+Process local snapshot of the nomenclature graph: business domains, business types,
+services, service domains, filters, sub-filters, professions and currencies, with the
+relations between them, loaded at startup and served from memory by the GET services.
+
+Every write in service/nomenclature is decorated with @invalidates_nomenclature, which
+bumps a version counter in Redis and publishes it. Each worker listens on that channel,
+and rebuilds its snapshot as soon as it sees a version newer than the one it holds.
+NOMENCLATURE_SNAPSHOT_MAX_AGE is a safety net if a message is lost.
+"""
+import asyncio
+import os
+import time
+from functools import wraps
+from types import SimpleNamespace
+from typing import Any, Dict, Optional, Type
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+from core import redis_client
+from core.database import async_session_factory
+from core.logger import logger
+from models import BusinessDomain, BusinessType, Service, ServiceDomain, Filter, SubFilter, Profession, Currency, \
+    service_filters
+from models.nomenclature.business_type_filters import business_type_filters
+from models.nomenclature.business_type_professions import business_type_professions
+from models.nomenclature.service_business_types import service_business_types
+
+NOMENCLATURE_VERSION_KEY = "nomenclature:version"
+NOMENCLATURE_CHANNEL = "nomenclature:invalidate"
+NOMENCLATURE_SNAPSHOT_MAX_AGE = int(os.getenv("NOMENCLATURE_SNAPSHOT_MAX_AGE") or 300)
+
+class NomenclatureSnapshot:
+    def __init__(self, version: int):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.business_domains: Dict[int, SimpleNamespace] = {}
+        self.business_types: Dict[int, SimpleNamespace] = {}
+        self.services: Dict[int, SimpleNamespace] = {}
+        self.service_domains: Dict[int, SimpleNamespace] = {}
+        self.filters: Dict[int, SimpleNamespace] = {}
+        self.sub_filters: Dict[int, SimpleNamespace] = {}
+        self.professions: Dict[int, SimpleNamespace] = {}
+        self.currencies: Dict[int, SimpleNamespace] = {}
+
+    @property
+    def is_expired(self) -> bool:
+        return self.version < _latest_version or time.monotonic() - self.loaded_at > NOMENCLATURE_SNAPSHOT_MAX_AGE
+
+    @staticmethod
+    def get(records: Dict[int, SimpleNamespace], model: Type[Any], resource_id: int) -> SimpleNamespace:
+        record = records.get(resource_id)
+
+        if record is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail=f"{model.__name__} not found")
+        return record
+
+_snapshot: Optional[NomenclatureSnapshot] = None
+_latest_version = 0
+_load_lock = asyncio.Lock()
+
+async def _load_records(db, model: Type[Any], *relations: str) -> Dict[int, SimpleNamespace]:
+    # search_vector is only used by the search queries, no need to keep it in memory
+    columns = [column for column in model.__table__.columns if not isinstance(column.type, TSVECTOR)]
+    result = await db.execute(select(*columns).order_by(model.id))
+
+    records = {}
+    for row in result.mappings():
+        record = SimpleNamespace(**row)
+        for relation in relations:
+            setattr(record, relation, [])
+        records[record.id] = record
+    return records
+
+async def _load_pairs(db, relation_table, left: str, right: str):
+    result = await db.execute(
+        select(relation_table.c[left], relation_table.c[right]).order_by(relation_table.c[right])
+    )
+    return result.all()
+
+def _link(parents: Dict[int, SimpleNamespace], relation: str, children: Dict[int, SimpleNamespace], pairs) -> None:
+    for parent_id, child_id in pairs:
+        parent, child = parents.get(parent_id), children.get(child_id)
+        if parent is not None and child is not None:
+            getattr(parent, relation).append(child)
+
+async def _build_snapshot(db, version: int) -> NomenclatureSnapshot:
+    snapshot = NomenclatureSnapshot(version)
+
+    snapshot.business_domains = await _load_records(db, BusinessDomain, "business_types", "service_domains", "professions")
+    snapshot.business_types = await _load_records(db, BusinessType, "services", "filters", "professions")
+    snapshot.services = await _load_records(db, Service, "business_types", "filters")
+    snapshot.service_domains = await _load_records(db, ServiceDomain, "services")
+    snapshot.filters = await _load_records(db, Filter, "business_types", "sub_filters")
+    snapshot.sub_filters = await _load_records(db, SubFilter)
+    snapshot.professions = await _load_records(db, Profession, "business_types")
+    snapshot.currencies = await _load_records(db, Currency)
+
+    # One to many relations come from the foreign keys
+    _link(snapshot.business_domains, "business_types", snapshot.business_types,
+          [(record.business_domain_id, record.id) for record in snapshot.business_types.values()])
+    _link(snapshot.business_domains, "service_domains", snapshot.service_domains,
+          [(record.business_domain_id, record.id) for record in snapshot.service_domains.values()])
+    _link(snapshot.business_domains, "professions", snapshot.professions,
+          [(record.business_domain_id, record.id) for record in snapshot.professions.values()])
+    _link(snapshot.service_domains, "services", snapshot.services,
+          [(record.service_domain_id, record.id) for record in snapshot.services.values()])
+    _link(snapshot.filters, "sub_filters", snapshot.sub_filters,
+          [(record.filter_id, record.id) for record in snapshot.sub_filters.values()])
+
+    # Many to many relations, linked from both sides
+    pairs = await _load_pairs(db, service_business_types, "business_type_id", "service_id")
+    _link(snapshot.business_types, "services", snapshot.services, pairs)
+    _link(snapshot.services, "business_types", snapshot.business_types, [(right, left) for left, right in pairs])
+
+    pairs = await _load_pairs(db, business_type_filters, "business_type_id", "filter_id")
+    _link(snapshot.business_types, "filters", snapshot.filters, pairs)
+    _link(snapshot.filters, "business_types", snapshot.business_types, [(right, left) for left, right in pairs])
+
+    pairs = await _load_pairs(db, business_type_professions, "business_type_id", "profession_id")
+    _link(snapshot.business_types, "professions", snapshot.professions, pairs)
+    _link(snapshot.professions, "business_types", snapshot.business_types, [(right, left) for left, right in pairs])
+
+    pairs = await _load_pairs(db, service_filters, "service_id", "filter_id")
+    _link(snapshot.services, "filters", snapshot.filters, pairs)
+
+    for records in (snapshot.services, snapshot.filters, snapshot.professions):
+        for record in records.values():
+            record.business_types.sort(key=lambda business_type: business_type.id)
+
+    for record in snapshot.business_types.values():
+        record.services.sort(key=lambda service: (service.order_index, service.id))
+
+    return snapshot
+
+async def _get_redis_version() -> int:
+    client = redis_client.redis_client
+    if client is None:
+        return _latest_version
+
+    try:
+        return int(await client.get(NOMENCLATURE_VERSION_KEY) or 0)
+    except Exception as e:
+        logger.warning(f"[NOMENCLATURE] Could not read the snapshot version. Error: {e}")
+        return _latest_version
+
+def _note_version(version: int) -> None:
+    global _latest_version
+    _latest_version = max(_latest_version, version)
+
+async def load_nomenclature_snapshot() -> NomenclatureSnapshot:
+    global _snapshot
+
+    started = time.perf_counter()
+    # The version is read first, a bump that lands while loading leaves the snapshot expired
+    version = await _get_redis_version()
+    _note_version(version)
+
+    async with async_session_factory() as db:
+        snapshot = await _build_snapshot(db, version)
+
+    _snapshot = snapshot
+    logger.info(f"[NOMENCLATURE] Snapshot v{version} loaded in {round((time.perf_counter() - started) * 1000, 2)} ms")
+    return snapshot
+
+async def get_nomenclature_snapshot() -> NomenclatureSnapshot:
+    snapshot = _snapshot
+    if snapshot is not None and not snapshot.is_expired:
+        return snapshot
+
+    async with _load_lock:
+        if _snapshot is not None and not _snapshot.is_expired:
+            return _snapshot
+        return await load_nomenclature_snapshot()
+
+async def bump_nomenclature_version() -> None:
+    global _snapshot
+
+    client = redis_client.redis_client
+    if client is None:
+        _snapshot = None
+        return
+
+    try:
+        version = await client.incr(NOMENCLATURE_VERSION_KEY)
+        await client.publish(NOMENCLATURE_CHANNEL, version)
+        _note_version(version)
+    except Exception as e:
+        logger.error(f"[NOMENCLATURE] Could not publish the snapshot version. Error: {e}")
+        _snapshot = None
+
+def invalidates_nomenclature(func):
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        result = await func(*args, **kwargs)
+        await bump_nomenclature_version()
+        return result
+
+    return wrapper
+
+async def run_nomenclature_listener() -> None:
+    while True:
+        client = redis_client.redis_client
+        if client is None:
+            return
+
+        pubsub = None
+        try:
+            pubsub = client.pubsub()
+            await pubsub.subscribe(NOMENCLATURE_CHANNEL)
+
+            # Catch up on the bumps published while not subscribed
+            _note_version(await _get_redis_version())
+            await get_nomenclature_snapshot()
+
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+
+                _note_version(int(message["data"]))
+                await get_nomenclature_snapshot()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"[NOMENCLATURE] Invalidation listener error: {e}")
+            await asyncio.sleep(1)
+        finally:
+            if pubsub is not None:
+                try:
+                    await pubsub.reset()
+                except Exception:
+                    pass
@@ -1,23 +1,28 @@
-from core.crud_helpers import db_create, db_update, db_delete, db_get_all
+from core.crud_helpers import db_create, db_update, db_delete, paginate_records
 from core.dependencies import DBSession, Pagination
 from schema.nomenclature.sub_filter import SubFilterCreate, SubFilterUpdate, SubFilterResponse
 from models import SubFilter
+from service.nomenclature.snapshot import get_nomenclature_snapshot, invalidates_nomenclature
 
 async def get_sub_filters_by_filter_id(db: DBSession, filter_id: int, pagination: Pagination):
-    return await db_get_all(db,
-                             model=SubFilter,
-                             schema=SubFilterResponse,
-                             filters={SubFilter.filter_id: filter_id},
-                             page=pagination.page,
-                             limit=pagination.limit,
-                             order_by="created_at",
-                             descending=True)
+    snapshot = await get_nomenclature_snapshot()
+    return paginate_records([record for record in snapshot.sub_filters.values() if record.filter_id == filter_id],
+                            model=SubFilter,
+                            schema=SubFilterResponse,
+                            page=pagination.page,
+                            limit=pagination.limit,
+                            cursor=pagination.cursor,
+                            order_by="created_at",
+                            descending=True)
 
+@invalidates_nomenclature
 async def create_new_sub_filter(db: DBSession, sub_filter_create: SubFilterCreate):
     return await db_create(db, model=SubFilter, create_data=sub_filter_create)
 
+@invalidates_nomenclature
 async def update_sub_filter_by_id(db: DBSession, sub_filter_update:SubFilterUpdate, sub_filter_id: int):
     return await db_update(db, model=SubFilter, update_data=sub_filter_update, resource_id=sub_filter_id)
 
+@invalidates_nomenclature
 async def delete_sub_filters_by_id(db: DBSession, sub_filter_id: int):
     return await db_delete(db, model=SubFilter, resource_id=sub_filter_id)
\ No newline at end of file
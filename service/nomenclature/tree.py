@@ -0,0 +1,44 @@
+import hashlib
+from types import SimpleNamespace
+from typing import Optional
+
+from service.nomenclature.snapshot import NomenclatureSnapshot, get_nomenclature_snapshot
+from schema.nomenclature.tree import NomenclatureTreeResponse
+
+class RenderedTree:
+    __slots__ = ("snapshot", "body", "etag")
+
+    def __init__(self, snapshot: NomenclatureSnapshot, body: bytes):
+        self.snapshot = snapshot
+        self.body = body
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+_rendered: Optional[RenderedTree] = None
+
+def render_nomenclature_tree(snapshot: NomenclatureSnapshot) -> RenderedTree:
+    tree = NomenclatureTreeResponse.model_validate(
+        SimpleNamespace(business_domains=list(snapshot.business_domains.values())),
+        from_attributes=True
+    )
+    return RenderedTree(snapshot, tree.model_dump_json().encode())
+
+async def get_nomenclature_tree() -> RenderedTree:
+    global _rendered
+
+    snapshot = await get_nomenclature_snapshot()
+
+    # Rendered once per snapshot, every request in between gets the same bytes
+    rendered = _rendered
+    if rendered is None or rendered.snapshot is not snapshot:
+        rendered = _rendered = render_nomenclature_tree(snapshot)
+    return rendered
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
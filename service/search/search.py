@@ -4,7 +4,7 @@ from sqlalchemy.orm import Query
 from sqlalchemy import select, or_, func, and_, desc
 from starlette.requests import Request
 
-from core.crud_helpers import db_delete, PaginatedResponse
+from core.crud_helpers import db_delete, PaginatedResponse, CountStrategy, db_count
 from core.dependencies import DBSession, AuthenticatedUser, Pagination
 from core.enums.role_enum import RoleEnum
 from models import SearchKeyword, User, Service, BusinessType, UserCounters, Business, Role, Follow, UserSearchHistory
@@ -184,16 +184,14 @@ async def search_all_users(
     )
 
     if pagination.page is not None:
-        count_smt = select(func.count()).select_from(
+        count = await db_count(
+            db,
             select(User.id)
             .join(Role, Role.id == User.role_id)
-            .where(*filters)
-            .subquery()
+            .where(*filters),
+            CountStrategy.CACHED
         )
 
-        count_result = await db.execute(count_smt)
-        count = count_result.scalar_one()
-
         stmt = stmt.offset((pagination.page - 1) * pagination.limit)
         stmt = stmt.order_by(User.username.asc()).limit(pagination.limit)
 
@@ -1,36 +1,55 @@
 from typing import Optional
 
 from fastapi import HTTPException, Response, status
-from sqlalchemy import select, insert, and_, update, func, delete
+from sqlalchemy import select, insert, and_, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.cache import invalidate_tags, invalidate_tags_on_commit
 from core.dependencies import DBSession, AuthenticatedUser
 from core.enums.follow_type import FollowTypeEnum
 from core.enums.notification_type import NotificationTypeEnum
-from models import Follow, User, UserCounters, Notification
+from core.tasks import task
+from models import Follow, User, UserCounters
 from schema.social.follow import FollowResponse
+from service.user.notification import create_notification
 
-async def _update_counters(
-        db: DBSession,
+@task("social.update_follow_counters")
+async def apply_follow_counters(
+        db: AsyncSession,
         followee_id: int,
         follower_id: int,
-        action_type: FollowTypeEnum
+        delta: int
 ) -> None:
-    delta = 1 if action_type == FollowTypeEnum.FOLLOW else -1
+    # Plain deltas, not clamped at 0: tasks apply in any order, so an unfollow can land
+    # before its follow and the two must still add up
 
     # Target User (followers count)
     await db.execute(
         update(UserCounters)
         .where(UserCounters.user_id == followee_id)
-        .values(followers_count=func.greatest(UserCounters.followers_count + delta, 0))
+        .values(followers_count=UserCounters.followers_count + delta)
     )
 
     # Authenticated User: followings_count
     await db.execute(
         update(UserCounters)
         .where(UserCounters.user_id == follower_id)
-        .values(followings_count=func.greatest(UserCounters.followings_count + delta, 0))
+        .values(followings_count=UserCounters.followings_count + delta)
     )
 
+    # The profiles were dropped at the follow commit, a read since then cached the old counts
+    invalidate_tags_on_commit(db, f"user:{followee_id}", f"user:{follower_id}")
+
+async def _update_counters(
+        db: DBSession,
+        followee_id: int,
+        follower_id: int,
+        action_type: FollowTypeEnum
+) -> None:
+    delta = 1 if action_type == FollowTypeEnum.FOLLOW else -1
+
+    apply_follow_counters.enqueue(db, followee_id=followee_id, follower_id=follower_id, delta=delta)
+
 async def is_user_follow(
         db: DBSession,
         followee_id: int,
@@ -81,16 +100,18 @@ async def follow_user(
         )
 
         # Send Followee follow notification
-        notification = Notification(
-            type=NotificationTypeEnum.FOLLOW,
+        create_notification.enqueue(
+            db,
+            type=NotificationTypeEnum.FOLLOW.value,
             sender_id=follower_id,
             receiver_id=followee_id,
             data={},
             message=None
         )
-        db.add(notification)
 
-        return Response(status_code=status.HTTP_201_CREATED)
+    # After the commit, a cached profile read in between would keep the old is_follow
+    await invalidate_tags(f"user:{followee_id}", f"user:{follower_id}")
+    return Response(status_code=status.HTTP_201_CREATED)
 
 async def unfollow_user(
         db :DBSession,
@@ -120,4 +141,5 @@ async def unfollow_user(
             action_type=FollowTypeEnum.UNFOLLOW
         )
 
-        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    await invalidate_tags(f"user:{followee_id}", f"user:{follower_id}")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
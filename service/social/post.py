@@ -4,8 +4,8 @@ from fastapi import HTTPException, Query
 from sqlalchemy.orm import aliased
 from starlette.requests import Request
 from starlette import status
-from sqlalchemy import select, desc, func, literal, and_, or_
-from core.crud_helpers import PaginatedResponse
+from sqlalchemy import select, desc, literal, and_, or_
+from core.crud_helpers import PaginatedResponse, CountStrategy, db_count
 from core.dependencies import DBSession, Pagination, AuthenticatedUser
 from models import User, Follow, PostMedia, Repost, BookmarkPost, UserCounters, Like, Business
 from schema.social.post import PostCreate, UserPostResponse, PostCounters, LastMinute, PostUserActions, \
@@ -79,9 +79,8 @@ async def get_explore_feed_posts(
     if business_types:
         base_query = base_query.where(Post.business_type_id.in_(business_types))
 
-    count_query = select(func.count()).select_from(base_query.subquery())
-    count_total = await db.execute(count_query)
-    count = count_total.scalar_one()
+    # Without a business type filter the planner estimate of posts is close enough
+    count = await db_count(db, base_query, CountStrategy.ESTIMATED, estimate_table=Post.__table__)
 
     query = (
         select(
@@ -1,9 +1,7 @@
-from typing import Tuple
-
-from sqlalchemy import select, literal, and_, func, desc, or_
+from sqlalchemy import select, literal, and_, desc, or_
 from sqlalchemy.orm import aliased
 from sqlalchemy.sql import Select
-from core.crud_helpers import PaginatedResponse
+from core.crud_helpers import PaginatedResponse, CountStrategy, db_count
 from core.dependencies import Pagination, DBSession
 from models import Like, Post, Repost, BookmarkPost, Follow, User, UserCounters, Product, Currency, Business
 from schema.social.post import UserPostResponse, PostProductCurrency, PostCounters, PostUserActions, \
@@ -14,7 +12,7 @@ def build_posts_list_query(
         auth_user_id: int,
         pagination: Pagination,
         base_post_ids_query: Select
-) -> Tuple[Select, Select]:
+) -> Select:
     ids_sq = base_post_ids_query.subquery()
 
     BusinessOwner = aliased(User)
@@ -65,8 +63,6 @@ def build_posts_list_query(
         .exists()
     )
 
-    count_query = select(func.count()).select_from(ids_sq)
-
     list_query = (
         select(
             Post,
@@ -103,7 +99,7 @@ def build_posts_list_query(
         .offset((pagination.page - 1) * pagination.limit)
         .limit(pagination.limit)
     )
-    return count_query, list_query
+    return list_query
 
 def row_to_response(row, media_map) -> UserPostResponse:
     (
@@ -171,11 +167,12 @@ async def fetch_paginated_posts(
         db: DBSession,
         auth_user_id: int,
         pagination: Pagination,
-        base_post_ids_query: Select
+        base_post_ids_query: Select,
+        count_strategy: CountStrategy = CountStrategy.CACHED
     ) -> PaginatedResponse[UserPostResponse]:
-    count_q, list_q = build_posts_list_query(auth_user_id, pagination, base_post_ids_query)
+    list_q = build_posts_list_query(auth_user_id, pagination, base_post_ids_query)
 
-    count = (await db.execute(count_q)).scalar_one()
+    count = await db_count(db, base_post_ids_query, count_strategy)
 
     rows = (await db.execute(list_q)).all()
     post_ids = [post.id for (post, *_) in rows]
@@ -1,10 +1,12 @@
 from enum import Enum
 from typing import Type, Union, Final
 
-from sqlalchemy import update, func
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import InstrumentedAttribute
 
 from core.dependencies import DBSession
+from core.tasks import task
 from models import Like, BookmarkPost, Repost, Post, Comment
 
 ActionTable = Union[Type[Like], Type[BookmarkPost], Type[Repost], Type[Comment]]
@@ -20,6 +22,23 @@ COUNTER_COLUMN_MAP: Final[dict[type, InstrumentedAttribute]] = {
     Comment: Post.comment_count
 }
 
+@task("social.update_post_counter")
+async def apply_post_counter(
+    db: AsyncSession,
+    post_id: int,
+    column: str,
+    delta: int
+) -> None:
+    counter = getattr(Post, column)
+
+    # Not clamped at 0, deltas may arrive out of order and have to commute
+    stmt = (
+        update(Post)
+        .where(Post.id == post_id)
+        .values({ counter: counter + delta })
+    )
+    await db.execute(stmt)
+
 async def update_post_counter(
     db: DBSession,
     model: ActionTable,
@@ -28,11 +47,5 @@ async def update_post_counter(
 ) -> None:
     column = COUNTER_COLUMN_MAP[model]
 
-    delta = action.value
-
-    stmt = (
-        update(Post)
-        .where(Post.id == post_id)
-        .values({ column: func.greatest(column + delta, 0) })
-    )
-    await db.execute(stmt)
\ No newline at end of file
+    # Applied in the background, in the same transaction as the outbox row
+    apply_post_counter.enqueue(db, post_id=post_id, column=column.key, delta=action.value)
@@ -1,15 +1,33 @@
+from typing import Optional
+
 from fastapi import Response, HTTPException, status
 
-from sqlalchemy import select, desc, and_, literal, func, or_
+from sqlalchemy import select, desc, and_, literal, or_, insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
-from core.crud_helpers import PaginatedResponse
+from core.crud_helpers import PaginatedResponse, CountStrategy, db_count
 from core.dependencies import DBSession, Pagination, AuthenticatedUser
 from core.enums.role_enum import RoleEnum
+from core.tasks import task
 from models import Notification, Follow, User, Role, UserCounters
 from schema.user.notification import NotificationResponse
 from schema.user.user import UserBaseMinimum
 
+@task("user.create_notification")
+async def create_notification(
+        db: AsyncSession,
+        type: str,
+        sender_id: int,
+        receiver_id: int,
+        data: Optional[dict] = None,
+        message: Optional[str] = None
+) -> None:
+    await db.execute(
+        insert(Notification)
+        .values(type=type, sender_id=sender_id, receiver_id=receiver_id, data=data, message=message)
+    )
+
 async def get_notifications_by_user_id(
         db: DBSession,
         pagination: Pagination,
@@ -17,14 +35,13 @@ async def get_notifications_by_user_id(
 ) -> PaginatedResponse[NotificationResponse]:
     auth_user_id = auth_user.id
 
-    count_stmt = select(func.count()).select_from(Notification).where(
+    count_stmt = select(Notification.id).where(
         and_(
             Notification.is_deleted == False,
             Notification.receiver_id == auth_user_id
         )
     )
-    count_total = await db.execute(count_stmt)
-    count = count_total.scalar_one()
+    count = await db_count(db, count_stmt, CountStrategy.CACHED)
 
     is_follow = (
         select(literal(True))
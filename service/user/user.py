@@ -1,3 +1,4 @@
+import os
 import random
 from datetime import datetime, timezone, timedelta, date
 from zoneinfo import ZoneInfo
@@ -9,6 +10,7 @@ from sqlalchemy.orm import joinedload
 from starlette import status
 from starlette.requests import Request
 
+from core.cache import cached, invalidate_tags
 from core.crud_helpers import db_get_all, db_get_one, db_update, PaginatedResponse
 from core.dependencies import DBSession, AuthenticatedUser, Pagination
 from core.enums.appointment_status_enum import AppointmentStatusEnum
@@ -42,22 +44,31 @@ async def generate_username_suggestions(db: DBSession, base: str, max_suggestion
     tried = set()
 
     while len(suggestions) < max_suggestions:
-        suffix = random.choice([
-            str(random.randint(1, 9999)),
-            f"_{random.randint(10, 99)}",
-            f"_{random.randint(100, 999)}",
-            "_user"
-        ])
-        candidate = f"{base}{suffix}"
-        if candidate in tried:
-            continue
-        tried.add(candidate)
-
-        result = await db.execute(select(User.id).where(and_(User.username == candidate)))
-        if result.scalar_one_or_none() is None:
-            suggestions.append(candidate)
+        # Twice the missing suggestions, checked in one statement
+        candidates = set()
+        while len(candidates) < 2 * (max_suggestions - len(suggestions)):
+            suffix = random.choice([
+                str(random.randint(1, 9999)),
+                f"_{random.randint(10, 99)}",
+                f"_{random.randint(100, 999)}",
+                "_user"
+            ])
+            candidate = f"{base}{suffix}"
+            if candidate not in tried:
+                candidates.add(candidate)
+        tried.update(candidates)
+
+        result = await db.execute(select(User.username).where(User.username.in_(candidates)))
+        taken = set(result.scalars().all())
+
+        suggestions.extend(sorted(candidates - taken)[:max_suggestions - len(suggestions)])
     return suggestions
 
+USER_PROFILE_CACHE_TTL = int(os.getenv("USER_PROFILE_CACHE_TTL") or 30)
+
+# Per viewer because of is_follow, dropped through the user tag when the profile changes
+@cached(ttl=USER_PROFILE_CACHE_TTL, key="user:{user_id}:profile:{auth_user.id}", tags=["user:{user_id}"],
+        response_model=UserProfileResponse)
 async def get_user_profile_by_id(
         db: DBSession,
         user_id: int,
@@ -230,6 +241,8 @@ async def update_user_fullname(
         filters={ "id": auth_user_id }
     )
 
+    await invalidate_tags(f"user:{auth_user_id}")
+
     return UserUpdateResponse(
         id=user.id,
         fullname=user.fullname,
@@ -269,6 +282,8 @@ async def update_user_username(
     await db.commit()
     await db.refresh(user)
 
+    await invalidate_tags(f"user:{auth_user_id}")
+
     return UserUpdateResponse(
         id=user.id,
         fullname=user.fullname,
@@ -303,6 +318,8 @@ async def update_user_birthdate(
     await db.commit()
     await db.refresh(user)
 
+    await invalidate_tags(f"user:{auth_user_id}")
+
     return UserUpdateResponse(
         id=user.id,
         fullname=user.fullname,
@@ -334,6 +351,8 @@ async def update_user_gender(
     await db.commit()
     await db.refresh(user)
 
+    await invalidate_tags(f"user:{auth_user_id}")
+
     return UserUpdateResponse(
         id=user.id,
         fullname=user.fullname,
@@ -359,6 +378,8 @@ async def update_user_bio(
         filters={ "id": auth_user_id }
     )
 
+    await invalidate_tags(f"user:{auth_user_id}")
+
     return UserUpdateResponse(
         id=user.id,
         fullname=user.fullname,
@@ -384,6 +405,8 @@ async def update_user_website(
         filters={ "id": auth_user_id }
     )
 
+    await invalidate_tags(f"user:{auth_user_id}")
+
     return UserUpdateResponse(
         id=user.id,
         fullname=user.fullname,
@@ -409,6 +432,8 @@ async def update_user_public_email(
         filters={"id": auth_user_id}
     )
 
+    await invalidate_tags(f"user:{auth_user_id}")
+
     return UserUpdateResponse(
         id=user.id,
         fullname=user.fullname,
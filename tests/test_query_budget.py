@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from api.v1.endpoints.user.user import search_username
+from core.query_budget import QUERY_BUDGET_MODE, QueryBudgetExceeded, install_query_tracking, query_budget
+from models import User
+from schema.user.user import SearchUsername
+
+async def _session_factory() -> async_sessionmaker:
+    # Only the columns the statements below touch
+    engine = create_async_engine("sqlite+aiosqlite://")
+    install_query_tracking(engine)
+
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR(35) UNIQUE NOT NULL)"))
+        await conn.execute(text("INSERT INTO users (username) VALUES ('taken'), ('other')"))
+
+    return async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+
+def test_raise_mode_is_enabled():
+    assert QUERY_BUDGET_MODE == "raise"
+
+def test_available_username_within_budget():
+    async def run():
+        async with (await _session_factory())() as db:
+            return await search_username(db, SearchUsername(username="taken"))
+
+    response = asyncio.run(run())
+
+    assert response.available is False
+    assert len(response.suggestions) == 5
+    assert "taken" not in response.suggestions
+
+def test_n_plus_one_raises():
+    @query_budget(max_queries=50, max_duplicates=3)
+    async def lookup_one_by_one(db: AsyncSession, usernames):
+        return [await db.scalar(select(User.id).where(User.username == username)) for username in usernames]
+
+    async def run():
+        async with (await _session_factory())() as db:
+            return await lookup_one_by_one(db, ["taken", "other", "a", "b", "c"])
+
+    with pytest.raises(QueryBudgetExceeded, match="possible N\\+1"):
+        asyncio.run(run())
+
+def test_over_budget_statement_is_not_run():
+    @query_budget(max_queries=2)
+    async def insert_then_count(db: AsyncSession):
+        await db.execute(text("INSERT INTO users (username) VALUES ('new')"))
+        await db.execute(text("INSERT INTO users (username) VALUES ('newer')"))
+        await db.execute(text("INSERT INTO users (username) VALUES ('newest')"))
+
+    async def run():
+        factory = await _session_factory()
+        async with factory() as db:
+            with pytest.raises(QueryBudgetExceeded, match="budget is 2"):
+                await insert_then_count(db)
+            await db.rollback()
+
+        async with factory() as db:
+            return (await db.execute(text("SELECT username FROM users ORDER BY id"))).scalars().all()
+
+    assert asyncio.run(run()) == ["taken", "other"]